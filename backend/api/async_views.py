@@ -0,0 +1,86 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+
+from .authentication import CachedTokenAuthentication
+from .download_cart import download_cart
+from .renderers import FastJSONRenderer
+
+# Ограниченный пул потоков для блокирующей работы с ORM в режиме ASGI:
+# у каждого потока своё соединение, поэтому их не больше размера пула
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_POOL_THREADS,
+    thread_name_prefix='orm',
+)
+
+
+def call_with_connections(func, *args, **kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_pool(func, *args, **kwargs):
+    """Выполняет блокирующую функцию в пуле потоков ORM."""
+
+    return await sync_to_async(
+        call_with_connections,
+        thread_sensitive=False,
+        executor=executor,
+    )(func, *args, **kwargs)
+
+
+def pooled(view):
+    """Делает из синхронной вьюхи асинхронную, работающую в пуле потоков.
+
+    В режиме ASGI Django выполняет все синхронные вьюхи в одном потоке,
+    а обёрнутые вьюхи обрабатываются параллельно потоками пула.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response = await run_in_pool(view, request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = await run_in_pool(response.render)
+        return response
+
+    return wrapper
+
+
+def error_response(exception):
+    return HttpResponse(
+        FastJSONRenderer().render({'detail': exception.detail}),
+        status=exception.status_code,
+        content_type='application/json',
+    )
+
+
+async def download_shopping_cart(request):
+    """Асинхронное скачивание списка покупок."""
+
+    if request.method != 'GET':
+        return HttpResponse(status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    authentication = CachedTokenAuthentication()
+    try:
+        credentials = await run_in_pool(authentication.authenticate, request)
+    except APIException as error:
+        return error_response(error)
+    if credentials is None:
+        return error_response(NotAuthenticated())
+
+    user, _ = credentials
+
+    def build_response():
+        if user.shopping_cart.exists():
+            return download_cart(user)
+        return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+
+    return await run_in_pool(build_response)
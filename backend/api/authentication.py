@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from .cache import LRUCache
+from .invalidation import local_invalidation
+from .versions import ACCOUNTS, account_key, bump_versions
+
+CACHE_KEY_PREFIX = 'auth-token-id:'
+
+# Поля, от которых зависят записи кэша токенов; сохранение только
+# других полей (например, last_login при входе) кэш не сбрасывает
+ACCOUNT_FIELDS = frozenset(('is_active', 'password', 'deleted_at'))
+
+token_cache = LRUCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+def drop_accounts(user_ids):
+    """Сброс токенов аккаунтов, изменённых в других воркерах."""
+
+    if user_ids is None:
+        token_cache.clear()
+    else:
+        token_cache.delete_where(lambda user_id: user_id in user_ids)
+
+
+local_invalidation.subscribe(ACCOUNTS, drop_accounts)
+
+
+def get_shared_cache():
+    if settings.TOKEN_CACHE_ALIAS is None:
+        return None
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def invalidate_token(key):
+    """Удаляет токен из локального и общего кэша."""
+
+    token_cache.delete(key)
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(CACHE_KEY_PREFIX + key)
+
+
+def invalidate_user(user_id):
+    """Удаляет из кэша все токены пользователя во всех воркерах."""
+
+    token_cache.delete_where(lambda cached_id: cached_id == user_id)
+    bump_versions(account_key(user_id))
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete_many([
+            CACHE_KEY_PREFIX + key
+            for key in Token.objects
+            .filter(user_id=user_id)
+            .values_list('key', flat=True)
+        ])
+
+
+def load_user(user_id, key):
+    """Строка пользователя для токена из кэша.
+
+    Запись кэша может пережить пользователя, пока другие воркеры не
+    узнали о его удалении или блокировке: тогда она удаляется, а запрос
+    получает 401, как при проверке токена по базе.
+    """
+
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        user = None
+    if user is None or not user.is_active:
+        invalidate_token(key)
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return user
+
+
+class LazyUser(SimpleLazyObject):
+    """Пользователь из кэша токенов.
+
+    id и признаки аутентификации известны без запроса, а строка
+    пользователя читается из базы при первом обращении к остальным
+    атрибутам, в том числе к is_active. Каждый запрос получает свой
+    свежий экземпляр, поэтому его можно сохранять.
+    """
+
+    def __init__(self, user_id, key):
+        super().__init__(lambda: load_user(user_id, key))
+        self.__dict__['known'] = {
+            'pk': user_id,
+            'id': user_id,
+            'is_authenticated': True,
+            'is_anonymous': False,
+        }
+
+    def __getattr__(self, name):
+        if self._wrapped is empty and name in self.known:
+            return self.known[name]
+        return super().__getattr__(name)
+
+    def __bool__(self):
+        return True
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кэшированием id пользователя.
+
+    id ищется сначала в LRU-кэше воркера, затем в общем кэше Django
+    (если задан TOKEN_CACHE_ALIAS) и только после этого в базе. В кэш
+    попадают только активные пользователи. Кэш сбрасывается сигналами
+    при удалении токена, изменении и удалении пользователя; другие
+    воркеры узнают об этом по версии аккаунта.
+    """
+
+    def authenticate_credentials(self, key):
+        user_id = token_cache.get(key)
+        shared_cache = get_shared_cache()
+        if user_id is None and shared_cache is not None:
+            user_id = shared_cache.get(CACHE_KEY_PREFIX + key)
+            if user_id is not None:
+                token_cache.set(key, user_id)
+
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user.pk)
+            if shared_cache is not None:
+                shared_cache.set(
+                    CACHE_KEY_PREFIX + key,
+                    user.pk,
+                    settings.TOKEN_CACHE_TTL,
+                )
+            return user, token
+
+        return LazyUser(user_id, key), Token(key=key, user_id=user_id)
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.response import Response
+
+from .request_cache import get_request_cache
+
+BATCH_PREFIX = '/api/'
+
+# Заголовки пакетного запроса, которые не относятся к подзапросам
+SKIPPED_META = (
+    'CONTENT_LENGTH',
+    'CONTENT_TYPE',
+    'HTTP_IF_MATCH',
+    'HTTP_IF_MODIFIED_SINCE',
+    'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_UNMODIFIED_SINCE',
+)
+
+
+def build_subrequest(request, path, query, etag=None):
+    """GET-подзапрос с пользователем и кэшем пакетного запроса.
+
+    Условные заголовки пакетного запроса не передаются; etag подзапроса
+    становится его If-None-Match.
+    """
+
+    subrequest = HttpRequest()
+    subrequest.method = 'GET'
+    subrequest.path = subrequest.path_info = path
+    subrequest.META = {
+        key: value for key, value in request.META.items()
+        if key not in SKIPPED_META
+    }
+    subrequest.META.update(
+        REQUEST_METHOD='GET',
+        PATH_INFO=path,
+        QUERY_STRING=query,
+        HTTP_ACCEPT='application/json',
+    )
+    if etag:
+        subrequest.META['HTTP_IF_NONE_MATCH'] = etag
+    subrequest.GET = QueryDict(query)
+    subrequest.COOKIES = request.COOKIES
+    subrequest.request_cache = get_request_cache(request)
+    if request.user.is_authenticated:
+        # Подзапросы не проходят аутентификацию повторно
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def get_body(response):
+    if response.status_code == status.HTTP_304_NOT_MODIFIED:
+        return None
+    if isinstance(response, Response):
+        return response.data
+    if getattr(response, 'streaming', False):
+        return None
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def run_subrequest(request, url, batch_view, etag=None):
+    """Выполняет подзапрос в текущем процессе, минуя middleware.
+
+    Возвращает код ответа, тело и ETag подзапроса.
+    """
+
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith(
+        BATCH_PREFIX,
+    ):
+        return status.HTTP_400_BAD_REQUEST, {
+            'detail': f'Допустимы только пути, начинающиеся с {BATCH_PREFIX}',
+        }, None
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return status.HTTP_404_NOT_FOUND, {
+            'detail': 'Страница не найдена.',
+        }, None
+    view = match.func
+    if asyncio.iscoroutinefunction(view):
+        # В режиме ASGI вьюхи обёрнуты pooled, а пакет уже в пуле
+        view = getattr(view, '__wrapped__', None)
+    if view is None or getattr(view, 'view_class', None) is batch_view:
+        return status.HTTP_400_BAD_REQUEST, {
+            'detail': 'Этот путь нельзя запросить в пакете.',
+        }, None
+    response = view(
+        build_subrequest(request, parts.path, parts.query, etag),
+        *match.args,
+        **match.kwargs,
+    )
+    return response.status_code, get_body(response), response.get('ETag')
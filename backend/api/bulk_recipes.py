@@ -0,0 +1,232 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import Ingredient, IngredientParameters, Recipe, Tag
+from users.models import User
+from .counters import change_counter
+from .feed import fan_out_recipes
+from .images import stash_image
+from .jobs import enqueue_many
+from .serializers import BulkRecipeSerializer
+from .versions import RECIPES, bump_versions
+
+CREATED = 'created'
+UPDATED = 'updated'
+EXISTS = 'exists'
+INVALID = 'invalid'
+
+RECIPE_FIELDS = ('text', 'cooking_time', 'image')
+
+
+def existing_recipes(keys):
+    """(id автора, название) -> id уже существующих рецептов."""
+
+    if not keys:
+        return {}
+    return {
+        (author_id, name): pk
+        for pk, author_id, name in Recipe.objects.filter(
+            author_id__in={author_id for author_id, _ in keys},
+            name__in={name for _, name in keys},
+        ).values_list('pk', 'author_id', 'name')
+        if (author_id, name) in keys
+    }
+
+
+def set_relations(rows_by_pk):
+    """Ингредиенты и теги рецептов двумя пакетными INSERT."""
+
+    IngredientParameters.objects.bulk_create(
+        IngredientParameters(
+            recipe_id=pk,
+            ingredient_id=ingredient_id,
+            amount=amount,
+        )
+        for pk, row in rows_by_pk.items()
+        for ingredient_id, amount in row['ingredients']
+    )
+    Recipe.tags.through.objects.bulk_create(
+        (
+            Recipe.tags.through(recipe_id=pk, tag_id=tag_id)
+            for pk, row in rows_by_pk.items()
+            for tag_id in row['tags']
+        ),
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def insert_recipes(rows, update_existing=False):
+    """Пакетно сохраняет рецепты; возвращает [(статус, id)] по строкам.
+
+    Строка - словарь с author_id, name, text, cooking_time, image,
+    tags (id) и ingredients (пары id, количество), необязательно
+    pub_date. Рецепт с тем же автором и названием (unique_recipe)
+    перезаписывается при update_existing, иначе остаётся как есть.
+    bulk_create не отправляет сигналы, поэтому счётчики, ленты и
+    версии обновляются здесь же.
+    """
+
+    keys = [(row['author_id'], row['name']) for row in rows]
+    existing = existing_recipes(set(keys))
+    new = {}
+    for key, row in zip(keys, rows):
+        if key not in existing:
+            new.setdefault(key, row)
+    # Рецепты, созданные параллельно после проверки, пропускаются
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                author_id=row['author_id'],
+                name=row['name'],
+                **{field: row[field] for field in RECIPE_FIELDS},
+            )
+            for row in new.values()
+        ),
+        ignore_conflicts=True,
+    )
+    known = set(existing.values())
+    created = {
+        key: pk for key, pk in existing_recipes(set(new)).items()
+        if pk not in known
+    }
+    now = timezone.now()
+    changed = {pk: new[key] for key, pk in created.items()}
+    dated = [
+        Recipe(pk=pk, pub_date=row['pub_date'])
+        for pk, row in changed.items() if row.get('pub_date')
+    ]
+    if dated:
+        # auto_now_add при bulk_create перезаписывает дату публикации
+        Recipe.objects.bulk_update(dated, ['pub_date'])
+
+    updated = {}
+    if update_existing:
+        updated = {
+            existing[key]: row for key, row in zip(keys, rows)
+            if key in existing
+        }
+        Recipe.objects.bulk_update(
+            [
+                Recipe(
+                    pk=pk,
+                    updated_at=now,
+                    **{field: row[field] for field in RECIPE_FIELDS},
+                )
+                for pk, row in updated.items()
+            ],
+            [*RECIPE_FIELDS, 'updated_at'],
+        )
+        # Без сигналов на каждую строку: версии обновляются ниже
+        for model in (IngredientParameters, Recipe.tags.through):
+            stale = model.objects.filter(recipe_id__in=updated)
+            stale._raw_delete(stale.db)
+        changed.update(updated)
+    set_relations(changed)
+
+    authors = Counter(author_id for author_id, _ in created)
+    for author_id, count in authors.items():
+        change_counter(User, 'recipes_count', author_id, count)
+    fan_out_recipes((pk, author_id) for (author_id, _), pk in created.items())
+    if changed:
+        bump_versions(RECIPES)
+
+    # Рецепты, которые успели создать параллельно
+    existing.update(existing_recipes(set(new) - set(created)))
+    results = []
+    reported = set()
+    for key in keys:
+        if key in created:
+            status = EXISTS if key in reported else CREATED
+            reported.add(key)
+            results.append((status, created[key]))
+        else:
+            pk = existing.get(key)
+            results.append((UPDATED if pk in updated else EXISTS, pk))
+    return results
+
+
+def enqueue_similar(recipe_ids):
+    """Ставит пересчёт похожих рецептов, по задаче на рецепт."""
+
+    recipe_ids = list(recipe_ids)
+    enqueue_many(
+        'update_similar_recipes',
+        ({'recipe_id': pk} for pk in recipe_ids),
+        (f'update_similar_recipes:{pk}' for pk in recipe_ids),
+    )
+
+
+def referenced_ids(items, field, key=None):
+    """id из сырых данных пачки, чтобы загрузить их одним запросом."""
+
+    ids = set()
+    for item in items:
+        values = item.get(field) if isinstance(item, dict) else None
+        for value in values if isinstance(values, list) else ():
+            if key is not None:
+                value = value.get(key) if isinstance(value, dict) else None
+            if isinstance(value, int):
+                ids.add(value)
+    return ids
+
+
+def create_recipes(items, author):
+    """Пакетное создание рецептов автора; результат по каждому рецепту.
+
+    Рецепты проверяются по одному, но теги и ингредиенты всей пачки
+    загружаются двумя запросами. Верные рецепты сохраняются одной
+    транзакцией, изображения декодирует фоновая задача.
+    """
+
+    context = {
+        'tag_ids': set(Tag.objects.filter(
+            pk__in=referenced_ids(items, 'tags'),
+        ).values_list('pk', flat=True)),
+        'ingredient_ids': set(Ingredient.objects.filter(
+            pk__in=referenced_ids(items, 'ingredients', 'id'),
+        ).values_list('pk', flat=True)),
+    }
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = BulkRecipeSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            results[index] = {'status': INVALID, 'errors': serializer.errors}
+            continue
+        data = serializer.validated_data
+        valid.append((index, data['image'], {
+            'author_id': author.pk,
+            'name': data['name'],
+            'text': data['text'],
+            'cooking_time': data['cooking_time'],
+            'image': '',
+            'tags': data['tags'],
+            'ingredients': [
+                (ingredient['id'], ingredient['amount'])
+                for ingredient in data['ingredients']
+            ],
+        }))
+    if not valid:
+        return results
+
+    with transaction.atomic():
+        inserted = insert_recipes([row for _, _, row in valid])
+        images = []
+        for (index, image, _), (status, pk) in zip(valid, inserted):
+            if status != CREATED:
+                results[index] = {
+                    'status': EXISTS,
+                    'id': pk,
+                    'errors': {'name': [
+                        'У вас уже есть рецепт с таким названием.',
+                    ]},
+                }
+                continue
+            images.append({'recipe_id': pk, 'path': stash_image(image)})
+            results[index] = {'status': CREATED, 'id': pk}
+        enqueue_many('process_recipe_image', images)
+        enqueue_similar(image['recipe_id'] for image in images)
+    return results
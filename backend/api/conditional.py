@@ -0,0 +1,141 @@
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import (
+    get_conditional_response,
+    patch_vary_headers,
+    quote_etag,
+)
+from django.utils.http import http_date
+
+from .versions import RECIPES, get_versions, user_key
+
+
+def split_versions(versions):
+    """Версии для ETag и самая поздняя дата изменения."""
+
+    dates = [date for _, date in versions.values() if date is not None]
+    return (
+        sorted((key, value) for key, (value, _) in versions.items()),
+        max(dates, default=None),
+    )
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve.
+
+    Валидаторы считаются по счётчикам версий из version_keys без
+    рендеринга тела, поэтому ответ 304 не вызывает сериализаторы.
+    Для user_dependent вьюсетов учитывается версия личных данных
+    пользователя.
+    """
+
+    version_keys = ()
+    user_dependent = False
+
+    def get_version_keys(self):
+        keys = list(self.version_keys)
+        user = self.request.user
+        if self.user_dependent and user.is_authenticated:
+            keys.append(user_key(user.pk))
+        return keys
+
+    def get_validators(self):
+        """Части ETag и дата изменения или None, если проверка не нужна."""
+
+        return split_versions(get_versions(*self.get_version_keys()))
+
+    def conditional(self, handler, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        parts, last_modified = validators
+        user = request.user
+        etag = quote_etag(hashlib.sha1(repr((
+            request.get_full_path(),
+            request.accepted_media_type,
+            user.pk if self.user_dependent else None,
+            parts,
+        )).encode()).hexdigest())
+        timestamp = None
+        if last_modified is not None:
+            timestamp = timegm(last_modified.utctimetuple())
+
+        response = get_conditional_response(
+            request._request,
+            etag=etag,
+            last_modified=timestamp,
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class RecipeConditionalMixin(ConditionalGetMixin):
+    """Валидаторы рецептов по MAX(updated_at) и числу строк фильтра.
+
+    Last-Modified списка берётся из общей версии рецептов: она меняется
+    и при удалении, и когда рецепт выходит из выборки фильтра.
+    """
+
+    version_keys = (RECIPES,)
+    user_dependent = True
+    filtered_queryset = None
+    filtered_count = None
+
+    def filter_queryset(self, queryset):
+        """Выборка, отфильтрованная для валидаторов, без повторного фильтра.
+
+        list и retrieve фильтруют self.get_queryset() ещё раз после
+        проверки валидаторов; фильтр с запросами к авторам, тегам и
+        индексу ингредиентов выполняется один раз.
+        """
+
+        if self.filtered_queryset is not None:
+            return self.filtered_queryset
+        return super().filter_queryset(queryset)
+
+    def get_validators(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        self.filtered_queryset = queryset
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        detail = lookup in self.kwargs
+        if detail:
+            try:
+                queryset = queryset.filter(**{
+                    self.lookup_field: self.kwargs[lookup],
+                })
+            except (TypeError, ValueError, ValidationError):
+                return None
+        stats = queryset.order_by().aggregate(
+            updated_at=Max('updated_at'),
+            count=Count('pk'),
+        )
+        if not detail:
+            # Пагинатор возьмёт число строк отсюда, без своего COUNT
+            self.filtered_count = stats['count']
+        if not stats['count']:
+            return None if detail else ([0], None)
+
+        versions = get_versions(*self.get_version_keys())
+        _, recipes_updated_at = versions.pop(RECIPES)
+        parts, last_modified = split_versions(versions)
+        if detail or recipes_updated_at is None:
+            recipes_updated_at = stats['updated_at']
+        return (
+            [stats['updated_at'], stats['count'], *parts],
+            max(filter(None, (last_modified, recipes_updated_at))),
+        )
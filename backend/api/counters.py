@@ -0,0 +1,55 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorited, Recipe, ShoppingCart
+from users.models import Follow, User
+
+# Счётчик: (модель, поле, модель строк, поле внешнего ключа на модель)
+COUNTERS = (
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+    (Recipe, 'favorites_count', Favorited, 'recipe'),
+    (Recipe, 'in_carts_count', ShoppingCart, 'recipe'),
+)
+
+
+def change_counter(model, field, pk, delta):
+    """Атомарно меняет счётчик на delta выражением F()."""
+
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def counter_for(instance):
+    """Модель, поле и id строки со счётчиком записи instance."""
+
+    for model, field, row_model, foreign_key in COUNTERS:
+        if isinstance(instance, row_model):
+            return model, field, getattr(instance, f'{foreign_key}_id')
+    raise TypeError(f'Нет счётчика для {type(instance).__name__}')
+
+
+def actual_count(row_model, foreign_key):
+    return Coalesce(
+        Subquery(
+            row_model.objects
+            .filter(**{foreign_key: OuterRef('pk')})
+            .order_by()
+            .values(foreign_key)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconcile_counters():
+    """Исправляет разошедшиеся счётчики; возвращает число исправлений."""
+
+    fixed = {}
+    for model, field, row_model, foreign_key in COUNTERS:
+        actual = actual_count(row_model, foreign_key)
+        fixed[f'{model.__name__}.{field}'] = model.objects.filter(
+            ~Q(**{field: actual}),
+        ).update(**{field: actual})
+    return fixed
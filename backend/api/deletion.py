@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+
+from recipes.models import Recipe
+from users.models import User
+from .counters import COUNTERS
+from .versions import RECIPES, bump_versions
+
+
+def cascade_relations(model):
+    """Обратные связи с on_delete=CASCADE, включая скрытые таблицы M2M."""
+
+    return [
+        (relation.related_model, relation.field.name)
+        for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created
+        and not relation.concrete
+        and (relation.one_to_many or relation.one_to_one)
+        and relation.on_delete is models.CASCADE
+    ]
+
+
+def adjust_counters(row_model, queryset):
+    """Уменьшает счётчики, которые ссылаются на удаляемые строки."""
+
+    for model, field, counted_model, foreign_key in COUNTERS:
+        if counted_model is not row_model:
+            continue
+        totals = Counter(queryset.values_list(f'{foreign_key}_id', flat=True))
+        by_total = {}
+        for pk, total in totals.items():
+            by_total.setdefault(total, []).append(pk)
+        for total, pks in by_total.items():
+            model.objects.filter(pk__in=pks).update(
+                **{field: F(field) - total},
+            )
+
+
+def delete_in_chunks(queryset, chunk_size):
+    """Удаляет строки пачками по первичному ключу без загрузки объектов.
+
+    Сигналы не отправляются, поэтому счётчики правятся здесь же.
+    """
+
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        chunk = model._base_manager.filter(pk__in=pks)
+        with transaction.atomic():
+            adjust_counters(model, chunk)
+            deleted += chunk._raw_delete(chunk.db)
+
+
+def purge_recipes(queryset, chunk_size):
+    """Удаляет рецепты и зависимые строки, затем файлы изображений."""
+
+    storage = Recipe._meta.get_field('image').storage
+    relations = cascade_relations(Recipe)
+    deleted = 0
+    while True:
+        rows = list(queryset.values_list('pk', 'image')[:chunk_size])
+        if not rows:
+            return deleted
+        pks = [pk for pk, _ in rows]
+        # Без общей транзакции: при сбое повторный запуск продолжит
+        # с того же места, а блокировки держатся не дольше пачки
+        for related_model, field_name in relations:
+            delete_in_chunks(
+                related_model._base_manager.filter(
+                    **{f'{field_name}__in': pks},
+                ),
+                chunk_size,
+            )
+        chunk = Recipe._base_manager.filter(pk__in=pks)
+        with transaction.atomic():
+            adjust_counters(Recipe, chunk)
+            deleted += chunk._raw_delete(chunk.db)
+        for _, image in rows:
+            if image and storage.exists(image):
+                storage.delete(image)
+
+
+def purge_user(user_id, chunk_size=None):
+    """Удаляет скрытый аккаунт и всё, что на него ссылается.
+
+    Память и длительность транзакций ограничены chunk_size строк.
+    """
+
+    chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+    deleted = {'recipes': purge_recipes(
+        Recipe._base_manager.filter(author_id=user_id),
+        chunk_size,
+    )}
+    for related_model, field_name in cascade_relations(User):
+        if related_model is Recipe:
+            continue
+        deleted[related_model._meta.label] = delete_in_chunks(
+            related_model._base_manager.filter(**{field_name: user_id}),
+            chunk_size,
+        )
+    User.objects.filter(pk=user_id).delete()
+    bump_versions(RECIPES)
+    return deleted
@@ -9,7 +9,10 @@ def download_cart(user):
 
     ingredients_total = (
         IngredientParameters.objects
-        .filter(recipe__shopping_cart__user=user)
+        .filter(
+            recipe__shopping_cart__user=user,
+            recipe__author__deleted_at__isnull=True,
+        )
         .values('ingredient__name', 'ingredient__measurement_unit')
         .annotate(total=Sum('amount'))
         .order_by('ingredient__name')
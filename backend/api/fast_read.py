@@ -0,0 +1,137 @@
+from collections import defaultdict
+
+from recipes.models import (
+    Favorited,
+    IngredientParameters,
+    Recipe,
+    ShoppingCart,
+)
+from users.models import Follow
+from .fieldsets import get_request_fieldsets, is_selected, prune
+
+AUTHOR_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name')
+RECIPE_FIELDS = ('id', 'name', 'text', 'image', 'cooking_time')
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+INGREDIENT_FIELDS = ('id', 'name', 'measurement_unit')
+
+
+def recipe_rows(queryset, *extra_fields):
+    """Плоские строки рецептов с автором для страницы списка.
+
+    extra_fields нужны пагинации, например pub_date для курсора ленты.
+    """
+
+    return (
+        queryset
+        .prefetch_related(None)
+        .values(
+            *RECIPE_FIELDS,
+            *(f'author__{field}' for field in AUTHOR_FIELDS),
+            *extra_fields,
+        )
+    )
+
+
+def image_url(name, request):
+    if not name:
+        return None
+    url = Recipe._meta.get_field('image').storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_user_flags(user, favorite_ids, cart_ids, author_ids):
+    """Подписки, избранное и корзина пользователя среди переданных id."""
+
+    if user is None or user.is_anonymous:
+        return set(), set(), set()
+    return tuple(
+        set(
+            queryset
+            .filter(user=user, **{f'{field}__in': ids})
+            .values_list(field, flat=True)
+        ) if ids else set()
+        for queryset, field, ids in (
+            (Follow.objects, 'author_id', author_ids),
+            (Favorited.objects, 'recipe_id', favorite_ids),
+            (ShoppingCart.objects, 'recipe_id', cart_ids),
+        )
+    )
+
+
+def serialize_recipes(rows, request):
+    """Собирает то же представление, что и RecipeReadSerializer.
+
+    Вместо экземпляров моделей и вложенных сериализаторов используются
+    словари из values(): теги, ингредиенты и флаги пользователя
+    загружаются фиксированным числом запросов на всю страницу. Поля,
+    скрытые через ?fields= и ?omit=, не загружаются.
+    """
+
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    author_ids = {row['author__id'] for row in rows}
+    include, omit = get_request_fieldsets(request)
+
+    def selected(*path):
+        return is_selected(include, omit, path)
+
+    user = getattr(request, 'user', None)
+    followed, favorited, in_cart = get_user_flags(
+        user,
+        recipe_ids if selected('is_favorited') else (),
+        recipe_ids if selected('is_in_shopping_cart') else (),
+        author_ids if selected('author', 'is_subscribed') else (),
+    )
+
+    tags = defaultdict(list)
+    for tag in () if not selected('tags') else (
+        Recipe.tags.through.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by('tag_id')
+        .values('recipe_id', *(f'tag__{field}' for field in TAG_FIELDS))
+    ):
+        tags[tag['recipe_id']].append({
+            field: tag[f'tag__{field}'] for field in TAG_FIELDS
+        })
+
+    ingredients = defaultdict(list)
+    for ingredient in () if not selected('ingredients') else (
+        IngredientParameters.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by('id')
+        .values(
+            'recipe_id',
+            'amount',
+            *(f'ingredient__{field}' for field in INGREDIENT_FIELDS),
+        )
+    ):
+        item = {
+            field: ingredient[f'ingredient__{field}']
+            for field in INGREDIENT_FIELDS
+        }
+        item['amount'] = ingredient['amount']
+        ingredients[ingredient['recipe_id']].append(item)
+
+    return prune([
+        {
+            'id': row['id'],
+            'tags': tags[row['id']],
+            'author': {
+                **{
+                    field: row[f'author__{field}']
+                    for field in AUTHOR_FIELDS
+                },
+                'is_subscribed': row['author__id'] in followed,
+            },
+            'name': row['name'],
+            'text': row['text'],
+            'image': image_url(row['image'], request),
+            'cooking_time': row['cooking_time'],
+            'ingredients': ingredients[row['id']],
+            'is_favorited': row['id'] in favorited,
+            'is_in_shopping_cart': row['id'] in in_cart,
+        }
+        for row in rows
+    ], include, omit)
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow, User
+
+
+def feed_queryset(user, queryset):
+    """Рецепты авторов, на которых подписан пользователь.
+
+    Обычно это полусоединение с подписками по индексу (author, pub_date).
+    У пользователей с тысячами подписок лента читается из входящих.
+    """
+
+    if user.feed_inbox:
+        return queryset.filter(feed_entries__user=user)
+    return queryset.filter(
+        author__in=Follow.objects.filter(user=user).values('author_id'),
+    )
+
+
+def fill_inbox(user_id, author_id=None):
+    """Добавляет во входящие последние рецепты авторов из подписок."""
+
+    if author_id is None:
+        authors = Follow.objects.filter(user_id=user_id).values('author_id')
+        recipes = Recipe.objects.filter(author__in=authors)
+    else:
+        recipes = Recipe.objects.filter(author_id=author_id)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in recipes.order_by('-pub_date').values_list(
+                'pk', flat=True,
+            )[:settings.FEED_INBOX_SIZE]
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def enable_inbox(user_id):
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).update(feed_inbox=True)
+        fill_inbox(user_id)
+
+
+def disable_inbox(user_id):
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).update(feed_inbox=False)
+        FeedEntry.objects.filter(user_id=user_id).delete()
+
+
+def trim_inbox(user_id):
+    """Удаляет из входящих записи сверх FEED_INBOX_SIZE."""
+
+    stale = FeedEntry.objects.filter(user_id=user_id).order_by(
+        '-recipe__pub_date',
+    ).values_list('pk', flat=True)[settings.FEED_INBOX_SIZE:]
+    FeedEntry.objects.filter(pk__in=list(stale)).delete()
+
+
+def trim_inboxes(user_ids):
+    """Обрезает входящие, в которых записей больше FEED_INBOX_SIZE."""
+
+    overflowing = FeedEntry.objects.filter(
+        user_id__in=user_ids,
+    ).values('user_id').annotate(
+        entries=Count('pk'),
+    ).filter(
+        entries__gt=settings.FEED_INBOX_SIZE,
+    ).values_list('user_id', flat=True)
+    for user_id in overflowing:
+        trim_inbox(user_id)
+
+
+def fan_out(recipe):
+    """Раскладывает новый рецепт во входящие подписчиков автора."""
+
+    fan_out_recipes([(recipe.pk, recipe.author_id)])
+
+
+def fan_out_recipes(recipes):
+    """То же для пар (id рецепта, id автора) одним запросом подписок."""
+
+    recipes_by_author = {}
+    for recipe_id, author_id in recipes:
+        recipes_by_author.setdefault(author_id, []).append(recipe_id)
+    followers = Follow.objects.filter(
+        author_id__in=recipes_by_author,
+        user__feed_inbox=True,
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=recipe_id)
+            for user_id, author_id in followers.values_list(
+                'user_id', 'author_id',
+            )
+            for recipe_id in recipes_by_author[author_id]
+        ),
+        ignore_conflicts=True,
+    )
+    trim_inboxes(followers.values('user_id'))
+
+
+def follow_added(follow):
+    """Поддерживает входящие при новой подписке."""
+
+    if User.objects.filter(pk=follow.user_id, feed_inbox=True).exists():
+        fill_inbox(follow.user_id, follow.author_id)
+        trim_inbox(follow.user_id)
+    elif settings.FEED_INBOX_MIN_FOLLOWS and (
+        Follow.objects.filter(user_id=follow.user_id).count()
+        >= settings.FEED_INBOX_MIN_FOLLOWS
+    ):
+        enable_inbox(follow.user_id)
+
+
+def follow_removed(follow):
+    FeedEntry.objects.filter(
+        user_id=follow.user_id,
+        recipe__author_id=follow.author_id,
+    ).delete()
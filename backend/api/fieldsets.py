@@ -0,0 +1,188 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import ListSerializer
+
+PARAMS = ('fields', 'omit')
+
+
+def parse_fieldset(value):
+    """Разбирает 'id,author.username' в дерево {'id': {}, 'author': {...}}."""
+
+    if not value:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree or None
+
+
+def get_request_fieldsets(request):
+    """Деревья полей из ?fields= и ?omit= запроса."""
+
+    if request is None:
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return parse_fieldset(params.get('fields')), parse_fieldset(
+        params.get('omit'),
+    )
+
+
+def descend(include, omit, name):
+    """Поддеревья include/omit для поля name или None, если оно скрыто."""
+
+    if include is not None:
+        if name not in include:
+            return None
+        include = include[name] or None
+    if omit is not None:
+        if omit.get(name) == {}:
+            return None
+        omit = omit.get(name) or None
+    return include, omit
+
+
+def is_selected(include, omit, path):
+    """Входит ли поле по пути path в ответ."""
+
+    for name in path:
+        fieldset = descend(include, omit, name)
+        if fieldset is None:
+            return False
+        include, omit = fieldset
+    return True
+
+
+def prune(data, include, omit):
+    """Оставляет в готовом представлении только выбранные поля."""
+
+    if include is None and omit is None:
+        return data
+    if isinstance(data, list):
+        return [prune(item, include, omit) for item in data]
+    if not isinstance(data, dict):
+        return data
+    result = {}
+    for name, value in data.items():
+        fieldset = descend(include, omit, name)
+        if fieldset is not None:
+            result[name] = prune(value, *fieldset)
+    return result
+
+
+def check_names(fieldset, names, path=''):
+    """Бросает ValidationError, если в ?fields= или ?omit= есть лишние поля.
+
+    Ошибка перечисляет поля, допустимые на этом уровне вложенности.
+    """
+
+    errors = {}
+    for param, tree in zip(PARAMS, fieldset):
+        unknown = [name for name in tree or () if name not in names]
+        if unknown:
+            message = (
+                'Неизвестные поля: '
+                f'{", ".join(path + name for name in unknown)}.'
+            )
+            if names:
+                message += (
+                    ' Доступны: '
+                    f'{", ".join(path + name for name in names)}.'
+                )
+            errors[param] = [message]
+    if errors:
+        raise ValidationError(errors)
+
+
+def check_fieldsets(serializer):
+    """Проверяет ?fields= и ?omit= до вычисления ответа.
+
+    Обходит поля корневого и выбранных вложенных сериализаторов: их
+    get_fields сверяет запрошенные имена с объявленными полями.
+    """
+
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+    for field in serializer.fields.values():
+        if isinstance(field, ListSerializer):
+            field = field.child
+        if isinstance(field, SparseFieldsetMixin):
+            check_fieldsets(field)
+
+
+class SparseFieldsetMixin:
+    """Выбор полей сериализатора параметрами ?fields= и ?omit=.
+
+    Вложенные поля задаются через точку: ?fields=id,author.username.
+    Корневой сериализатор берёт параметры из запроса и передаёт
+    вложенным сериализаторам их часть. Скрытые поля не вычисляются,
+    поэтому не выполняются и их запросы. Неизвестное имя поля дает
+    ответ 400 со списком допустимых.
+
+    SerializerMethodField, который отдаёт данные другого сериализатора,
+    указывается в method_serializers; метод создаёт этот сериализатор
+    через nested_serializer, чтобы получить его часть параметров.
+    """
+
+    fieldset = None
+    fieldset_path = ''
+    method_serializers = {}
+
+    def is_root(self):
+        return self.parent is None or (
+            isinstance(self.parent, ListSerializer)
+            and self.parent.parent is None
+        )
+
+    def get_fieldset(self):
+        if self.fieldset is None and self.is_root():
+            self.fieldset = get_request_fieldsets(self.context.get('request'))
+        return self.fieldset or (None, None)
+
+    def nested_serializer(self, name, *args, **kwargs):
+        """Сериализатор поля-метода name с выбранными для него полями."""
+
+        serializer = self.method_serializers[name](*args, **kwargs)
+        child = serializer
+        if isinstance(serializer, ListSerializer):
+            child = serializer.child
+        child.fieldset = self.method_fieldsets.get(name)
+        child.fieldset_path = f'{self.fieldset_path}{name}.'
+        return serializer
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.method_fieldsets = {}
+        include, omit = self.get_fieldset()
+        if include is None and omit is None:
+            return fields
+        check_names((include, omit), list(fields), self.fieldset_path)
+        for name in list(fields):
+            fieldset = descend(include, omit, name)
+            if fieldset is None:
+                del fields[name]
+                continue
+            field = fields[name]
+            if isinstance(field, ListSerializer):
+                field = field.child
+            path = f'{self.fieldset_path}{name}.'
+            if isinstance(field, SparseFieldsetMixin):
+                field.fieldset = fieldset
+                field.fieldset_path = path
+            elif name in self.method_serializers:
+                self.method_fieldsets[name] = fieldset
+                # Имена проверяются get_fields вложенного сериализатора
+                self.nested_serializer(name).fields
+            else:
+                # У простых полей нет вложенных
+                check_names(fieldset, (), path)
+        if self.is_root():
+            # Вложенные сериализаторы иначе проверили бы имена только на
+            # первом объекте, а пустая страница прошла бы без ошибки
+            for field in fields.values():
+                if isinstance(field, ListSerializer):
+                    field = field.child
+                if isinstance(field, SparseFieldsetMixin):
+                    check_fieldsets(field)
+        return fields
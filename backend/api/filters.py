@@ -1,7 +1,63 @@
+from django import forms
+from django.conf import settings
+from django.db.models import (
+    Case,
+    Count,
+    FloatField,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Ingredient, IngredientParameters, Recipe, Tag
 from users.models import User
+from .ingredient_index import ingredient_index
+
+
+def too_many(recipe_ids):
+    """Список id не стоит передавать в запрос параметрами.
+
+    SQLite ограничивает число параметров запроса, а на Postgres такой
+    список раздувает текст запроса; тогда рецепты отбирает подзапрос.
+    """
+
+    return len(recipe_ids) > settings.INGREDIENT_FILTER_MAX_IDS
+
+
+def recipes_with(ingredient_ids):
+    """Подзапрос id рецептов хотя бы с одним из ингредиентов."""
+
+    return IngredientParameters.objects.filter(
+        ingredient_id__in=ingredient_ids,
+    ).values('recipe_id')
+
+
+def count_ingredients(**lookups):
+    """Число ингредиентов рецепта из внешнего запроса."""
+
+    return Cast(
+        Subquery(
+            IngredientParameters.objects.filter(
+                recipe_id=OuterRef('pk'), **lookups,
+            ).order_by().values('recipe_id').annotate(
+                count=Count('pk'),
+            ).values('count'),
+        ),
+        FloatField(),
+    )
+
+
+class IntegerFilter(filters.NumberFilter):
+    """Целое число; дробное значение даёт ответ 400."""
+
+    field_class = forms.IntegerField
+
+
+class IntegerInFilter(filters.BaseInFilter, IntegerFilter):
+    """Список целых чисел через запятую."""
 
 
 class NameIngredientSearch(FilterSet):
@@ -27,10 +83,16 @@ class GetRecipeFilterSet(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='is_in_shopping_cart_filter',
     )
+    ingredients = IntegerInFilter(method='ingredients_filter')
+    exclude_ingredients = IntegerInFilter(method='exclude_ingredients_filter')
+    pantry = IntegerInFilter(method='pantry_filter')
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+            'ingredients', 'exclude_ingredients', 'pantry',
+        )
 
     def is_favorited_filter(self, queryset, name, value):
         if self.request.user.is_authenticated and value is True:
@@ -41,3 +103,54 @@ class GetRecipeFilterSet(FilterSet):
         if self.request.user.is_authenticated and value is True:
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
+
+    def ingredients_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        ingredient_ids = set(value)
+        recipe_ids = ingredient_index.containing_all(ingredient_ids)
+        if too_many(recipe_ids):
+            recipe_ids = recipes_with(ingredient_ids).annotate(
+                matched=Count('ingredient_id'),
+            ).filter(matched=len(ingredient_ids)).values('recipe_id')
+        return queryset.filter(pk__in=recipe_ids)
+
+    def exclude_ingredients_filter(self, queryset, name, value):
+        if not value:
+            return queryset
+        ingredient_ids = set(value)
+        recipe_ids = ingredient_index.containing_any(ingredient_ids)
+        if too_many(recipe_ids):
+            recipe_ids = recipes_with(ingredient_ids)
+        return queryset.exclude(pk__in=recipe_ids)
+
+    def pantry_filter(self, queryset, name, value):
+        """Рецепты из имеющихся продуктов, сначала самые полные."""
+
+        if not value:
+            return queryset
+        pantry = set(value)
+        coverages = ingredient_index.coverage(pantry)
+        if not coverages:
+            return queryset.none()
+        if too_many(coverages):
+            queryset = queryset.annotate(
+                pantry_coverage=(
+                    count_ingredients(ingredient_id__in=pantry)
+                    / count_ingredients()
+                ),
+            ).filter(pantry_coverage__gt=0)
+        else:
+            buckets = {}
+            for recipe_id, coverage in coverages.items():
+                buckets.setdefault(coverage, []).append(recipe_id)
+            queryset = queryset.filter(pk__in=list(coverages)).annotate(
+                pantry_coverage=Case(
+                    *(
+                        When(pk__in=ids, then=Value(coverage))
+                        for coverage, ids in buckets.items()
+                    ),
+                    output_field=FloatField(),
+                ),
+            )
+        return queryset.order_by('-pantry_coverage', '-pub_date')
@@ -0,0 +1,65 @@
+import logging
+from uuid import uuid4
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.base import ContentFile
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework.exceptions import ValidationError
+
+from recipes.models import Recipe
+from .versions import touch_recipes
+
+logger = logging.getLogger('foodgram.jobs')
+
+PENDING_IMAGES = 'recipes/pending/'
+
+
+def get_storage():
+    return Recipe._meta.get_field('image').storage
+
+
+def stash_image(data):
+    """Сохраняет base64 изображения как есть, без декодирования."""
+
+    return get_storage().save(
+        f'{PENDING_IMAGES}{uuid4().hex}.b64',
+        ContentFile(data.encode()),
+    )
+
+
+def discard_image(path):
+    storage = get_storage()
+    if storage.exists(path):
+        storage.delete(path)
+
+
+def process_recipe_image(recipe_id, path):
+    """Декодирует и проверяет отложенное изображение рецепта.
+
+    Битое изображение не повторяется: рецепт остаётся без фото, а
+    ошибка пишется в лог.
+    """
+
+    storage = get_storage()
+    if not storage.exists(path):
+        return
+    with storage.open(path) as stashed:
+        data = stashed.read().decode()
+    try:
+        image = Base64ImageField().to_internal_value(data)
+    except (ValidationError, DjangoValidationError) as error:
+        logger.warning('Изображение рецепта %s отклонено: %s', recipe_id,
+                       error)
+        image = None
+    recipes = Recipe.objects.filter(pk=recipe_id)
+    if image is not None and recipes.exists():
+        name = storage.save(
+            Recipe._meta.get_field('image').generate_filename(
+                None, image.name,
+            ),
+            image,
+        )
+        if not recipes.update(image=name):
+            storage.delete(name)
+        touch_recipes(recipes)
+    storage.delete(path)
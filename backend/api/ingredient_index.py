@@ -0,0 +1,158 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+
+from recipes.models import IngredientParameters, Recipe
+from .invalidation import local_invalidation
+from .versions import RECIPES
+
+# Запас на транзакции, которые зафиксировались позже, чем изменили
+# updated_at: такие рецепты перечитываются при следующей синхронизации
+SYNC_MARGIN = timedelta(seconds=60)
+
+
+def contains(ids, recipe_id):
+    position = bisect_left(ids, recipe_id)
+    return position < len(ids) and ids[position] == recipe_id
+
+
+class IngredientIndex:
+    """Инвертированный индекс: ингредиент -> отсортированные id рецептов.
+
+    Индекс живёт в памяти воркера. Когда проверка версий помечает его
+    устаревшим, он перечитывает только рецепты, изменённые после
+    последней синхронизации. Удалённые рецепты остаются в индексе до полной
+    перезагрузки, они всё равно отсекаются запросом pk__in.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recipes = {}
+        self.ingredients = {}
+        self.stale = True
+        self.watermark = None
+        self.loaded_at = None
+
+    def load(self):
+        recipes = defaultdict(lambda: array('q'))
+        ingredients = defaultdict(list)
+        watermark = Recipe.objects.aggregate(
+            updated_at=Max('updated_at'),
+        )['updated_at']
+        rows = IngredientParameters.objects.order_by(
+            'ingredient_id', 'recipe_id',
+        ).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows.iterator():
+            recipes[ingredient_id].append(recipe_id)
+            ingredients[recipe_id].append(ingredient_id)
+        self.recipes = dict(recipes)
+        self.ingredients = {
+            recipe_id: tuple(ids) for recipe_id, ids in ingredients.items()
+        }
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+
+    def set_recipe(self, recipe_id, ingredient_ids):
+        old = set(self.ingredients.pop(recipe_id, ()))
+        new = set(ingredient_ids)
+        for ingredient_id in old - new:
+            ids = self.recipes[ingredient_id]
+            del ids[bisect_left(ids, recipe_id)]
+        for ingredient_id in new - old:
+            insort(
+                self.recipes.setdefault(ingredient_id, array('q')),
+                recipe_id,
+            )
+        if new:
+            self.ingredients[recipe_id] = tuple(sorted(new))
+
+    def update(self):
+        since = self.watermark - SYNC_MARGIN
+        changed = dict(
+            Recipe.objects.filter(updated_at__gte=since).values_list(
+                'pk', 'updated_at',
+            )
+        )
+        ingredients = defaultdict(list)
+        for recipe_id, ingredient_id in IngredientParameters.objects.filter(
+            recipe_id__in=changed,
+        ).values_list('recipe_id', 'ingredient_id'):
+            ingredients[recipe_id].append(ingredient_id)
+        for recipe_id in changed:
+            self.set_recipe(recipe_id, ingredients[recipe_id])
+        self.watermark = max(changed.values(), default=self.watermark)
+
+    def invalidate(self, ids):
+        self.stale = True
+
+    def sync(self):
+        """Догоняет изменения рецептов, если их версия изменилась."""
+
+        if not self.stale:
+            return
+        # Сброшен до чтения: версия, изменённая во время чтения,
+        # снова пометит индекс устаревшим
+        self.stale = False
+        if self.watermark is None or (
+            time.monotonic() - self.loaded_at
+            > settings.INGREDIENT_INDEX_RELOAD_SECONDS
+        ):
+            self.load()
+        else:
+            self.update()
+
+    def containing_all(self, ingredient_ids):
+        """id рецептов, в которых есть все ингредиенты."""
+
+        with self.lock:
+            self.sync()
+            postings = sorted(
+                (self.recipes.get(ingredient_id, ()) for ingredient_id in
+                 set(ingredient_ids)),
+                key=len,
+            )
+            if not postings:
+                return []
+            smallest, *rest = postings
+            return [
+                recipe_id for recipe_id in smallest
+                if all(contains(ids, recipe_id) for ids in rest)
+            ]
+
+    def containing_any(self, ingredient_ids):
+        """id рецептов, в которых есть хотя бы один из ингредиентов."""
+
+        with self.lock:
+            self.sync()
+            return set().union(*(
+                self.recipes.get(ingredient_id, ())
+                for ingredient_id in set(ingredient_ids)
+            ))
+
+    def coverage(self, pantry):
+        """Доля ингредиентов каждого рецепта, которые есть в pantry."""
+
+        pantry = set(pantry)
+        with self.lock:
+            self.sync()
+            candidates = set().union(*(
+                self.recipes.get(ingredient_id, ())
+                for ingredient_id in pantry
+            ))
+            return {
+                recipe_id: (
+                    len(pantry.intersection(self.ingredients[recipe_id]))
+                    / len(self.ingredients[recipe_id])
+                )
+                for recipe_id in candidates
+            }
+
+
+ingredient_index = IngredientIndex()
+local_invalidation.subscribe(RECIPES, ingredient_index.invalidate)
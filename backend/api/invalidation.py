@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+from recipes.models import DataVersion
+
+
+def split_key(key):
+    """'account:5' -> ('account', 5); 'tags' -> ('tags', None)."""
+
+    namespace, _, entry = key.partition(':')
+    return namespace, int(entry) if entry.isdigit() else None
+
+
+class LocalInvalidation:
+    """Сброс кэшей воркера по счётчикам версий из таблицы DataVersion.
+
+    Кэши подписываются на пространство имён. Версия без id ('tags')
+    сбрасывает кэш целиком, версия записи ('account:5') - только
+    записи с этими id. Проверка - один запрос к версиям, изменённым
+    после прошлой проверки; перекрытие INVALIDATION_MARGIN ловит
+    транзакции, зафиксированные позже, чем изменили версию.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handlers = defaultdict(list)
+        self.seen = {}
+        self.watermark = None
+        self.checked_at = None
+
+    def subscribe(self, namespace, handler):
+        """handler(ids) получает множество id или None для всего кэша."""
+
+        self.handlers[namespace].append(handler)
+
+    def changed_versions(self):
+        since = (self.watermark or timezone.now()) - timedelta(
+            seconds=settings.INVALIDATION_MARGIN,
+        )
+        namespaces = Q()
+        for namespace in self.handlers:
+            namespaces |= Q(key=namespace) | Q(
+                key__startswith=f'{namespace}:',
+            )
+        return DataVersion.objects.filter(
+            namespaces, updated_at__gte=since,
+        ).values_list('key', 'value', 'updated_at')
+
+    def is_due(self):
+        """Пора ли проверять версии; без запроса к базе."""
+
+        return bool(self.handlers) and (
+            self.checked_at is None
+            or time.monotonic() - self.checked_at
+            >= settings.INVALIDATION_CHECK_SECONDS
+        )
+
+    def check(self):
+        """Сбрасывает устаревшие записи; возвращает число изменений."""
+
+        with self.lock:
+            if not self.is_due():
+                return 0
+            self.checked_at = time.monotonic()
+            changed = defaultdict(set)
+            rows = list(self.changed_versions())
+            for key, value, updated_at in rows:
+                if self.seen.get(key) == value:
+                    continue
+                self.seen[key] = value
+                namespace, entry = split_key(key)
+                if entry is None:
+                    changed[namespace] = None
+                elif changed[namespace] is not None:
+                    changed[namespace].add(entry)
+            self.watermark = max(
+                (updated_at for _, _, updated_at in rows),
+                default=self.watermark or timezone.now(),
+            )
+            # Версии вне окна перекрытия больше не вернутся запросом
+            window = {key for key, _, _ in rows}
+            self.seen = {
+                key: value for key, value in self.seen.items()
+                if key in window
+            }
+        for namespace, ids in changed.items():
+            for handler in self.handlers[namespace]:
+                handler(ids)
+        return len(changed)
+
+
+local_invalidation = LocalInvalidation()
+
+
+class VersionedCache:
+    """Кэш в памяти воркера, сбрасываемый по версии пространства имён."""
+
+    def __init__(self, namespace):
+        self.data = {}
+        local_invalidation.subscribe(namespace, self.invalidate)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def invalidate(self, ids):
+        if ids is None:
+            self.data.clear()
+        else:
+            for key in ids:
+                self.data.pop(key, None)
+
+
+class CachedListMixin:
+    """Список без параметров запроса из кэша воркера.
+
+    Подходит для небольших справочников, одинаковых для всех
+    пользователей; кэш сбрасывается по версии list_cache_namespace.
+    """
+
+    list_cache_namespace = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.list_cache_namespace is not None:
+            cls.list_cache = VersionedCache(cls.list_cache_namespace)
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        data = self.list_cache.get('list')
+        if data is None:
+            data = list(self.get_serializer(
+                self.filter_queryset(self.get_queryset()), many=True,
+            ).data)
+            self.list_cache.set('list', data)
+        return Response(data)
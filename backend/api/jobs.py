@@ -0,0 +1,268 @@
+import logging
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError,
+    IntegrityError,
+    close_old_connections,
+    connection,
+    transaction,
+)
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.constants import DONE, FAILED, PENDING, RUNNING
+from recipes.models import Job
+
+logger = logging.getLogger('foodgram.jobs')
+
+Task = namedtuple('Task', ('func', 'max_attempts', 'priority', 'every'))
+
+# Зарегистрированные задачи по имени; заполняется в api.tasks
+TASKS = {}
+
+CLAIM_ORDER = ('-priority', 'run_at', 'pk')
+
+
+def task(name=None, max_attempts=3, priority=0, every=None):
+    """Регистрирует функцию как задачу очереди.
+
+    Аргументы функции передаются через payload задачи, поэтому должны
+    сериализоваться в JSON. every - имя настройки с интервалом в
+    секундах, с которым задачу ставит enqueue_periodic.
+    """
+
+    def register(func):
+        TASKS[name or func.__name__] = Task(
+            func, max_attempts, priority, every,
+        )
+        return func
+
+    return register
+
+
+def enqueue(name, payload=None, priority=None, dedup_key=None, delay=0):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Если задача с тем же dedup_key ещё ждёт выполнения, новая не
+    создаётся и возвращается уже стоящая в очереди. Если её успели
+    взять в работу между INSERT и чтением, попытка повторяется, так что
+    функция всегда возвращает задачу.
+    """
+
+    registered = TASKS[name]
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'priority': registered.priority if priority is None else priority,
+        'max_attempts': registered.max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if dedup_key is None:
+        job = Job.objects.create(**fields)
+    else:
+        while True:
+            try:
+                with transaction.atomic():
+                    job = Job.objects.create(dedup_key=dedup_key, **fields)
+                break
+            except IntegrityError:
+                pending = Job.objects.filter(
+                    dedup_key=dedup_key, status=PENDING,
+                ).first()
+                if pending is not None:
+                    return pending
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: run_claimed(claim_job(job.pk)))
+    return job
+
+
+def enqueue_many(name, payloads, dedup_keys=None):
+    """Ставит пачку задач одним INSERT.
+
+    Задачи с dedup_key, которые уже ждут в очереди, пропускаются.
+    С JOBS_EAGER задачи ставятся по одной, чтобы выполнить их сразу.
+    """
+
+    payloads = list(payloads)
+    dedup_keys = list(dedup_keys or [None] * len(payloads))
+    if settings.JOBS_EAGER:
+        for payload, dedup_key in zip(payloads, dedup_keys):
+            enqueue(name, payload, dedup_key=dedup_key)
+        return
+    registered = TASKS[name]
+    now = timezone.now()
+    Job.objects.bulk_create(
+        (
+            Job(
+                name=name,
+                payload=payload,
+                priority=registered.priority,
+                max_attempts=registered.max_attempts,
+                run_at=now,
+                dedup_key=dedup_key,
+            )
+            for payload, dedup_key in zip(payloads, dedup_keys)
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_periodic():
+    """Ставит периодические задачи, которых ещё нет в очереди.
+
+    Задача ставится на интервал вперёд с ключом periodic:<имя>, поэтому
+    следующий запуск появляется, только когда воркер забрал прошлый.
+    """
+
+    for name, registered in TASKS.items():
+        if registered.every is None:
+            continue
+        interval = getattr(settings, registered.every)
+        if interval > 0:
+            enqueue(name, dedup_key=f'periodic:{name}', delay=interval)
+
+
+def claim_job(pk):
+    """Забирает одну задачу условным UPDATE; None, если её уже забрали."""
+
+    claimed = Job.objects.filter(pk=pk, status=PENDING).update(
+        status=RUNNING,
+        locked_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    return Job.objects.get(pk=pk) if claimed else None
+
+
+def claim_jobs(limit):
+    """Забирает до limit готовых задач в порядке приоритета.
+
+    На Postgres строки блокируются через FOR UPDATE SKIP LOCKED, и
+    воркеры не ждут друг друга. SQLite блокирует базу целиком, поэтому
+    там каждая задача забирается условным UPDATE: из двух воркеров
+    строку получит только один.
+    """
+
+    ready = Job.objects.filter(
+        status=PENDING, run_at__lte=timezone.now(),
+    ).order_by(*CLAIM_ORDER)
+    if not connection.features.has_select_for_update_skip_locked:
+        jobs = []
+        for pk in ready.values_list('pk', flat=True)[:limit * 2]:
+            job = claim_job(pk)
+            if job is not None:
+                jobs.append(job)
+            if len(jobs) == limit:
+                break
+        return jobs
+    with transaction.atomic():
+        pks = list(
+            ready.select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:limit]
+        )
+        Job.objects.filter(pk__in=pks).update(
+            status=RUNNING,
+            locked_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=pks).order_by(*CLAIM_ORDER))
+
+
+def retry_delay(attempts):
+    return settings.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def reschedule(job, error):
+    """Возвращает упавшую задачу в очередь с задержкой или бросает её."""
+
+    now = timezone.now()
+    failed = {'status': FAILED, 'finished_at': now, 'locked_at': None}
+    if job.attempts < job.max_attempts:
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(
+                    status=PENDING,
+                    locked_at=None,
+                    run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+                    last_error=error,
+                )
+            return
+        except IntegrityError:
+            # Пока задача выполнялась, в очередь встала такая же
+            error += '\nЗаменена задачей с тем же ключом.'
+    Job.objects.filter(pk=job.pk).update(last_error=error, **failed)
+
+
+def run_claimed(job):
+    """Выполняет забранную задачу; возвращает True при успехе."""
+
+    if job is None:
+        return False
+    registered = TASKS.get(job.name)
+    try:
+        if registered is None:
+            raise LookupError(f'Неизвестная задача {job.name}.')
+        registered.func(**job.payload)
+    except Exception:
+        logger.exception('Задача %s упала', job)
+        reschedule(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=DONE,
+        finished_at=timezone.now(),
+        locked_at=None,
+        last_error='',
+    )
+    return True
+
+
+def release_stale_jobs():
+    """Возвращает в очередь задачи воркеров, которые не завершили их."""
+
+    stale = Job.objects.filter(
+        status=RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOB_TIMEOUT,
+        ),
+    )
+    released = 0
+    for job in stale:
+        reschedule(job, 'Воркер не завершил задачу за JOB_TIMEOUT.')
+        released += 1
+    return released
+
+
+def delete_finished_jobs():
+    """Удаляет выполненные задачи старше JOB_KEEP_DAYS."""
+
+    deleted, _ = Job.objects.filter(
+        status=DONE,
+        finished_at__lt=timezone.now() - timedelta(
+            days=settings.JOB_KEEP_DAYS,
+        ),
+    ).delete()
+    return deleted
+
+
+def work(stop, poll_interval, batch_size, once=False):
+    """Цикл воркера: забирает задачи пачками, пока не выставлен stop.
+
+    С once завершается, когда готовых задач не осталось.
+    """
+
+    while not stop.is_set():
+        try:
+            jobs = claim_jobs(batch_size)
+        except DatabaseError:
+            logger.exception('Не удалось забрать задачи')
+            jobs = []
+        for job in jobs:
+            run_claimed(job)
+        close_old_connections()
+        if not jobs:
+            if once:
+                return
+            stop.wait(poll_interval)
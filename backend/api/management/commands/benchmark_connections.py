@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+MODES = (
+    ('новое соединение на запрос', {'CONN_MAX_AGE': 0, 'POOL': None}),
+    ('постоянные соединения', {'CONN_MAX_AGE': 600, 'POOL': None}),
+    ('пул соединений', {'CONN_MAX_AGE': 0, 'POOL': 'ENABLED'}),
+)
+
+
+class Command(BaseCommand):
+    """Замер накладных расходов на соединение с базой в расчёте на запрос.
+
+    Цикл запроса воспроизводится сигналами request_started и
+    request_finished, как это делает обработчик WSGI, и одним простым
+    запросом к базе между ними.
+    """
+
+    help = 'Сравнивает режимы работы с соединениями к базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def run(self, connection, requests):
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            request_finished.send(sender=self.__class__)
+            durations.append((time.perf_counter() - start) * 1000)
+        durations.sort()
+        return (
+            sum(durations) / len(durations),
+            durations[len(durations) // 2],
+            durations[int(len(durations) * 0.95)],
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        settings_dict = connection.settings_dict
+        original = {
+            'CONN_MAX_AGE': settings_dict['CONN_MAX_AGE'],
+            'POOL': settings_dict.get('POOL'),
+        }
+        pool_settings = dict(original['POOL'] or {}, ENABLED=True)
+        pool_settings.setdefault('MAX_SIZE', 1)
+        pool_settings.setdefault('MAX_LIFETIME', 3600)
+        pool_settings.setdefault('TIMEOUT', 10)
+
+        self.stdout.write(
+            f'{connection.vendor}, {options["requests"]} запросов, '
+            'время на запрос в мс (среднее / p50 / p95):'
+        )
+        try:
+            for title, mode in MODES:
+                if mode['POOL'] and not hasattr(connection, 'pool_enabled'):
+                    self.stdout.write(
+                        f'  {title}: не поддерживается движком '
+                        f'{settings_dict["ENGINE"]}'
+                    )
+                    continue
+                connection.close()
+                settings_dict['CONN_MAX_AGE'] = mode['CONN_MAX_AGE']
+                settings_dict['POOL'] = pool_settings if mode['POOL'] else None
+                mean, median, p95 = self.run(connection, options['requests'])
+                self.stdout.write(
+                    f'  {title}: {mean:.3f} / {median:.3f} / {p95:.3f}'
+                )
+        finally:
+            connection.close()
+            settings_dict.update(original)
@@ -0,0 +1,141 @@
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=50',
+    '/api/tags/',
+    '/api/ingredients/?name=%D0%B0',
+)
+
+
+class Command(BaseCommand):
+    """Сравнение пропускной способности моделей воркеров gunicorn.
+
+    Для каждой модели запускается gunicorn с gunicorn.conf.py, после чего
+    по адресам из --path параллельно отправляются запросы. Воркеры uvicorn
+    обслуживают приложение ASGI. Данные для замера готовит команда
+    seed_recipes.
+    """
+
+    help = 'Замер пропускной способности gunicorn для разных воркеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--worker-class',
+            action='append',
+            dest='worker_classes',
+            help='sync, gthread, gevent, uvicorn; по умолчанию все.',
+        )
+        parser.add_argument('--path', action='append', dest='paths')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8090)
+        parser.add_argument('--token', help='Токен для авторизации.')
+
+    def start_server(self, worker_class, options):
+        env = dict(
+            os.environ,
+            GUNICORN_BIND=f'127.0.0.1:{options["port"]}',
+            GUNICORN_WORKER_CLASS=worker_class,
+            GUNICORN_WORKERS=str(options['workers']),
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                'foodgram.asgi' if worker_class == 'uvicorn'
+                else 'foodgram.wsgi',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(
+                    f'gunicorn с воркером {worker_class} не запустился.'
+                )
+            try:
+                self.fetch(self.url(options, DEFAULT_PATHS[2]), None)
+                return server
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError('gunicorn не ответил за 30 секунд.')
+
+    def url(self, options, path):
+        return f'http://127.0.0.1:{options["port"]}{path}'
+
+    def fetch(self, url, token):
+        request = urllib.request.Request(url)
+        if token:
+            request.add_header('Authorization', f'Token {token}')
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+        return status, (time.perf_counter() - start) * 1000
+
+    def load(self, options):
+        paths = options['paths'] or DEFAULT_PATHS
+        urls = [
+            self.url(options, paths[number % len(paths)])
+            for number in range(options['requests'])
+        ]
+
+        def fetch(url):
+            try:
+                return self.fetch(url, options['token'])
+            except (urllib.error.URLError, ConnectionError):
+                return None, 0
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(
+            latency for status, latency in results if status == 200
+        )
+        errors = len(results) - len(latencies)
+        return elapsed, latencies, errors
+
+    def handle(self, *args, **options):
+        worker_classes = options['worker_classes'] or (
+            'sync', 'gthread', 'gevent', 'uvicorn',
+        )
+        self.stdout.write(
+            f'{options["requests"]} запросов, {options["concurrency"]} '
+            f'параллельно, воркеров: {options["workers"]}'
+        )
+        for worker_class in worker_classes:
+            try:
+                server = self.start_server(worker_class, options)
+            except CommandError as error:
+                self.stdout.write(self.style.WARNING(f'  {error}'))
+                continue
+            try:
+                elapsed, latencies, errors = self.load(options)
+            finally:
+                server.terminate()
+                server.wait()
+            if not latencies:
+                self.stdout.write(f'  {worker_class}: нет успешных ответов')
+                continue
+            self.stdout.write(
+                f'  {worker_class}: {len(latencies) / elapsed:.1f} RPS, '
+                f'p50 {latencies[len(latencies) // 2]:.1f} мс, '
+                f'p95 {latencies[int(len(latencies) * 0.95)]:.1f} мс, '
+                f'ошибок {errors}'
+            )
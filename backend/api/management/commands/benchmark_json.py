@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import RecipeReadSerializer
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Замер времени кодирования страниц RecipeReadSerializer в JSON."""
+
+    help = 'Сравнивает JSONRenderer и FastJSONRenderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--pages', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def measure(self, renderer, pages, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                renderer.render(page)
+        return (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+        recipes = list(
+            Recipe.objects
+            .select_related('author')
+            .prefetch_related('tags', 'ingredient_parameters__ingredient')
+            [:page_size * options['pages']]
+        )
+        if not recipes:
+            raise CommandError('Нет рецептов: запустите seed_recipes.')
+        pages = [
+            {
+                'count': len(recipes),
+                'next': None,
+                'previous': None,
+                'results': RecipeReadSerializer(
+                    recipes[start:start + page_size],
+                    many=True,
+                ).data,
+            }
+            for start in range(0, len(recipes), page_size)
+        ]
+
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        if any(standard.render(page) != fast.render(page) for page in pages):
+            raise CommandError('Результаты рендереров различаются.')
+
+        self.stdout.write(
+            f'{len(pages)} страниц по {page_size} рецептов, '
+            f'orjson: {"да" if orjson is not None else "нет"}'
+        )
+        standard_ms = self.measure(standard, pages, options['repeat'])
+        fast_ms = self.measure(fast, pages, options['repeat'])
+        self.stdout.write(f'  JSONRenderer: {standard_ms:.3f} мс на страницу')
+        self.stdout.write(
+            f'  FastJSONRenderer: {fast_ms:.3f} мс на страницу '
+            f'(в {standard_ms / fast_ms:.1f} раза быстрее)'
+        )
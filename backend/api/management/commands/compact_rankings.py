@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.popularity import compact_rankings
+from recipes.models import RecipeRank
+
+
+class Command(BaseCommand):
+    """Уплотнение рейтинга популярных рецептов.
+
+    Запускается периодически (например, раз в час из cron): события
+    старше окна выбывают из оценок за 24 часа и 7 дней только здесь.
+    """
+
+    help = 'Пересчитывает рейтинг популярных рецептов по окнам.'
+
+    def handle(self, *args, **options):
+        deleted = compact_rankings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Строк рейтинга: {RecipeRank.objects.count()}, '
+            f'удалено устаревшей активности: {deleted}.'
+        ))
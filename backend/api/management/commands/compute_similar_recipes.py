@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    """Пакетный пересчёт похожих рецептов.
+
+    После пересчёта списки поддерживаются при создании и изменении
+    рецептов через API; команду стоит запускать после импорта данных
+    и периодически, чтобы выровнять накопленные расхождения.
+    """
+
+    help = 'Пересчитывает похожие рецепты по ингредиентам и тегам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=settings.SIMILAR_RECIPES_COUNT,
+            help='Сколько похожих рецептов хранить для каждого.',
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_similar(options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено пар похожих рецептов: {created}.'
+        ))
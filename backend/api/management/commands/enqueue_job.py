@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.jobs import TASKS, enqueue
+
+
+class Command(BaseCommand):
+    """Постановка задачи в очередь, например из cron."""
+
+    help = 'Ставит задачу в очередь фоновых воркеров.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Имя зарегистрированной задачи.')
+        parser.add_argument(
+            '--payload',
+            default='{}',
+            help='Аргументы задачи в JSON.',
+        )
+        parser.add_argument('--priority', type=int)
+        parser.add_argument(
+            '--dedup-key',
+            help='Не ставить задачу, если такая уже ждёт в очереди.',
+        )
+
+    def handle(self, *args, **options):
+        if options['name'] not in TASKS:
+            raise CommandError(
+                f'Неизвестная задача. Доступны: {", ".join(sorted(TASKS))}.'
+            )
+        try:
+            payload = json.loads(options['payload'])
+        except ValueError as error:
+            raise CommandError(f'Некорректный --payload: {error}')
+        job = enqueue(
+            options['name'],
+            payload,
+            priority=options['priority'],
+            dedup_key=options['dedup_key'],
+        )
+        self.stdout.write(f'В очереди: {job}.')
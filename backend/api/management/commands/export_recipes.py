@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api.ndjson import export_recipes
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Выгрузка рецептов в NDJSON без загрузки всей таблицы в память."""
+
+    help = 'Выгружает рецепты в NDJSON: по рецепту в строке.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки; по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--author',
+            help='email автора, чьи рецепты выгрузить.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.filter(author__deleted_at__isnull=True)
+        if options['author']:
+            queryset = queryset.filter(author__email=options['author'])
+        output = (
+            open(options['output'], 'w', encoding='utf-8')
+            if options['output'] else sys.stdout
+        )
+        count = 0
+        try:
+            for line in export_recipes(queryset, options['chunk_size']):
+                output.write(line)
+                count += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'Выгружено рецептов: {count}.')
@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ndjson import import_recipes
+
+
+class Command(BaseCommand):
+    """Загрузка рецептов из NDJSON, выгруженного export_recipes.
+
+    Авторы, теги и ингредиенты должны уже быть в базе, а файлы
+    изображений - в MEDIA_ROOT под теми же именами.
+    """
+
+    help = 'Загружает рецепты из NDJSON пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON или - для stdin.')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--update',
+            action='store_true',
+            help='Перезаписывать рецепты с тем же автором и названием.',
+        )
+
+    def handle(self, *args, **options):
+        lines = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8')
+        )
+        try:
+            totals, errors = import_recipes(
+                lines, options['batch_size'], options['update'],
+            )
+        finally:
+            if lines is not sys.stdin:
+                lines.close()
+        for number, error in errors:
+            self.stderr.write(f'Строка {number}: {error}')
+        self.stdout.write(
+            f'Создано: {totals.get("created", 0)}, '
+            f'обновлено: {totals.get("updated", 0)}, '
+            f'уже были: {totals.get("exists", 0)}, '
+            f'ошибок: {len(errors)}.'
+        )
+        if errors and not totals:
+            raise CommandError('Ни одна строка не загружена.')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from api.deletion import purge_user
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Фоновое удаление скрытых аккаунтов.
+
+    Удаление через API и админку только скрывает аккаунт; рецепты,
+    избранное, подписки и файлы изображений удаляются здесь пачками.
+    """
+
+    help = 'Удаляет данные аккаунтов, скрытых при удалении.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Строк в одном DELETE; по умолчанию PURGE_CHUNK_SIZE.',
+        )
+
+    def handle(self, *args, **options):
+        for user_id in User.objects.filter(
+            deleted_at__isnull=False,
+        ).values_list('pk', flat=True):
+            deleted = purge_user(user_id, options['chunk_size'])
+            self.stdout.write(f'Пользователь {user_id}: ' + ', '.join(
+                f'{label} {count}' for label, count in deleted.items()
+                if count
+            ))
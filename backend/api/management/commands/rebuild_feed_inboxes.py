@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from api.feed import disable_inbox, enable_inbox, trim_inbox
+from users.models import User
+
+
+class Command(BaseCommand):
+    """Пересборка входящих ленты.
+
+    Входящие включаются пользователям, у которых не меньше
+    FEED_INBOX_MIN_FOLLOWS подписок, и отключаются остальным.
+    Включённые входящие обрезаются до FEED_INBOX_SIZE записей.
+    """
+
+    help = 'Включает, заполняет и обрезает входящие ленты подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-follows',
+            type=int,
+            default=settings.FEED_INBOX_MIN_FOLLOWS,
+            help='Порог подписок; 0 отключает входящие всем.',
+        )
+
+    def handle(self, *args, **options):
+        threshold = options['min_follows']
+        users = User.objects.annotate(follows=Count('follower'))
+        enabled = disabled = 0
+        for user_id, follows, feed_inbox in users.values_list(
+            'pk', 'follows', 'feed_inbox',
+        ).iterator():
+            if threshold and follows >= threshold:
+                if not feed_inbox:
+                    enable_inbox(user_id)
+                    enabled += 1
+                trim_inbox(user_id)
+            elif feed_inbox:
+                disable_inbox(user_id)
+                disabled += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Входящие включены: {enabled}, отключены: {disabled}.'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Сверка денормализованных счётчиков с таблицами.
+
+    Счётчики обновляются вместе с записями, но bulk-операции и
+    ручные правки в базе их не трогают. Команда пересчитывает
+    все счётчики одним UPDATE на поле и меняет только разошедшиеся.
+    """
+
+    help = 'Исправляет счётчики рецептов, подписчиков, избранного и корзин.'
+
+    def handle(self, *args, **options):
+        for counter, fixed in reconcile_counters().items():
+            self.stdout.write(f'{counter}: исправлено {fixed}')
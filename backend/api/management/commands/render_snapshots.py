@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.snapshots import SNAPSHOT_PATHS, render_snapshots
+
+
+class Command(BaseCommand):
+    """Снимки анонимных ответов API для раздачи через nginx.
+
+    После изменения данных снимки перерисовывает фоновая задача;
+    команда нужна при деплое и после смены SNAPSHOT_BASE_URL.
+    """
+
+    help = 'Пишет снимки тегов, ингредиентов и первых страниц рецептов.'
+
+    def handle(self, *args, **options):
+        if not settings.SNAPSHOT_ROOT:
+            raise CommandError('Не задан SNAPSHOT_ROOT.')
+        for key in SNAPSHOT_PATHS:
+            self.stdout.write(f'{key}: файлов {render_snapshots(key)}')
@@ -0,0 +1,136 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.jobs import (
+    delete_finished_jobs,
+    enqueue_periodic,
+    release_stale_jobs,
+    work,
+)
+
+
+def work_in_process(*args):
+    # Ctrl+C получает вся группа процессов; останавливает их родитель
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(*args)
+
+
+class Command(BaseCommand):
+    """Фоновые воркеры очереди задач из таблицы Job.
+
+    Воркеры работают в потоках или, с --processes, в отдельных
+    процессах. Родитель заменяет упавших воркеров новыми, возвращает в
+    очередь задачи зависших, ставит периодические задачи и удаляет
+    старые выполненные.
+    """
+
+    help = 'Запускает воркеры очереди фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Число воркеров.',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Запускать воркеры процессами, а не потоками.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Задач, которые воркер забирает за раз.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def respawn_dead(self, workers, start_worker):
+        """Заменяет остановившихся воркеров, чтобы пул не таял."""
+
+        for number, worker in enumerate(workers):
+            if worker.is_alive():
+                continue
+            exitcode = getattr(worker, 'exitcode', None)
+            code = '' if exitcode is None else f' с кодом {exitcode}'
+            self.stderr.write(
+                f'Воркер {worker.name} остановился{code}, запущен новый.'
+            )
+            workers[number] = start_worker()
+
+    def handle(self, *args, **options):
+        if options['processes']:
+            worker_class = multiprocessing.Process
+            stop = multiprocessing.Event()
+            target = work_in_process
+            # Дочерние процессы не должны делить соединения родителя
+            connections.close_all()
+        else:
+            worker_class = threading.Thread
+            stop = threading.Event()
+            target = work
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+
+        def start_worker():
+            worker = worker_class(
+                target=target,
+                args=(
+                    stop,
+                    options['poll_interval'],
+                    options['batch_size'],
+                    options['once'],
+                ),
+                daemon=True,
+            )
+            worker.start()
+            return worker
+
+        release_stale_jobs()
+        enqueue_periodic()
+        workers = [start_worker() for _ in range(options['workers'])]
+        self.stdout.write(
+            f'Запущено воркеров: {len(workers)} '
+            f'({"процессы" if options["processes"] else "потоки"}).'
+        )
+        maintenance_at = time.monotonic() + settings.JOB_RETRY_DELAY
+        try:
+            # Без --once цикл идёт до сигнала, даже если упали все воркеры
+            while not options['once'] or any(
+                worker.is_alive() for worker in workers
+            ):
+                if stop.wait(options['poll_interval']):
+                    break
+                if not options['once']:
+                    self.respawn_dead(workers, start_worker)
+                if time.monotonic() < maintenance_at:
+                    continue
+                maintenance_at += settings.JOB_RETRY_DELAY
+                released = release_stale_jobs()
+                enqueue_periodic()
+                deleted = delete_finished_jobs()
+                if released or deleted:
+                    self.stdout.write(
+                        f'Возвращено задач: {released}, удалено: {deleted}.'
+                    )
+        except KeyboardInterrupt:
+            stop.set()
+        for worker in workers:
+            worker.join()
+        self.stdout.write('Воркеры остановлены.')
@@ -0,0 +1,144 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.counters import reconcile_counters
+from api.versions import RECIPES, bump_versions
+from recipes.constants import COLOR
+from recipes.models import (
+    Favorited,
+    Ingredient,
+    IngredientParameters,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow, User
+
+SEED_PASSWORD = 'seed-password'
+
+
+class Command(BaseCommand):
+    """Наполнение базы тестовыми данными для нагрузочных замеров."""
+
+    help = 'Создаёт пользователей, рецепты, избранное, корзины и подписки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def create_tags(self):
+        for number, (color, title) in enumerate(COLOR, 1):
+            Tag.objects.get_or_create(
+                color=color,
+                defaults={'name': title, 'slug': f'tag{number}'},
+            )
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        start = User.objects.count()
+        password = make_password(SEED_PASSWORD)
+        return User.objects.bulk_create(
+            User(
+                username=f'seed{number}',
+                email=f'seed{number}@foodgram.local',
+                first_name='Seed',
+                last_name=f'User{number}',
+                password=password,
+            )
+            for number in range(start, start + count)
+        )
+
+    def create_recipes(self, users, count):
+        start = Recipe.objects.count()
+        return Recipe.objects.bulk_create(
+            Recipe(
+                author=self.random.choice(users),
+                name=f'Рецепт {number}',
+                text=f'Описание рецепта {number}. ' * 10,
+                image='recipes/images/seed.png',
+                cooking_time=self.random.randint(1, 180),
+            )
+            for number in range(start, start + count)
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if len(ingredient_ids) < options['ingredients_per_recipe']:
+            raise CommandError(
+                'Сначала импортируйте ингредиенты: import_ingredients'
+            )
+        tag_ids = self.create_tags()
+        users = self.create_users(options['users'])
+        if not users[0].pk:
+            users = list(User.objects.filter(
+                username__in=[user.username for user in users]
+            ))
+        recipes = self.create_recipes(users, options['recipes'])
+        if not recipes[0].pk:
+            recipes = list(Recipe.objects.filter(
+                name__in=[recipe.name for recipe in recipes]
+            ))
+
+        IngredientParameters.objects.bulk_create(
+            IngredientParameters(
+                recipe=recipe,
+                ingredient_id=ingredient_id,
+                amount=self.random.randint(1, 500),
+            )
+            for recipe in recipes
+            for ingredient_id in self.random.sample(
+                ingredient_ids,
+                options['ingredients_per_recipe'],
+            )
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag_id=tag_id)
+            for recipe in recipes
+            for tag_id in self.random.sample(
+                tag_ids,
+                self.random.randint(1, len(tag_ids)),
+            )
+        )
+        for model, per_user in (
+            (Favorited, options['favorites_per_user']),
+            (ShoppingCart, options['favorites_per_user'] // 4),
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user=user, recipe=recipe)
+                    for user in users
+                    for recipe in self.random.sample(
+                        recipes,
+                        min(per_user, len(recipes)),
+                    )
+                ),
+                ignore_conflicts=True,
+            )
+        Follow.objects.bulk_create(
+            (
+                Follow(user=user, author=author)
+                for user in users
+                for author in self.random.sample(
+                    users,
+                    min(options['follows_per_user'], len(users)),
+                )
+                if author != user
+            ),
+            ignore_conflicts=True,
+        )
+        # bulk_create не отправляет сигналы, версии обновляются явно
+        bump_versions(RECIPES)
+        reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(users)}, рецептов: {len(recipes)}. '
+            f'Пароль пользователей: {SEED_PASSWORD}'
+        ))
@@ -0,0 +1,94 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.slow_queries import WATCHED_TABLES, iter_plan_nodes
+
+
+class Command(BaseCommand):
+    """Сводка по журналу медленных запросов с подсказками по индексам."""
+
+    help = 'Агрегирует медленные запросы по отпечатку.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=settings.SLOW_QUERY_LOG_FILE,
+            help='Путь к журналу медленных запросов.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Количество выводимых отпечатков.',
+        )
+
+    def read_records(self, path):
+        try:
+            with open(path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            raise CommandError(f'Файл не найден:{path}')
+
+    def aggregate(self, records):
+        stats = defaultdict(lambda: {
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'views': Counter(),
+            'serializers': Counter(),
+            'seq_scans': {},
+        })
+        for record in records:
+            entry = stats[record['fingerprint']]
+            entry['count'] += 1
+            entry['total_ms'] += record['duration_ms']
+            entry['max_ms'] = max(entry['max_ms'], record['duration_ms'])
+            if record.get('view'):
+                entry['views'][record['view']] += 1
+            if record.get('serializer'):
+                entry['serializers'][record['serializer']] += 1
+            for plan in record.get('explain') or ():
+                for node in iter_plan_nodes(plan['Plan']):
+                    table = node.get('Relation Name')
+                    if (
+                        node.get('Node Type') == 'Seq Scan'
+                        and table in WATCHED_TABLES
+                    ):
+                        entry['seq_scans'][table] = node.get('Filter')
+        return stats
+
+    def handle(self, *args, **options):
+        stats = self.aggregate(self.read_records(options['log']))
+        ordered = sorted(
+            stats.items(),
+            key=lambda item: item[1]['total_ms'],
+            reverse=True,
+        )
+        for query, entry in ordered[:options['top']]:
+            self.stdout.write(
+                f'{entry["count"]} раз, всего {entry["total_ms"]:.1f} мс, '
+                f'среднее {entry["total_ms"] / entry["count"]:.1f} мс, '
+                f'максимум {entry["max_ms"]:.1f} мс'
+            )
+            self.stdout.write(f'  {query}')
+            for view, count in entry['views'].most_common(3):
+                self.stdout.write(f'  вьюха: {view} ({count})')
+            for serializer, count in entry['serializers'].most_common(3):
+                self.stdout.write(f'  сериализатор: {serializer} ({count})')
+            for table, condition in entry['seq_scans'].items():
+                self.stdout.write(self.style.WARNING(
+                    f'  Seq Scan по {table}'
+                    + (f', фильтр {condition}' if condition else '')
+                    + ' — рассмотрите индекс по столбцам фильтра.'
+                ))
+            self.stdout.write('')
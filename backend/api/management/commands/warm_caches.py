@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.warmup import warm_caches
+
+
+class Command(BaseCommand):
+    """Прогрев кэшей после деплоя.
+
+    В каждом воркере gunicorn то же самое делает хук post_worker_init
+    при GUNICORN_WARM_CACHES=True; команда прогревает базу данных и
+    показывает, сколько занимает прогрев.
+    """
+
+    help = 'Прогревает справочники, индекс ингредиентов и страницы рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=2,
+            help='Страниц рецептов на каждый набор тегов.',
+        )
+        parser.add_argument(
+            '--combinations',
+            type=int,
+            default=5,
+            help='Сколько популярных наборов тегов прогревать.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        for name, seconds, result in warm_caches(
+            options['pages'], options['combinations'],
+        ):
+            self.stdout.write(f'{name}: {seconds * 1000:.0f} мс ({result})')
+        self.stdout.write(
+            f'Итого: {(time.perf_counter() - started) * 1000:.0f} мс.'
+        )
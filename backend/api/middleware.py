@@ -0,0 +1,139 @@
+import abc
+import asyncio
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db.router import use_primary
+from .async_views import run_in_pool
+from .invalidation import local_invalidation
+from .slow_queries import install_slow_query_logger, log_slow_queries
+
+
+class HybridMiddleware(abc.ABC):
+    """Основа middleware, работающего и под WSGI, и под ASGI.
+
+    Синхронное middleware под ASGI Django вызывает в единственном
+    потоке thread_sensitive, и запросы воркера выполняются по очереди.
+    Наследники определяют call для WSGI и acall для ASGI; блокирующие
+    вызовы в acall уходят в пул потоков ORM.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Так Django отличает асинхронное middleware, как в
+            # MiddlewareMixin
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.acall(request)
+        return self.call(request)
+
+    @abc.abstractmethod
+    def call(self, request):
+        """Обработка запроса под WSGI."""
+
+    @abc.abstractmethod
+    async def acall(self, request):
+        """Обработка запроса под ASGI."""
+
+
+class CacheInvalidationMiddleware(HybridMiddleware):
+    """Сбрасывает устаревшие кэши воркера один раз перед запросом."""
+
+    def call(self, request):
+        local_invalidation.check()
+        return self.get_response(request)
+
+    async def acall(self, request):
+        if local_invalidation.is_due():
+            await run_in_pool(local_invalidation.check)
+        return await self.get_response(request)
+
+
+class SlowQueryLogMiddleware(HybridMiddleware):
+    """Подключает логирование медленных запросов ко всем базам данных."""
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_THRESHOLD_MS is None:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        install_slow_query_logger()
+
+    def call(self, request):
+        with log_slow_queries(request):
+            return self.get_response(request)
+
+    async def acall(self, request):
+        with log_slow_queries(request):
+            return await self.get_response(request)
+
+
+class ReplicaPinMiddleware(HybridMiddleware):
+    """Направляет чтение на реплики с учётом недавних изменений клиента.
+
+    Небезопасные запросы целиком работают с основной базой. После
+    успешной записи клиент закрепляется за основной базой на
+    REPLICA_PIN_SECONDS секунд подписанной cookie, чтобы сразу видеть
+    свои изменения. Cookie видят все воркеры, в отличие от кэша в
+    памяти процесса.
+    """
+
+    cookie_name = 'use_primary_db'
+    cookie_salt = 'api.middleware.ReplicaPinMiddleware'
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def is_pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        return request.get_signed_cookie(
+            self.cookie_name,
+            default=None,
+            salt=self.cookie_salt,
+            max_age=settings.REPLICA_PIN_SECONDS,
+        ) is not None
+
+    def pin(self, response):
+        response.set_signed_cookie(
+            self.cookie_name,
+            '1',
+            salt=self.cookie_salt,
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+
+    @contextmanager
+    def routing(self, request):
+        token = use_primary.set(self.is_pinned(request))
+        try:
+            yield
+        finally:
+            use_primary.reset(token)
+
+    def pin_after_write(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(response)
+        return response
+
+    def call(self, request):
+        with self.routing(request):
+            response = self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    async def acall(self, request):
+        with self.routing(request):
+            response = await self.get_response(request)
+        return self.pin_after_write(request, response)
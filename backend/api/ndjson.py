@@ -0,0 +1,184 @@
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.utils.dateparse import parse_datetime
+
+from recipes.constants import MAX_LENGTH_TITLE, MAX_SMALL_INTEGER
+from recipes.models import Ingredient, IngredientParameters, Recipe, Tag
+from users.models import User
+from .bulk_recipes import CREATED, UPDATED, enqueue_similar, insert_recipes
+
+CONTENT_TYPE = 'application/x-ndjson'
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_recipes(queryset, chunk_size=500):
+    """Строки NDJSON по рецепту, ключи - естественные, а не id.
+
+    Рецепты читаются серверным курсором через iterator(), связи -
+    двумя запросами на каждую пачку из chunk_size рецептов.
+    """
+
+    rows = queryset.prefetch_related(None).order_by('pk').values_list(
+        'pk', 'name', 'text', 'cooking_time', 'image', 'pub_date',
+        'author__email', 'author__username',
+    ).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        pks = [row[0] for row in chunk]
+        tags = defaultdict(list)
+        for recipe_id, slug in Recipe.tags.through.objects.filter(
+            recipe_id__in=pks,
+        ).order_by('tag_id').values_list('recipe_id', 'tag__slug'):
+            tags[recipe_id].append(slug)
+        ingredients = defaultdict(list)
+        for recipe_id, name, unit, amount in (
+            IngredientParameters.objects.filter(recipe_id__in=pks)
+            .order_by('id')
+            .values_list(
+                'recipe_id',
+                'ingredient__name',
+                'ingredient__measurement_unit',
+                'amount',
+            )
+        ):
+            ingredients[recipe_id].append({
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount,
+            })
+        for pk, name, text, cooking_time, image, pub_date, *author in chunk:
+            yield json.dumps(
+                {
+                    'name': name,
+                    'author': dict(zip(('email', 'username'), author)),
+                    'text': text,
+                    'cooking_time': cooking_time,
+                    'image': image,
+                    # Полная точность: DjangoJSONEncoder отбрасывает
+                    # микросекунды
+                    'pub_date': pub_date.isoformat(),
+                    'tags': tags[pk],
+                    'ingredients': ingredients[pk],
+                },
+                ensure_ascii=False,
+            ) + '\n'
+
+
+class Catalogue:
+    """Теги и ингредиенты, загруженные один раз на весь импорт."""
+
+    def __init__(self):
+        self.tags = dict(Tag.objects.values_list('slug', 'pk'))
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredient.objects.values_list('pk', 'name', 'measurement_unit')
+        }
+
+
+def positive(value, field):
+    """Целое в диапазоне PositiveSmallIntegerField."""
+
+    if (
+        not isinstance(value, int) or isinstance(value, bool)
+        or not 1 <= value <= MAX_SMALL_INTEGER
+    ):
+        raise ValueError(
+            f'{field}: нужно целое число от 1 до {MAX_SMALL_INTEGER}.',
+        )
+    return value
+
+
+def author_email(data):
+    author = data.get('author') if isinstance(data, dict) else None
+    return author.get('email') if isinstance(author, dict) else None
+
+
+def parse_recipe(data, catalogue, authors):
+    """Строка для insert_recipes из объекта JSON; ValueError для ошибок."""
+
+    if not isinstance(data, dict):
+        raise ValueError('Ожидается объект JSON.')
+    name = data.get('name')
+    if not name or len(name) > MAX_LENGTH_TITLE:
+        raise ValueError('name: пустое или слишком длинное название.')
+    email = author_email(data)
+    if email not in authors:
+        raise ValueError(f'author: нет пользователя {email}.')
+    unknown_tags = set(data.get('tags', ())) - set(catalogue.tags)
+    if unknown_tags:
+        raise ValueError(
+            f'tags: нет тегов {", ".join(sorted(unknown_tags))}.',
+        )
+    ingredients = {}
+    for item in data.get('ingredients', ()):
+        key = (item.get('name'), item.get('measurement_unit'))
+        if key not in catalogue.ingredients:
+            raise ValueError(f'ingredients: нет ингредиента {key[0]}.')
+        ingredients[catalogue.ingredients[key]] = positive(
+            item.get('amount'), 'amount',
+        )
+    if not ingredients:
+        raise ValueError('ingredients: нужен хотя бы один ингредиент.')
+    pub_date = data.get('pub_date')
+    return {
+        'author_id': authors[email],
+        'name': name,
+        'text': data.get('text') or '',
+        'cooking_time': positive(data.get('cooking_time'), 'cooking_time'),
+        'image': data.get('image') or '',
+        'pub_date': parse_datetime(pub_date) if pub_date else None,
+        'tags': [catalogue.tags[slug] for slug in data.get('tags', ())],
+        'ingredients': list(ingredients.items()),
+    }
+
+
+def import_recipes(lines, batch_size=500, update_existing=False):
+    """Импортирует NDJSON пачками; возвращает счётчики и ошибки.
+
+    Каждая пачка сохраняется отдельной транзакцией через
+    insert_recipes. Авторы ищутся по email, теги по slug, ингредиенты
+    по названию и единице измерения; строки с неизвестными ссылками
+    пропускаются с ошибкой. Для созданных и перезаписанных рецептов
+    ставится пересчёт похожих.
+    """
+
+    catalogue = Catalogue()
+    totals = defaultdict(int)
+    errors = []
+    numbered = (
+        (number, line) for number, line in enumerate(lines, 1)
+        if line.strip()
+    )
+    for chunk in chunked(numbered, batch_size):
+        parsed = []
+        for number, line in chunk:
+            try:
+                parsed.append((number, json.loads(line)))
+            except ValueError as error:
+                errors.append((number, f'JSON: {error}'))
+        authors = dict(User.objects.filter(
+            email__in={author_email(data) for _, data in parsed},
+            deleted_at__isnull=True,
+        ).values_list('email', 'pk'))
+        rows = []
+        for number, data in parsed:
+            try:
+                rows.append(parse_recipe(data, catalogue, authors))
+            except (ValueError, TypeError, AttributeError) as error:
+                errors.append((number, str(error)))
+        changed = []
+        for status, pk in insert_recipes(rows, update_existing):
+            totals[status] += 1
+            if status in (CREATED, UPDATED):
+                changed.append(pk)
+        enqueue_similar(changed)
+    return dict(totals), sorted(errors)
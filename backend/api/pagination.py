@@ -1,8 +1,32 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class RecipePagination(PageNumberPagination):
-    """Кастомная настройка пагианции."""
+    """Кастомная настройка пагианции.
+
+    Если вьюсет уже посчитал строки выборки (filtered_count), пагинатор
+    не выполняет свой COUNT.
+    """
+
+    page_size = 6
+    page_size_query_param = 'limit'
+    known_count = None
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.known_count = getattr(view, 'filtered_count', None)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class FeedPagination(CursorPagination):
+    """Пагинация ленты по ключу pub_date без OFFSET."""
 
     page_size = 6
     page_size_query_param = 'limit'
+    ordering = ('-pub_date', '-id')
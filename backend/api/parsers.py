@@ -0,0 +1,36 @@
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+# Числа из 19 и более цифр могут не поместиться в 64 бита: orjson
+# превратил бы их во float, а json из stdlib читает их точно
+LONG_NUMBER = re.compile(rb'\d{19}')
+
+
+class FastJSONParser(JSONParser):
+    """JSON-парсер на orjson с запасным вариантом на json из stdlib.
+
+    Результат совпадает с JSONParser: тела с длинными числами и тела,
+    которые orjson не разобрал (NaN, Infinity, 1e400), разбирает
+    JSONParser, поэтому ошибки и STRICT_JSON работают как в DRF.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        data = stream.read()
+        if not LONG_NUMBER.search(data):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(data), media_type, parser_context)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from recipes.constants import ALL_TIME, DAY, WEEK
+from recipes.models import (
+    Favorited,
+    Recipe,
+    RecipeActivity,
+    RecipeRank,
+    ShoppingCart,
+)
+
+WINDOWS = {
+    DAY: timedelta(hours=24),
+    WEEK: timedelta(days=7),
+    ALL_TIME: None,
+}
+
+
+def increment(model, delta, **lookup):
+    """Прибавляет delta к score строки.
+
+    Строка создаётся только для положительного delta: удаление из
+    избранного при каскадном удалении рецепта не должно создавать
+    строк для удаляемого рецепта.
+    """
+
+    if model.objects.filter(**lookup).update(score=F('score') + delta):
+        return
+    if delta <= 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(score=delta, **lookup)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(score=F('score') + delta)
+
+
+def record_event(recipe_id, delta):
+    """Учитывает добавление (+1) или удаление (-1) из избранного и корзины.
+
+    Окна 24 часа и 7 дней считают добавления за период: добавление сразу
+    попадает в них, а выбывание старых событий выполняет
+    compact_rankings. Удаление меняет только окно за всё время, иначе
+    удаление давнего добавления отняло бы очки у сегодняшних.
+    """
+
+    if delta < 0:
+        increment(RecipeRank, delta, recipe_id=recipe_id, window=ALL_TIME)
+        return
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    with transaction.atomic():
+        increment(RecipeActivity, delta, recipe_id=recipe_id, hour=hour)
+        for window in WINDOWS:
+            increment(RecipeRank, delta, recipe_id=recipe_id, window=window)
+
+
+def window_scores(window):
+    """Очки рецептов в окне, посчитанные заново."""
+
+    period = WINDOWS[window]
+    if period is None:
+        recipes = Recipe.objects.annotate(
+            rank_score=F('favorites_count') + F('in_carts_count'),
+        )
+        return recipes.filter(rank_score__gt=0).values_list(
+            'pk', 'rank_score',
+        )
+    return (
+        RecipeActivity.objects
+        .filter(hour__gte=timezone.now() - period)
+        .values('recipe_id')
+        .annotate(rank_score=Sum('score'))
+        .filter(rank_score__gt=0)
+        .values_list('recipe_id', 'rank_score')
+    )
+
+
+def compact_rankings():
+    """Пересчитывает окна и удаляет почасовую активность старше недели.
+
+    Всё время считается по счётчикам избранного и корзин рецептов,
+    поэтому исправляет и накопленные расхождения.
+    """
+
+    with transaction.atomic():
+        for window in WINDOWS:
+            RecipeRank.objects.filter(window=window).delete()
+            RecipeRank.objects.bulk_create(
+                (
+                    RecipeRank(recipe_id=recipe_id, window=window,
+                               score=score)
+                    for recipe_id, score in window_scores(window).iterator()
+                ),
+                batch_size=1000,
+            )
+        deleted, _ = RecipeActivity.objects.filter(
+            hour__lt=timezone.now() - WINDOWS[WEEK],
+        ).delete()
+    return deleted
+
+
+def needs_backfill():
+    """Очков ещё нет, а избранное или корзины уже заполнены."""
+
+    return not RecipeRank.objects.exists() and (
+        Favorited.objects.exists() or ShoppingCart.objects.exists()
+    )
@@ -0,0 +1,207 @@
+import sys
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .fieldsets import get_request_fieldsets
+
+
+class UnplannedRelationAccess(AssertionError):
+    """Сериализатор загрузил связь, которой нет в плане предзагрузки."""
+
+
+def get_relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+class PrefetchPlan:
+    """План select_related/Prefetch, выведенный из полей сериализатора.
+
+    Пути к связям берутся из source полей и вложенных сериализаторов:
+    прямые связи попадают в select_related, множественные - в Prefetch
+    со своим вложенным планом. SerializerMethodField не анализируются.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select = set()
+        self.prefetch = {}
+
+    def add_serializer(self, serializer, prefix=()):
+        for field in serializer.fields.values():
+            if field.write_only or field.source == '*':
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                continue
+            attrs = (*prefix, *field.source_attrs)
+            if isinstance(field, serializers.ListSerializer):
+                self.add_path(attrs, field.child)
+            elif isinstance(field, serializers.BaseSerializer):
+                self.add_path(attrs, field)
+            elif isinstance(field, serializers.ManyRelatedField):
+                self.add_path(attrs)
+            else:
+                # Последний атрибут - значение поля; для RelatedField
+                # по первичному ключу достаточно столбца *_id
+                self.add_path(attrs[:-1])
+
+    def add_path(self, attrs, serializer=None):
+        model = self.model
+        for index, attr in enumerate(attrs):
+            field = get_relation(model, attr)
+            if field is None:
+                return
+            lookup = '__'.join(attrs[:index + 1])
+            if field.many_to_many or field.one_to_many:
+                child = self.prefetch.setdefault(
+                    lookup, PrefetchPlan(field.related_model),
+                )
+                rest = attrs[index + 1:]
+                if rest:
+                    child.add_path(rest, serializer)
+                elif serializer is not None:
+                    child.add_serializer(serializer)
+                return
+            self.select.add(lookup)
+            model = field.related_model
+        if serializer is not None:
+            self.add_serializer(serializer, prefix=tuple(attrs))
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*sorted(self.select))
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*(
+                Prefetch(lookup, queryset=plan.apply(
+                    plan.model._default_manager.all()
+                ))
+                for lookup, plan in sorted(self.prefetch.items())
+            ))
+        return queryset
+
+    def __repr__(self):
+        return (
+            f'PrefetchPlan({self.model.__name__}, '
+            f'select={sorted(self.select)}, prefetch={self.prefetch})'
+        )
+
+
+@lru_cache(maxsize=None)
+def get_prefetch_plan(serializer_class):
+    plan = PrefetchPlan(serializer_class.Meta.model)
+    plan.add_serializer(serializer_class())
+    return plan
+
+
+def apply_prefetch_plan(queryset, serializer_class, serializer=None):
+    """Применяет к queryset план предзагрузки для сериализатора.
+
+    Если передан экземпляр serializer (например, с выбранными полями),
+    план строится по его полям, иначе берётся общий план класса.
+    """
+
+    if (
+        not issubclass(serializer_class, serializers.ModelSerializer)
+        or serializer_class.Meta.model is not queryset.model
+    ):
+        return queryset
+    if serializer is None:
+        return get_prefetch_plan(serializer_class).apply(queryset)
+    plan = PrefetchPlan(serializer_class.Meta.model)
+    plan.add_serializer(serializer)
+    return plan.apply(queryset)
+
+
+# Кадры, внутри которых DRF обходит связи объекта по source полей
+RELATION_FRAMES = {
+    ('fields.py', 'get_attribute'),
+    ('relations.py', 'get_attribute'),
+    ('relations.py', 'to_representation'),
+    ('serializers.py', 'to_representation'),
+}
+
+
+def find_unplanned_access():
+    """Ищет в стеке поле, которое догружает связь отдельным запросом.
+
+    Запросы из SerializerMethodField и из корневого сериализатора
+    (вычисление переданного ему queryset) считаются явными.
+    """
+
+    frame = sys._getframe(2)
+    found = None
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if isinstance(instance, serializers.SerializerMethodField):
+            return None
+        code = frame.f_code
+        if (
+            found is None
+            and '/rest_framework/' in code.co_filename
+            and (code.co_filename.rsplit('/', 1)[-1], code.co_name)
+            in RELATION_FRAMES
+            and getattr(instance, 'parent', True) is not None
+        ):
+            found = instance if instance is not None else code.co_name
+        frame = frame.f_back
+    return found
+
+
+def check_planned(execute, sql, params, many, context):
+    field = find_unplanned_access()
+    if field is not None:
+        raise UnplannedRelationAccess(
+            f'{type(field).__name__} {getattr(field, "field_name", "")!r} '
+            f'выполнил запрос вне плана предзагрузки: {sql}'
+        )
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def strict_prefetch_plans():
+    """Запрещает сериализаторам догружать связи отдельными запросами."""
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(check_planned))
+        yield
+
+
+class PrefetchPlanMixin:
+    """Применяет к queryset вьюсета план для текущего сериализатора.
+
+    При PREFETCH_PLAN_STRICT безопасные запросы выполняются под
+    strict_prefetch_plans, и догрузка связи вне плана вызывает ошибку.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if settings.PREFETCH_PLAN_STRICT and request.method in SAFE_METHODS:
+            with strict_prefetch_plans():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        serializer_class = self.get_serializer_class()
+        serializer = None
+        if (
+            issubclass(serializer_class, serializers.ModelSerializer)
+            and get_request_fieldsets(self.request) != (None, None)
+        ):
+            serializer = serializer_class(
+                context=self.get_serializer_context(),
+            )
+        return apply_prefetch_plan(
+            super().get_queryset(),
+            serializer_class,
+            serializer,
+        )
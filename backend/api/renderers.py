@@ -0,0 +1,51 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if orjson is not None else 0
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с тем же результатом, что и у JSONRenderer.
+
+    Типы, которые orjson не знает (Decimal, datetime, ленивые строки),
+    преобразуются стандартным JSONEncoder из DRF. Без orjson, для
+    отступов и нестандартных настроек используется JSONRenderer; он же
+    отдаёт целые числа шире 64 бит. Отличие одно: NaN и бесконечность
+    orjson выводит как null, а JSONRenderer при STRICT_JSON бросает
+    ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=ORJSON_OPTIONS,
+            )
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(
+                data, accepted_media_type, renderer_context,
+            )
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028',
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
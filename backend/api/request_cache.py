@@ -0,0 +1,24 @@
+from users.models import Follow
+
+
+def get_request_cache(request):
+    """Кэш на время запроса; подзапросы /api/batch/ используют общий."""
+
+    request = getattr(request, '_request', request)
+    if not hasattr(request, 'request_cache'):
+        request.request_cache = {}
+    return request.request_cache
+
+
+def get_followed_ids(request):
+    """id авторов, на которых подписан пользователь запроса."""
+
+    cache = get_request_cache(request)
+    key = ('followed', request.user.pk)
+    if key not in cache:
+        cache[key] = set(
+            Follow.objects
+            .filter(user=request.user)
+            .values_list('author_id', flat=True)
+        )
+    return cache[key]
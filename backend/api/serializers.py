@@ -1,10 +1,15 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField, base64
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 
-from recipes.constants import MAX_LENGTH_NAME, MAX_LENGTH_TITLE
+from recipes.constants import (
+    MAX_LENGTH_NAME,
+    MAX_LENGTH_TITLE,
+    MAX_SMALL_INTEGER,
+)
 from recipes.models import (
     Favorited,
     IngredientParameters,
@@ -14,6 +19,9 @@ from recipes.models import (
     Tag,
 )
 from users.models import User, Follow
+from .fieldsets import SparseFieldsetMixin
+from .jobs import enqueue
+from .request_cache import get_followed_ids
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -34,7 +42,7 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         )
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(SparseFieldsetMixin, UserSerializer):
     """Сериализатор для пользователя."""
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
@@ -51,11 +59,7 @@ class CustomUserSerializer(UserSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return (
-            Follow.objects
-            .filter(user=request.user, author=obj)
-            .exists()
-        )
+        return obj.pk in get_followed_ids(request)
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -86,7 +90,21 @@ class FollowSerializer(serializers.ModelSerializer):
         return data
 
 
-class FollowReadSerializer(FollowSerializer):
+class MiniRecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Сериализатор для рецептов в подписке."""
+
+    image = base64
+
+    class Meta:
+        model = Recipe
+        fields = (
+            'id', 'name',
+            'cooking_time',
+            'image',
+        )
+
+
+class FollowReadSerializer(SparseFieldsetMixin, FollowSerializer):
     """Сериализатор подписки для чтения информации о рецептах."""
 
     recipes = serializers.SerializerMethodField()
@@ -98,6 +116,8 @@ class FollowReadSerializer(FollowSerializer):
     last_name = serializers.ReadOnlyField(source='author.last_name')
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
+    method_serializers = {'recipes': MiniRecipeSerializer}
+
     class Meta:
         model = Follow
         fields = (
@@ -113,10 +133,10 @@ class FollowReadSerializer(FollowSerializer):
         recipes = Recipe.objects.filter(author=obj.author)
         if limit:
             recipes = recipes[:int(limit)]
-        return MiniRecipeSerializer(recipes, many=True).data
+        return self.nested_serializer('recipes', recipes, many=True).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
@@ -129,7 +149,7 @@ class FollowReadSerializer(FollowSerializer):
         )
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор тегов."""
 
     class Meta:
@@ -145,7 +165,10 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
-class IngredientParametersSerializer(serializers.ModelSerializer):
+class IngredientParametersSerializer(
+    SparseFieldsetMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор для промежуточной таблицы ингредиентов."""
 
     id = serializers.ReadOnlyField(source='ingredient.id')
@@ -159,7 +182,10 @@ class IngredientParametersSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(
+    SparseFieldsetMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор для чтения запросов к рецептам."""
 
     author = CustomUserSerializer(read_only=True, many=False)
@@ -209,7 +235,10 @@ class WriteIngredientParametersSerializer(IngredientParametersSerializer):
     id = serializers.PrimaryKeyRelatedField(
         queryset=Ingredient.objects.all(),
     )
-    amount = serializers.IntegerField(required=True)
+    amount = serializers.IntegerField(
+        required=True,
+        max_value=MAX_SMALL_INTEGER,
+    )
 
     class Meta:
         model = IngredientParameters
@@ -231,7 +260,10 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         required=True,
     )
     image = Base64ImageField(required=True)
-    cooking_time = serializers.IntegerField(required=True)
+    cooking_time = serializers.IntegerField(
+        required=True,
+        max_value=MAX_SMALL_INTEGER,
+    )
 
     class Meta:
         model = Recipe
@@ -258,18 +290,29 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         )
         recipe.tags.set(tags)
 
+    def enqueue_similar(self, recipe):
+        enqueue(
+            'update_similar_recipes',
+            {'recipe_id': recipe.pk},
+            dedup_key=f'update_similar_recipes:{recipe.pk}',
+        )
+
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = super().create(validated_data)
         self.set_ingredients_and_tags(ingredients, recipe, tags)
+        self.enqueue_similar(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         instance.ingredients.clear()
         self.set_ingredients_and_tags(ingredients, instance, tags)
+        self.enqueue_similar(instance)
         return super().update(instance, validated_data)
 
     def validate_tags(self, value):
@@ -324,15 +367,46 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         return value
 
 
-class MiniRecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для рецептов в подписке."""
+class BulkIngredientSerializer(serializers.Serializer):
+    """Ингредиент рецепта в пакетной загрузке."""
 
-    image = base64
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField(max_value=MAX_SMALL_INTEGER)
 
-    class Meta:
-        model = Recipe
-        fields = (
-            'id', 'name',
-            'cooking_time',
-            'image',
-        )
+
+class BulkRecipeSerializer(RecipeWriteSerializer):
+    """Сериализатор рецепта в пакетной загрузке.
+
+    Правила те же, что у RecipeWriteSerializer, но теги и ингредиенты
+    сверяются с множествами id из контекста, загруженными одним
+    запросом на всю пачку. Изображение не декодируется: его проверяет
+    фоновая задача.
+    """
+
+    tags = serializers.ListField(child=serializers.IntegerField())
+    ingredients = serializers.ListField(child=BulkIngredientSerializer())
+    image = serializers.RegexField(
+        r'^data:image/[\w.+-]+;base64,',
+        error_messages={'invalid': 'Ожидается изображение в base64.'},
+    )
+
+    def validate_tags(self, value):
+        value = super().validate_tags(value)
+        unknown = set(value) - self.context['tag_ids']
+        if unknown:
+            raise ValidationError(
+                f'Нет тегов с id {", ".join(map(str, sorted(unknown)))}.'
+            )
+        return value
+
+    def validate_ingredients(self, value):
+        value = super().validate_ingredients(value)
+        unknown = {
+            ingredient['id'] for ingredient in value
+        } - self.context['ingredient_ids']
+        if unknown:
+            raise ValidationError(
+                'Нет ингредиентов с id '
+                f'{", ".join(map(str, sorted(unknown)))}.'
+            )
+        return value
@@ -0,0 +1,225 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (
+    Favorited,
+    Ingredient,
+    IngredientParameters,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow, User
+from users.signals import user_soft_deleted
+from .authentication import (
+    ACCOUNT_FIELDS,
+    invalidate_token,
+    invalidate_user,
+)
+from .counters import change_counter, counter_for
+from .feed import fan_out, follow_added, follow_removed
+from .jobs import enqueue
+from .popularity import needs_backfill, record_event
+from .similarity import needs_rebuild
+from .versions import (
+    INGREDIENTS,
+    RECIPES,
+    TAGS,
+    account_key,
+    bump_versions,
+    touch_recipes,
+    user_key,
+)
+
+
+@receiver(post_delete, sender=Token)
+def drop_deleted_token(sender, instance, **kwargs):
+    """Сбрасывает кэш при выходе пользователя (token_destroy)."""
+
+    invalidate_token(instance.key)
+    bump_versions(account_key(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def drop_changed_user(sender, instance, created, update_fields, **kwargs):
+    """Сбрасывает кэш при смене пароля, блокировке и правке пользователя.
+
+    Сохранение с update_fields без полей ACCOUNT_FIELDS не меняет
+    версию аккаунта и не сбрасывает кэши воркеров.
+    """
+
+    if created or (update_fields and ACCOUNT_FIELDS.isdisjoint(update_fields)):
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def drop_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(user_soft_deleted, sender=User)
+def queue_user_purge(sender, user, **kwargs):
+    """Скрывает рецепты удалённого аккаунта и ставит очистку его строк."""
+
+    bump_versions(RECIPES)
+    enqueue(
+        'purge_user',
+        {'user_id': user.pk},
+        dedup_key=f'purge_user:{user.pk}',
+    )
+    invalidate_user(user.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def bump_recipes(sender, **kwargs):
+    """Новая версия списка рецептов при создании, правке и удалении."""
+
+    bump_versions(RECIPES)
+
+
+@receiver(post_save, sender=IngredientParameters)
+@receiver(post_delete, sender=IngredientParameters)
+def touch_ingredient_recipe(sender, instance, **kwargs):
+    touch_recipes(Recipe.objects.filter(pk=instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_changed_relations(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    """Изменение тегов и ингредиентов рецепта через менеджер связи."""
+
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        touch_recipes(Recipe.objects.filter(pk=instance.pk))
+    elif pk_set:
+        touch_recipes(Recipe.objects.filter(pk__in=pk_set))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def bump_tags(sender, instance, **kwargs):
+    bump_versions(TAGS)
+    touch_recipes(Recipe.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def bump_ingredients(sender, instance, **kwargs):
+    bump_versions(INGREDIENTS)
+    touch_recipes(Recipe.objects.filter(ingredients=instance))
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(sender, instance, created, update_fields, **kwargs):
+    """Данные автора входят в представление его рецептов."""
+
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    touch_recipes(Recipe.objects.filter(author=instance))
+
+
+@receiver(post_save, sender=Favorited)
+@receiver(post_delete, sender=Favorited)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def bump_user(sender, instance, **kwargs):
+    """Флаги is_favorited, is_in_shopping_cart и is_subscribed."""
+
+    bump_versions(user_key(instance.user_id))
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def update_inbox_on_follow(sender, instance, created, **kwargs):
+    if created:
+        follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def update_inbox_on_unfollow(sender, instance, **kwargs):
+    follow_removed(instance)
+
+
+@receiver(post_save, sender=Favorited)
+@receiver(post_save, sender=ShoppingCart)
+def count_added(sender, instance, created, **kwargs):
+    if created:
+        record_event(instance.recipe_id, 1)
+
+
+@receiver(post_delete, sender=Favorited)
+@receiver(post_delete, sender=ShoppingCart)
+def count_removed(sender, instance, **kwargs):
+    record_event(instance.recipe_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Favorited)
+@receiver(post_save, sender=ShoppingCart)
+def increase_counter(sender, instance, created, **kwargs):
+    """Счётчики меняются в транзакции записи, открытой вызывающим кодом."""
+
+    if created:
+        change_counter(*counter_for(instance), 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Favorited)
+@receiver(post_delete, sender=ShoppingCart)
+def decrease_counter(sender, instance, **kwargs):
+    change_counter(*counter_for(instance), -1)
+
+
+@receiver(post_migrate)
+def queue_similar_backfill(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Ставит первый пересчёт похожих рецептов после migrate.
+
+    Задачи update_similar_recipes обновляют только изменённые рецепты,
+    поэтому рецепты, которые были в базе до появления списков, иначе
+    остались бы без соседей.
+    """
+
+    if sender.label != 'recipes' or using != DEFAULT_DB_ALIAS:
+        return
+    if needs_rebuild():
+        enqueue(
+            'rebuild_similar',
+            {'count': settings.SIMILAR_RECIPES_COUNT},
+            dedup_key='rebuild_similar',
+        )
+
+
+@receiver(post_migrate)
+def queue_rankings_backfill(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Ставит немедленное уплотнение популярных рецептов после migrate.
+
+    Периодическая задача ждёт RANKINGS_COMPACT_SECONDS, а до неё окна
+    были бы пустыми для избранного, добавленного до появления очков.
+    """
+
+    if sender.label != 'recipes' or using != DEFAULT_DB_ALIAS:
+        return
+    if needs_backfill():
+        enqueue('compact_rankings', dedup_key='compact_rankings')
@@ -0,0 +1,165 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from recipes.models import IngredientParameters, Recipe, SimilarRecipe
+
+
+def load_features(recipe_ids=None):
+    """Разреженные векторы рецептов: id -> (ингредиенты, теги)."""
+
+    ingredients = IngredientParameters.objects.all()
+    tags = Recipe.tags.through.objects.all()
+    if recipe_ids is not None:
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    features = defaultdict(lambda: (set(), set()))
+    for recipe_id, ingredient_id in ingredients.values_list(
+        'recipe_id', 'ingredient_id',
+    ).iterator():
+        features[recipe_id][0].add(ingredient_id)
+    for recipe_id, tag_id in tags.values_list('recipe_id', 'tag_id'):
+        features[recipe_id][1].add(tag_id)
+    return features
+
+
+def jaccard(first, second):
+    """Коэффициент Жаккара по ингредиентам и тегам вместе."""
+
+    overlap = sum(len(a & b) for a, b in zip(first, second))
+    total = sum(len(a) + len(b) for a, b in zip(first, second)) - overlap
+    return overlap / total if total else 0.0
+
+
+def top_similar(scores, count):
+    """count лучших пар (оценка, id) по убыванию оценки."""
+
+    return heapq.nlargest(
+        count,
+        ((score, recipe_id) for recipe_id, score in scores.items() if score),
+    )
+
+
+def rebuild_similar(count):
+    """Пересчитывает соседей всех рецептов.
+
+    Кандидаты в соседи - рецепты с общим ингредиентом: они находятся по
+    обратным спискам ингредиент -> рецепты, а не перебором всех пар.
+    """
+
+    features = load_features()
+    postings = defaultdict(list)
+    for recipe_id, (ingredients, _) in features.items():
+        for ingredient_id in ingredients:
+            postings[ingredient_id].append(recipe_id)
+
+    entries = []
+    for recipe_id, vector in features.items():
+        candidates = set().union(*(
+            postings[ingredient_id] for ingredient_id in vector[0]
+        ))
+        candidates.discard(recipe_id)
+        entries.extend(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id,
+                          score=score)
+            for score, similar_id in top_similar(
+                {pk: jaccard(vector, features[pk]) for pk in candidates},
+                count,
+            )
+        )
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        SimilarRecipe.objects.bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def lock_recipes(recipe_ids):
+    """Блокирует строки рецептов до конца транзакции, по возрастанию id."""
+
+    return set(
+        Recipe.objects.select_for_update().filter(
+            pk__in=recipe_ids,
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def related_recipes(recipe):
+    """Рецепты с общим ингредиентом и рецепты, где рецепт в соседях."""
+
+    own = IngredientParameters.objects.filter(recipe=recipe).values(
+        'ingredient_id',
+    )
+    candidates = set(
+        IngredientParameters.objects
+        .filter(ingredient_id__in=own)
+        .exclude(recipe=recipe)
+        .values_list('recipe_id', flat=True)
+    )
+    listed_by = set(
+        SimilarRecipe.objects.filter(similar=recipe).values_list(
+            'recipe_id', flat=True,
+        )
+    )
+    return candidates, listed_by
+
+
+def update_similar(recipe, count=None):
+    """Обновляет соседей рецепта и его место в списках соседей.
+
+    Сравнение идёт только с рецептами, у которых есть общий ингредиент,
+    и с рецептами, у которых он уже был в списке похожих. Строки этих
+    рецептов блокируются, поэтому задачи для рецептов с общими
+    ингредиентами выполняются по очереди и не затирают списки друг
+    друга.
+    """
+
+    count = count or settings.SIMILAR_RECIPES_COUNT
+    with transaction.atomic():
+        locked = lock_recipes(set().union(
+            *related_recipes(recipe), {recipe.pk},
+        ))
+        # Пока ждали блокировку, соседние задачи могли изменить списки
+        candidates, listed_by = related_recipes(recipe)
+        lock_recipes((candidates | listed_by) - locked)
+
+        features = load_features(candidates | listed_by | {recipe.pk})
+        vector = features[recipe.pk]
+        scores = {pk: jaccard(vector, features[pk]) for pk in candidates}
+
+        neighbours = defaultdict(dict)
+        for recipe_id, similar_id, score in SimilarRecipe.objects.filter(
+            recipe_id__in=candidates | listed_by,
+        ).values_list('recipe_id', 'similar_id', 'score'):
+            neighbours[recipe_id][similar_id] = score
+
+        changed = {recipe.pk: top_similar(scores, count)}
+        for recipe_id in candidates | listed_by:
+            current = neighbours[recipe_id]
+            score = scores.get(recipe_id, 0.0)
+            if current.get(recipe.pk, 0.0) == score:
+                continue
+            if recipe.pk not in current and len(current) >= count and (
+                score <= min(current.values())
+            ):
+                continue
+            current[recipe.pk] = score
+            changed[recipe_id] = top_similar(current, count)
+
+        SimilarRecipe.objects.filter(recipe_id__in=changed).delete()
+        SimilarRecipe.objects.bulk_create(
+            SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id,
+                          score=score)
+            for recipe_id, top in changed.items()
+            for score, similar_id in top
+        )
+
+
+def needs_rebuild():
+    """Списки похожих ещё не считались, а рецепты с ингредиентами есть."""
+
+    return (
+        not SimilarRecipe.objects.exists()
+        and IngredientParameters.objects.exists()
+    )
@@ -0,0 +1,175 @@
+import json
+import logging
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger('foodgram.slow_queries')
+
+# Запрос, в рамках которого выполняется SQL; переходит и в потоки пула
+current_request = ContextVar('slow_query_request', default=None)
+
+# Таблицы, последовательное сканирование которых считается проблемой
+WATCHED_TABLES = (
+    'recipes_favorited',
+    'recipes_shoppingcart',
+    'users_follow',
+    'recipes_ingredientparameters',
+    'recipes_recipe_tags',
+)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Нормализует SQL-запрос, отбрасывая конкретные значения."""
+
+    sql = STRING_LITERAL.sub('%s', sql)
+    sql = NUMBER_LITERAL.sub('%s', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    sql = sql.replace('%s', '?')
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def find_serializer_frame():
+    """Ищет в стеке вызовов метод сериализатора, выполнивший запрос."""
+
+    frame = sys._getframe(2)
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if isinstance(instance, BaseSerializer):
+            return (
+                f'{type(instance).__name__}.{frame.f_code.co_name} '
+                f'({frame.f_code.co_filename}:{frame.f_lineno})'
+            )
+        frame = frame.f_back
+    return None
+
+
+def iter_plan_nodes(plan):
+    """Обходит все узлы плана EXPLAIN в формате JSON."""
+
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from iter_plan_nodes(child)
+
+
+class SlowQueryLogger:
+    """Обёртка выполнения SQL, логирующая медленные запросы.
+
+    Для каждого запроса дольше SLOW_QUERY_THRESHOLD_MS в лог пишется
+    JSON-запись с текстом запроса, вьюхой и сериализатором. На PostgreSQL
+    для части медленных SELECT-запросов дополнительно сохраняется
+    EXPLAIN (ANALYZE, BUFFERS). SQL вне HTTP-запросов не логируется.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        request = current_request.get()
+        if request is None or self.explaining:
+            return execute(sql, params, many, context)
+
+        start = time.monotonic()
+        result = execute(sql, params, many, context)
+        duration = (time.monotonic() - start) * 1000
+
+        # Логгер живёт, пока живёт соединение, поэтому настройки
+        # читаются при каждом запросе
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold is not None and duration >= threshold:
+            self.log(request, sql, params, many, duration)
+        return result
+
+    def get_view_name(self, request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return None
+        return resolver_match.view_name or resolver_match._func_path
+
+    def explain(self, sql, params):
+        self.explaining = True
+        try:
+            with transaction.atomic(using=self.connection.alias):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + sql,
+                        params,
+                    )
+                    plan = cursor.fetchone()[0]
+        except Exception as error:
+            logger.debug('Не удалось получить EXPLAIN: %s', error)
+            return None
+        finally:
+            self.explaining = False
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan
+
+    def should_explain(self, sql, many):
+        return (
+            not many
+            and self.connection.vendor == 'postgresql'
+            and sql.lstrip().upper().startswith('SELECT')
+            and not self.connection.needs_rollback
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        )
+
+    def log(self, request, sql, params, many, duration):
+        record = {
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'duration_ms': round(duration, 3),
+            'database': self.connection.alias,
+            'method': request.method,
+            'path': request.path,
+            'view': self.get_view_name(request),
+            'serializer': find_serializer_frame(),
+        }
+        if self.should_explain(sql, many):
+            record['explain'] = self.explain(sql, params)
+        logger.warning(json.dumps(record, ensure_ascii=False, default=str))
+
+
+def install_logger(connection, **kwargs):
+    if not any(
+        isinstance(wrapper, SlowQueryLogger)
+        for wrapper in connection.execute_wrappers
+    ):
+        connection.execute_wrappers.append(SlowQueryLogger(connection))
+
+
+def install_slow_query_logger():
+    """Подключает логгер ко всем соединениям, включая потоки пула.
+
+    Соединения в каждом потоке свои, поэтому логгер ставится и на уже
+    открытые соединения, и на каждое новое.
+    """
+
+    for connection in connections.all():
+        install_logger(connection)
+    connection_created.connect(
+        install_logger, dispatch_uid='install_slow_query_logger',
+    )
+
+
+@contextmanager
+def log_slow_queries(request):
+    token = current_request.set(request)
+    try:
+        yield
+    finally:
+        current_request.reset(token)
@@ -0,0 +1,132 @@
+import gzip
+import os
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+
+from recipes.models import Tag
+from .jobs import enqueue
+from .pagination import RecipePagination
+from .versions import INGREDIENTS, RECIPES, TAGS
+from .warmup import get_host, render_request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SNAPSHOT_PATHS = {
+    TAGS: '/api/tags/',
+    INGREDIENTS: '/api/ingredients/',
+    RECIPES: '/api/recipes/',
+}
+
+
+def snapshot_queries(key):
+    """Строки запроса, которые отправляет фронтенд анонимного гостя.
+
+    Для рецептов это первые SNAPSHOT_PAGES страниц без фильтра и со
+    всеми тегами - так главная страница открывается по умолчанию.
+    """
+
+    if key != RECIPES:
+        return ['']
+    limit = RecipePagination.page_size
+    all_tags = [('tags', slug) for slug in Tag.objects.values_list(
+        'slug', flat=True,
+    )]
+    return [''] + [
+        urlencode([('page', page), ('limit', limit)] + tags)
+        for page in range(1, settings.SNAPSHOT_PAGES + 1)
+        for tags in ([], all_tags)
+    ]
+
+
+def snapshot_file(path, query):
+    """Файл снимка: адрес запроса с '.json', как в try_files nginx."""
+
+    name = path.lstrip('/') + (f'?{query}' if query else '') + '.json'
+    return Path(settings.SNAPSHOT_ROOT) / name
+
+
+def write_atomic(path, content):
+    temporary = path.with_name(f'.{path.name}.tmp')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def write_snapshot(path, content):
+    """Пишет JSON и его сжатые копии для gzip_static и brotli_static."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Сжатые копии пишутся первыми: nginx отдаёт их, только если
+    # есть несжатый файл
+    write_atomic(
+        path.with_name(path.name + '.gz'),
+        gzip.compress(content, compresslevel=9),
+    )
+    if brotli is not None:
+        write_atomic(
+            path.with_name(path.name + '.br'),
+            brotli.compress(content),
+        )
+    write_atomic(path, content)
+
+
+def remove_snapshot(path):
+    for suffix in ('', '.gz', '.br'):
+        path.with_name(path.name + suffix).unlink(missing_ok=True)
+
+
+def get_base_url():
+    return urlsplit(settings.SNAPSHOT_BASE_URL or f'http://{get_host()}')
+
+
+def render_snapshots(key):
+    """Перерисовывает снимки набора данных; возвращает число файлов.
+
+    Ответы берутся у приложения анонимным запросом, поэтому совпадают
+    с тем, что отдал бы gunicorn. Снимки прежних адресов (например,
+    после переименования тега) удаляются.
+    """
+
+    url = get_base_url()
+    path = SNAPSHOT_PATHS[key]
+    written = set()
+    for query in snapshot_queries(key):
+        target = snapshot_file(path, query)
+        response = render_request(
+            f'{path}?{query}' if query else path,
+            host=url.netloc,
+            secure=url.scheme == 'https',
+        )
+        if response.status_code != 200:
+            remove_snapshot(target)
+            continue
+        write_snapshot(target, response.content)
+        written.add(target)
+    directory = snapshot_file(path, '').parent
+    for stale in directory.glob('*.json'):
+        if stale not in written:
+            remove_snapshot(stale)
+    return len(written)
+
+
+def schedule_snapshots(keys):
+    """Ставит перерисовку снимков для изменившихся наборов данных.
+
+    Задача откладывается на SNAPSHOT_DELAY секунд, чтобы серия
+    изменений перерисовала снимки один раз.
+    """
+
+    if not settings.SNAPSHOT_ROOT:
+        return
+    for key in keys:
+        if key in SNAPSHOT_PATHS:
+            enqueue(
+                'render_snapshots',
+                {'key': key},
+                dedup_key=f'render_snapshots:{key}',
+                delay=settings.SNAPSHOT_DELAY,
+            )
@@ -0,0 +1,24 @@
+from recipes.models import Recipe
+from .counters import reconcile_counters
+from .deletion import purge_user
+from .images import process_recipe_image
+from .jobs import delete_finished_jobs, task
+from .popularity import compact_rankings
+from .similarity import rebuild_similar, update_similar
+from .snapshots import render_snapshots
+
+# Длинные служебные задачи уступают очередь задачам после запросов
+task(max_attempts=5, priority=-10)(purge_user)
+task(priority=-10)(reconcile_counters)
+task(priority=-10, every='RANKINGS_COMPACT_SECONDS')(compact_rankings)
+task(priority=-20)(delete_finished_jobs)
+task()(render_snapshots)
+task(priority=-10)(rebuild_similar)
+task(priority=5)(process_recipe_image)
+
+
+@task(priority=10)
+def update_similar_recipes(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is not None:
+        update_similar(recipe)
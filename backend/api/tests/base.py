@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.constants import GREEN, ORANGE
+from recipes.models import Ingredient, IngredientParameters, Recipe, Tag
+from users.models import User
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1Pe'
+    'AAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC'
+)
+
+
+def create_user(username):
+    return User.objects.create_user(
+        email=f'{username}@example.com',
+        username=username,
+        first_name=username,
+        last_name=username,
+        password='password',
+    )
+
+
+def create_recipe(author, name, tags=(), ingredients=(), cooking_time=10):
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text=f'Текст рецепта {name}',
+        cooking_time=cooking_time,
+        image='recipes/images/test.png',
+    )
+    recipe.tags.set(tags)
+    IngredientParameters.objects.bulk_create(
+        IngredientParameters(recipe=recipe, ingredient=ingredient, amount=1)
+        for ingredient in ingredients
+    )
+    return recipe
+
+
+class ApiTestCase(TestCase):
+    """Теги, ингредиенты, автор и клиент API, вошедший от его имени.
+
+    Загруженные файлы пишутся во временный MEDIA_ROOT.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.breakfast = Tag.objects.create(
+            name='Завтрак', color=GREEN, slug='breakfast',
+        )
+        cls.lunch = Tag.objects.create(
+            name='Обед', color=ORANGE, slug='lunch',
+        )
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г',
+        )
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г',
+        )
+        cls.author = create_user('author')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def recipe_data(self, name, **fields):
+        return {
+            'name': name,
+            'text': f'Текст рецепта {name}',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [self.breakfast.pk],
+            'ingredients': [{'id': self.salt.pk, 'amount': 5}],
+            **fields,
+        }
@@ -0,0 +1,128 @@
+from django.contrib import admin
+from django.contrib.auth.models import Group
+from django.contrib.contenttypes.models import ContentType
+from django.test import RequestFactory
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Favorited, Ingredient, Job, ShoppingCart
+from users.models import Follow, User
+from .base import ApiTestCase, create_recipe, create_user
+
+# Запросов на страницу списка: счётчики строк, страница со связанными
+# объектами одним JOIN и значения фильтров; не зависят от числа строк
+CHANGELIST_QUERIES = {
+    'auth.Group': 3,
+    'authtoken.TokenProxy': 3,
+    'recipes.Favorited': 2,
+    'recipes.Ingredient': 2,
+    'recipes.IngredientParameters': 2,
+    'recipes.Job': 3,
+    'recipes.Recipe': 3,
+    'recipes.ShoppingCart': 2,
+    'recipes.Tag': 3,
+    'users.Follow': 2,
+    'users.User': 2,
+}
+
+# Запросов на форму изменения без строк инлайнов (включая SAVEPOINT и
+# тип содержимого для ссылки на историю); строка инлайна добавляет
+# запрос на подпись выбранного значения
+CHANGE_QUERIES = {
+    'auth.Group': 6,
+    'authtoken.TokenProxy': 6,
+    'recipes.Favorited': 8,
+    'recipes.Ingredient': 4,
+    'recipes.IngredientParameters': 7,
+    'recipes.Job': 4,
+    'recipes.Recipe': 8,
+    'recipes.ShoppingCart': 8,
+    'recipes.Tag': 4,
+    'users.Follow': 8,
+    'users.User': 8,
+}
+
+
+class AdminQueriesTest(ApiTestCase):
+    """Число запросов на страницах админки не растёт с таблицами."""
+
+    generation = 0
+
+    @classmethod
+    def add_rows(cls):
+        """Добавляет по несколько строк во все таблицы админки."""
+
+        cls.generation += 1
+        suffix = cls.generation
+        reader = create_user(f'reader{suffix}')
+        cook = create_user(f'cook{suffix}')
+        Token.objects.create(user=reader)
+        Group.objects.create(name=f'Группа {suffix}')
+        Follow.objects.create(user=reader, author=cook)
+        ingredient = Ingredient.objects.create(
+            name=f'перец {suffix}', measurement_unit='г',
+        )
+        for number in range(3):
+            recipe = create_recipe(
+                cook, f'Рецепт {suffix}.{number}',
+                [cls.breakfast], [cls.salt, ingredient],
+            )
+            Favorited.objects.create(user=reader, recipe=recipe)
+            ShoppingCart.objects.create(user=reader, recipe=recipe)
+            Job.objects.create(
+                name='update_similar_recipes',
+                payload={'recipe_id': recipe.pk},
+            )
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.add_rows()
+
+    def get_request(self, path):
+        request = RequestFactory().get(path)
+        request.user = User(
+            username='admin-check',
+            is_active=True,
+            is_staff=True,
+            is_superuser=True,
+        )
+        return request
+
+    def render(self, view, path, *args):
+        # Кэш типов содержимого живёт весь процесс; без сброса число
+        # запросов зависело бы от порядка тестов
+        ContentType.objects.clear_cache()
+        response = view(self.get_request(path), *args)
+        response.render()
+        self.assertEqual(response.status_code, 200)
+
+    def count_inline_rows(self, model_admin, obj):
+        request = self.get_request('/')
+        return sum(
+            inline.get_formset(request, obj)(instance=obj).get_queryset()
+            .count()
+            for inline in model_admin.get_inline_instances(request, obj)
+        )
+
+    def check_pages(self):
+        for model, model_admin in admin.site._registry.items():
+            opts = model._meta
+            base = f'/admin/{opts.app_label}/{opts.model_name}/'
+            with self.subTest(page=base):
+                with self.assertNumQueries(CHANGELIST_QUERIES[opts.label]):
+                    self.render(model_admin.changelist_view, base)
+            obj = model._default_manager.order_by('pk').last()
+            path = f'{base}{obj.pk}/change/'
+            rows = self.count_inline_rows(model_admin, obj)
+            with self.subTest(page=path):
+                with self.assertNumQueries(CHANGE_QUERIES[opts.label] + rows):
+                    self.render(model_admin.change_view, path, str(obj.pk))
+
+    def test_changelist_and_change_pages(self):
+        self.check_pages()
+
+    def test_more_rows_add_no_queries(self):
+        self.add_rows()
+        self.add_rows()
+
+        self.check_pages()
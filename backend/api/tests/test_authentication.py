@@ -0,0 +1,114 @@
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from users.models import User
+from ..authentication import CachedTokenAuthentication, LazyUser, token_cache
+from ..versions import account_key, get_versions
+from .base import ApiTestCase, create_recipe
+
+
+class CachedTokenAuthenticationTest(ApiTestCase):
+    """Кэш токенов хранит id, а не экземпляры пользователей."""
+
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.author)
+        self.authentication = CachedTokenAuthentication()
+
+    def test_cached_token_returns_lazy_user(self):
+        self.authentication.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate_credentials(
+                self.token.key,
+            )
+            self.assertIsInstance(user, LazyUser)
+            self.assertEqual((user.pk, user.id), (self.author.pk,) * 2)
+            self.assertTrue(user and user.is_authenticated)
+            self.assertEqual(token.user_id, self.author.pk)
+
+    def test_lazy_user_reads_fresh_row(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        # Поле меняется без post_save, как в rebuild_feed_inboxes
+        User.objects.filter(pk=self.author.pk).update(feed_inbox=True)
+
+        user, _ = self.authentication.authenticate_credentials(
+            self.token.key,
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(user.feed_inbox)
+            self.assertEqual(user.username, 'author')
+
+    def test_saving_request_user_keeps_counters(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        user, _ = self.authentication.authenticate_credentials(
+            self.token.key,
+        )
+        create_recipe(self.author, 'Омлет')
+
+        user.first_name = 'Автор'
+        user.save()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.first_name, 'Автор')
+        self.assertEqual(self.author.recipes_count, 1)
+
+    def test_inactive_user_is_dropped_from_cache(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(client.get('/api/users/me/').status_code, 200)
+
+        self.author.is_active = False
+        self.author.save()
+
+        self.assertEqual(client.get('/api/users/me/').status_code, 401)
+
+    def stale_client(self, change):
+        """Клиент с записью кэша, о которой воркер ещё не знает."""
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(client.get('/api/users/me/').status_code, 200)
+        change()
+        # Сигналы сбросили кэш; другой воркер ещё держит старую запись
+        token_cache.set(self.token.key, self.author.pk)
+        return client
+
+    def test_deleted_user_gets_401(self):
+        client = self.stale_client(self.author.delete)
+
+        self.assertEqual(client.get('/api/users/me/').status_code, 401)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_deactivated_user_gets_401(self):
+        client = self.stale_client(lambda: User.objects.filter(
+            pk=self.author.pk,
+        ).update(is_active=False))
+        user, _ = self.authentication.authenticate_credentials(
+            self.token.key,
+        )
+
+        self.assertEqual(client.get('/api/users/me/').status_code, 401)
+        self.assertIsNone(token_cache.get(self.token.key))
+        token_cache.set(self.token.key, self.author.pk)
+        with self.assertRaises(AuthenticationFailed):
+            user.is_active
+
+    def test_login_keeps_cache(self):
+        self.authentication.authenticate_credentials(self.token.key)
+        key = account_key(self.author.pk)
+        version = get_versions(key)[key]
+
+        self.author.save(update_fields=['last_login'])
+
+        self.assertEqual(token_cache.get(self.token.key), self.author.pk)
+        self.assertEqual(get_versions(key)[key], version)
+
+        self.author.set_password('new-password')
+        self.author.save(update_fields=['password', 'last_login'])
+
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertNotEqual(get_versions(key)[key], version)
@@ -0,0 +1,95 @@
+from django.test import override_settings
+
+from .base import ApiTestCase, create_recipe
+
+
+class BatchTest(ApiTestCase):
+    """Пакет GET-запросов /api/batch/."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_recipe(self.author, 'Омлет', [self.breakfast])
+
+    def batch(self, *urls, etags=()):
+        response = self.client.get(
+            '/api/batch/', {'url': list(urls), 'etag': list(etags)},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['responses']
+
+    def statuses(self, *urls):
+        return [item['status'] for item in self.batch(*urls)]
+
+    def test_mixed_responses(self):
+        found, missing, unknown = self.batch(
+            f'/api/recipes/{self.recipe.pk}/',
+            f'/api/recipes/{self.recipe.pk + 100}/',
+            '/api/unknown/',
+        )
+
+        self.assertEqual(found['status'], 200)
+        self.assertEqual(found['body']['name'], 'Омлет')
+        self.assertEqual(missing['status'], 404)
+        self.assertEqual(unknown['status'], 404)
+
+    def test_rejected_paths(self):
+        self.assertEqual(self.statuses(
+            '/api/batch/?url=/api/tags/',
+            'http://testserver/api/tags/',
+            '//testserver/api/tags/',
+            '/admin/',
+            '/api/tags/',
+        ), [400, 400, 400, 400, 200])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_limit(self):
+        self.assertEqual(len(self.batch('/api/tags/', '/api/tags/')), 2)
+        for urls in (['/api/tags/'] * 3, []):
+            with self.subTest(count=len(urls)):
+                response = self.client.get('/api/batch/', {'url': urls})
+                self.assertEqual(response.status_code, 400)
+
+    def test_subrequests_use_batch_user(self):
+        me, tags = self.batch('/api/users/me/', '/api/tags/')
+        self.assertEqual(me['status'], 200)
+        self.assertEqual(me['body']['username'], self.author.username)
+
+        self.client.force_authenticate(None)
+        me, tags = self.batch('/api/users/me/', '/api/tags/')
+
+        self.assertEqual(me['status'], 401)
+        self.assertEqual(tags['status'], 200)
+
+    def test_etag_in_subrequest(self):
+        path = f'/api/recipes/{self.recipe.pk}/'
+        first, = self.batch(path)
+        self.assertEqual(
+            first['etag'], self.client.get(path)['ETag'],
+        )
+
+        cached, tags = self.batch(path, '/api/tags/', etags=[first['etag']])
+        self.assertEqual(cached['status'], 304)
+        self.assertIsNone(cached['body'])
+        self.assertEqual(tags['status'], 200)
+
+        self.recipe.name = 'Яичница'
+        self.recipe.save()
+        changed, = self.batch(path, etags=[first['etag']])
+        self.assertEqual(changed['status'], 200)
+        self.assertNotEqual(changed['etag'], first['etag'])
+
+    def test_batch_conditional_headers_skipped(self):
+        path = '/api/tags/'
+        etag = self.client.get(path)['ETag']
+
+        response = self.client.get(
+            '/api/batch/', {'url': path}, HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(response.json()['responses'][0]['status'], 200)
+
+    def test_more_etags_than_urls(self):
+        response = self.client.get(
+            '/api/batch/', {'url': '/api/tags/', 'etag': ['"a"', '"b"']},
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,114 @@
+from django.test import override_settings
+
+from recipes.constants import PENDING
+from recipes.models import IngredientParameters, Job, Recipe
+from ..jobs import claim_job, run_claimed
+from .base import ApiTestCase, create_recipe
+
+URL = '/api/recipes/bulk/'
+
+
+class BulkRecipeTest(ApiTestCase):
+    """POST /api/recipes/bulk/: результат по каждому рецепту пачки."""
+
+    def post(self, items):
+        return self.client.post(URL, items, format='json')
+
+    def run_jobs(self, name):
+        for pk in Job.objects.filter(
+            name=name, status=PENDING,
+        ).values_list('pk', flat=True):
+            self.assertTrue(run_claimed(claim_job(pk)))
+
+    def test_mixed_items(self):
+        create_recipe(self.author, 'Суп')
+
+        response = self.post([
+            self.recipe_data('Омлет'),
+            self.recipe_data('Каша', cooking_time=100000),
+            self.recipe_data('Омлет'),
+            self.recipe_data('Суп'),
+            self.recipe_data('Блины', ingredients=[
+                {'id': self.flour.pk, 'amount': 100000},
+            ]),
+            self.recipe_data('Пирог', tags=[0]),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['created', 'invalid', 'exists', 'exists', 'invalid', 'invalid'],
+        )
+        self.assertIn('cooking_time', results[1]['errors'])
+        self.assertIn('ingredients', results[4]['errors'])
+        self.assertIn('tags', results[5]['errors'])
+        omelette = Recipe.objects.get(author=self.author, name='Омлет')
+        self.assertEqual(results[0]['id'], omelette.pk)
+        self.assertEqual(results[2]['id'], omelette.pk)
+        self.assertEqual(
+            list(omelette.tags.values_list('pk', flat=True)),
+            [self.breakfast.pk],
+        )
+        self.assertEqual(
+            list(IngredientParameters.objects.filter(
+                recipe=omelette,
+            ).values_list('ingredient_id', 'amount')),
+            [(self.salt.pk, 5)],
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+
+    def test_jobs_are_queued_for_created_recipes(self):
+        response = self.post([
+            self.recipe_data('Омлет'), self.recipe_data('Каша'),
+        ])
+
+        ids = {result['id'] for result in response.json()}
+        for name in ('process_recipe_image', 'update_similar_recipes'):
+            self.assertEqual(
+                {job.payload['recipe_id'] for job in Job.objects.filter(
+                    name=name, status=PENDING,
+                )},
+                ids,
+            )
+
+    def test_image_job_decodes_image(self):
+        response = self.post([
+            self.recipe_data('Омлет'),
+            self.recipe_data('Каша', image='data:image/png;base64,bm9wZQ=='),
+        ])
+        omelette, porridge = (
+            Recipe.objects.get(pk=result['id']) for result in response.json()
+        )
+        self.assertFalse(omelette.image)
+
+        with self.assertLogs('foodgram.jobs', 'WARNING'):
+            self.run_jobs('process_recipe_image')
+
+        omelette.refresh_from_db()
+        porridge.refresh_from_db()
+        self.assertTrue(omelette.image.name.startswith('recipes/images/'))
+        self.assertTrue(omelette.image.storage.exists(omelette.image.name))
+        self.assertFalse(porridge.image)
+
+    @override_settings(RECIPE_BULK_MAX=2)
+    def test_limit(self):
+        response = self.post([
+            self.recipe_data(name) for name in ('Омлет', 'Каша', 'Суп')
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_empty_or_not_list(self):
+        for items in ([], {'name': 'Омлет'}):
+            with self.subTest(items=items):
+                self.assertEqual(self.post(items).status_code, 400)
+
+    def test_anonymous(self):
+        self.client.force_authenticate(None)
+
+        self.assertEqual(
+            self.post([self.recipe_data('Омлет')]).status_code, 401,
+        )
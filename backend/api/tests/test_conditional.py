@@ -0,0 +1,82 @@
+from recipes.models import Favorited, ShoppingCart
+from .base import ApiTestCase, create_recipe, create_user
+
+
+class ConditionalGetTest(ApiTestCase):
+    """ETag, Last-Modified и ответы 304 для рецептов и тегов."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_recipe(
+            self.author, 'Омлет', [self.breakfast], [self.salt],
+        )
+        self.reader = create_user('reader')
+        self.client.force_authenticate(self.reader)
+
+    def get(self, path, **headers):
+        return self.client.get(path, **headers)
+
+    def etag(self, path):
+        response = self.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified(self):
+        for path in (
+            '/api/recipes/', f'/api/recipes/{self.recipe.pk}/', '/api/tags/',
+        ):
+            with self.subTest(path=path):
+                response = self.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.get(
+                    path, HTTP_IF_NONE_MATCH=response['ETag'],
+                ).status_code, 304)
+                self.assertEqual(self.get(
+                    path, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+                ).status_code, 304)
+
+    def test_etag_changes_after_rename(self):
+        path = f'/api/recipes/{self.recipe.pk}/'
+        for instance, field, value in (
+            (self.breakfast, 'name', 'Ранний завтрак'),
+            (self.salt, 'name', 'морская соль'),
+            (self.author, 'first_name', 'Пётр'),
+        ):
+            with self.subTest(model=type(instance).__name__):
+                before = self.etag(path)
+                list_before = self.etag('/api/recipes/')
+                setattr(instance, field, value)
+                instance.save()
+
+                self.assertNotEqual(self.etag(path), before)
+                self.assertNotEqual(self.etag('/api/recipes/'), list_before)
+
+    def test_etag_depends_on_user_data(self):
+        path = f'/api/recipes/{self.recipe.pk}/'
+        response = self.get(path)
+        vary = {header.strip() for header in response['Vary'].split(',')}
+        self.assertTrue({'Accept', 'Authorization'} <= vary)
+
+        for model in (Favorited, ShoppingCart):
+            with self.subTest(model=model.__name__):
+                before = self.etag(path)
+                model.objects.create(user=self.reader, recipe=self.recipe)
+
+                self.assertNotEqual(self.etag(path), before)
+
+    def test_etag_differs_between_users(self):
+        path = '/api/recipes/'
+        reader_etag = self.etag(path)
+        self.client.force_authenticate(self.author)
+
+        self.assertNotEqual(self.etag(path), reader_etag)
+        self.assertEqual(
+            self.get(path, HTTP_IF_NONE_MATCH=reader_etag).status_code, 200,
+        )
+
+    def test_missing_detail(self):
+        for pk in (self.recipe.pk + 100, 'abc'):
+            with self.subTest(pk=pk):
+                response = self.get(f'/api/recipes/{pk}/')
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header('ETag'))
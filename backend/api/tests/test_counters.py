@@ -0,0 +1,76 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorited, Recipe, ShoppingCart
+from users.models import Follow, User
+from .base import ApiTestCase, create_recipe, create_user
+
+
+class CounterFieldsTest(ApiTestCase):
+    """Обычный save() не перезаписывает счётчики устаревшими значениями."""
+
+    def setUp(self):
+        super().setUp()
+        self.reader = create_user('reader')
+
+    def test_set_password_keeps_user_counters(self):
+        stale = User.objects.get(pk=self.author.pk)
+        create_recipe(self.author, 'Омлет')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        stale.set_password('new-password')
+        stale.save()
+
+        self.author.refresh_from_db()
+        self.assertEqual(
+            (self.author.recipes_count, self.author.followers_count), (1, 1),
+        )
+        self.assertTrue(self.author.check_password('new-password'))
+
+    def test_recipe_save_keeps_recipe_counters(self):
+        recipe = create_recipe(self.author, 'Омлет')
+        stale = Recipe.objects.get(pk=recipe.pk)
+        Favorited.objects.create(user=self.reader, recipe=recipe)
+        ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+
+        stale.text = 'Новый текст'
+        stale.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.text, 'Новый текст')
+        self.assertEqual(
+            (recipe.favorites_count, recipe.in_carts_count), (1, 1),
+        )
+
+    def test_new_recipe_saves_counters(self):
+        recipe = Recipe(
+            author=self.author,
+            name='Омлет',
+            text='Текст',
+            image='recipes/images/test.png',
+            favorites_count=3,
+        )
+        recipe.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 3)
+
+    def test_recipe_update_does_not_write_counters(self):
+        recipe = create_recipe(self.author, 'Омлет', [self.breakfast])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                self.recipe_data('Омлет с солью'),
+                format='json',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "recipes_recipe" SET')
+            and '"name"' in query['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('favorites_count', updates[0])
+        self.assertNotIn('in_carts_count', updates[0])
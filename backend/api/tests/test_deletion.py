@@ -0,0 +1,48 @@
+from recipes.constants import PENDING
+from recipes.models import Job, ShoppingCart
+from .base import ApiTestCase, create_recipe, create_user
+
+
+class SoftDeleteTest(ApiTestCase):
+    """Рецепты скрытого аккаунта недоступны до очистки его строк."""
+
+    def setUp(self):
+        super().setUp()
+        self.cook = create_user('cook')
+        self.hidden = create_recipe(self.cook, 'Суп', ingredients=[self.salt])
+        self.kept = create_recipe(
+            self.author, 'Хлеб', ingredients=[self.flour],
+        )
+        ShoppingCart.objects.create(user=self.author, recipe=self.hidden)
+        self.cook.soft_delete()
+
+    def test_purge_is_queued(self):
+        self.cook.refresh_from_db()
+        self.assertFalse(self.cook.is_active)
+        self.assertIsNotNone(self.cook.deleted_at)
+        self.assertEqual(
+            list(Job.objects.filter(status=PENDING).values_list(
+                'name', 'payload',
+            )),
+            [('purge_user', {'user_id': self.cook.pk})],
+        )
+
+    def test_hidden_recipe_cannot_be_added(self):
+        for action in ('favorite', 'shopping_cart'):
+            with self.subTest(action=action):
+                response = self.client.post(
+                    f'/api/recipes/{self.hidden.pk}/{action}/',
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_shopping_list_skips_hidden_recipes(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 404)
+
+        ShoppingCart.objects.create(user=self.author, recipe=self.kept)
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('мука', content)
+        self.assertNotIn('соль', content)
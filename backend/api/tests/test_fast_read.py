@@ -0,0 +1,74 @@
+from django.test import override_settings
+
+from recipes.models import Favorited, ShoppingCart
+from users.models import Follow
+from .base import ApiTestCase, create_recipe, create_user
+
+QUERIES = (
+    '',
+    '?limit=50',
+    '?page=2&limit=2',
+    '?limit=50&tags=breakfast&tags=lunch',
+    '?is_favorited=1',
+    '?is_in_shopping_cart=1',
+    '?limit=50&fields=id,name,author.username,is_favorited',
+    '?limit=50&omit=text,ingredients,author.is_subscribed',
+    '?limit=50&fields=tags.slug,ingredients&omit=ingredients.amount',
+)
+
+
+# Версии проверяются перед каждым запросом, чтобы число запросов
+# не зависело от времени между ними
+@override_settings(INVALIDATION_CHECK_SECONDS=0)
+class RecipeFastReadTest(ApiTestCase):
+    """Быстрый список рецептов совпадает с RecipeReadSerializer.
+
+    Каждая страница рендерится обоими способами для анонима и для
+    пользователя; ответы должны совпадать байт в байт.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.reader = create_user('reader')
+        cook = create_user('cook')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        recipes = [
+            create_recipe(
+                author, f'Рецепт {number}',
+                [cls.breakfast, cls.lunch][:number % 3],
+                [cls.salt, cls.flour][:number % 2 + 1],
+            )
+            for number, author in enumerate([cls.author, cook] * 3)
+        ]
+        for recipe in recipes[::2]:
+            Favorited.objects.create(user=cls.reader, recipe=recipe)
+        for recipe in recipes[1::2]:
+            ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+
+    def render(self, query, fast_read):
+        with override_settings(RECIPE_FAST_READ=fast_read):
+            response = self.client.get(f'/api/recipes/{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_same_response(self):
+        for user in (None, self.reader):
+            self.client.force_authenticate(user)
+            for query in QUERIES:
+                with self.subTest(query=query, user=user):
+                    self.assertEqual(
+                        self.render(query, True), self.render(query, False),
+                    )
+
+    def test_queries_do_not_grow_with_page(self):
+        # Проверка версий, валидаторы (с числом строк для пагинатора),
+        # страница, теги и ингредиенты; пользователю - ещё подписки,
+        # избранное и корзина
+        with override_settings(RECIPE_FAST_READ=True):
+            for user, count in ((None, 6), (self.reader, 9)):
+                self.client.force_authenticate(user)
+                for limit in (1, 50):
+                    with self.subTest(user=user, limit=limit):
+                        with self.assertNumQueries(count):
+                            self.client.get(f'/api/recipes/?limit={limit}')
@@ -0,0 +1,107 @@
+from django.test import override_settings
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow
+from .base import ApiTestCase, create_recipe, create_user
+
+URL = '/api/recipes/feed/'
+
+
+class FeedTest(ApiTestCase):
+    """Лента подписок: полусоединение и входящие."""
+
+    def setUp(self):
+        super().setUp()
+        self.reader = create_user('reader')
+        self.cook = create_user('cook')
+        self.client.force_authenticate(self.reader)
+
+    def set_inbox(self, enabled):
+        self.reader.feed_inbox = enabled
+        self.reader.save(update_fields=['feed_inbox'])
+
+    def publish(self, count, author=None):
+        return [
+            create_recipe(author or self.author, f'Рецепт {number}').pk
+            for number in range(count)
+        ]
+
+    def inbox(self):
+        return set(FeedEntry.objects.filter(user=self.reader).values_list(
+            'recipe_id', flat=True,
+        ))
+
+    def read_feed(self, limit):
+        """id рецептов со всех страниц курсорной пагинации."""
+
+        ids, url = [], f'{URL}?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.json()['results']]
+            url = response.json()['next']
+        return ids
+
+    def newest_first(self, ids):
+        return list(Recipe.objects.filter(pk__in=ids).order_by(
+            '-pub_date', '-id',
+        ).values_list('pk', flat=True))
+
+    def test_fan_out_to_inbox(self):
+        self.set_inbox(True)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        ids = self.publish(2)
+        self.publish(1, author=self.cook)
+
+        self.assertEqual(self.inbox(), set(ids))
+
+    @override_settings(FEED_INBOX_SIZE=3)
+    def test_fan_out_trims_inbox(self):
+        self.set_inbox(True)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+        ids = self.publish(5)
+
+        self.assertEqual(self.inbox(), set(ids[-3:]))
+
+    @override_settings(FEED_INBOX_SIZE=3)
+    def test_follow_fills_and_trims_inbox(self):
+        self.set_inbox(True)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.publish(3)
+        ids = self.publish(2, author=self.cook)
+
+        Follow.objects.create(user=self.reader, author=self.cook)
+
+        self.assertEqual(len(self.inbox()), 3)
+        self.assertTrue(set(ids) <= self.inbox())
+
+    def test_cursor_pagination(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        ids = self.publish(5)
+        self.publish(2, author=self.cook)
+        for inbox in (False, True):
+            self.set_inbox(inbox)
+            if inbox:
+                FeedEntry.objects.bulk_create(
+                    FeedEntry(user=self.reader, recipe_id=pk) for pk in ids
+                )
+            with self.subTest(inbox=inbox):
+                self.assertEqual(self.read_feed(2), self.newest_first(ids))
+
+    @override_settings(FEED_INBOX_MIN_FOLLOWS=2)
+    def test_new_follower(self):
+        authors = [self.author, self.cook]
+        ids = self.publish(2) + self.publish(2, author=self.cook)
+
+        Follow.objects.create(user=self.reader, author=authors[0])
+        self.reader.refresh_from_db()
+        self.assertFalse(self.reader.feed_inbox)
+        self.assertEqual(self.read_feed(10), self.newest_first(ids[:2]))
+
+        Follow.objects.create(user=self.reader, author=authors[1])
+        self.reader.refresh_from_db()
+        self.assertTrue(self.reader.feed_inbox)
+        self.assertEqual(self.inbox(), set(ids))
+        self.assertEqual(self.read_feed(10), self.newest_first(ids))
@@ -0,0 +1,98 @@
+from django.test import override_settings
+
+from recipes.models import Recipe
+from users.models import Follow
+from .base import ApiTestCase, create_recipe, create_user
+
+
+class FieldsetTest(ApiTestCase):
+    """Выбор полей ответа параметрами ?fields= и ?omit=."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        create_recipe(cls.author, 'Омлет', [cls.breakfast], [cls.salt])
+
+    def get(self, query, fast_read=False, path='/api/recipes/'):
+        with override_settings(RECIPE_FAST_READ=fast_read):
+            return self.client.get(f'{path}?{query}')
+
+    def test_selected_fields(self):
+        for fast_read in (False, True):
+            with self.subTest(fast_read=fast_read):
+                response = self.get(
+                    'fields=id,author.username&omit=id', fast_read,
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()['results'],
+                    [{'author': {'username': self.author.username}}],
+                )
+
+    def test_unknown_fields(self):
+        for query, param, message in (
+            ('fields=id,title', 'fields', 'Неизвестные поля: title.'),
+            ('omit=title', 'omit', 'Неизвестные поля: title.'),
+            ('fields=author.nick', 'fields', 'Неизвестные поля: author.nick.'),
+            ('fields=name.first', 'fields', 'Неизвестные поля: name.first.'),
+        ):
+            for fast_read in (False, True):
+                with self.subTest(query=query, fast_read=fast_read):
+                    response = self.get(query, fast_read)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertTrue(
+                        response.json()[param][0].startswith(message),
+                    )
+
+    def test_error_lists_valid_fields(self):
+        response = self.get('fields=author.nick')
+
+        self.assertIn(
+            'Доступны: author.id, author.username, author.email, '
+            'author.first_name, author.last_name, author.is_subscribed.',
+            response.json()['fields'][0],
+        )
+
+    def test_nested_fields_checked_on_empty_page(self):
+        Recipe.objects.all().delete()
+
+        for fast_read in (False, True):
+            with self.subTest(fast_read=fast_read):
+                self.assertEqual(
+                    self.get('fields=tags.title', fast_read).status_code,
+                    400,
+                )
+
+    def test_other_endpoints(self):
+        for path in ('/api/tags/', '/api/users/'):
+            with self.subTest(path=path):
+                self.assertEqual(
+                    self.get('fields=title', path=path).status_code, 400,
+                )
+
+    def test_subscription_recipes(self):
+        reader = create_user('reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.client.force_authenticate(reader)
+        path = '/api/users/subscriptions/'
+
+        response = self.get('fields=id,recipes.name', path=path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.author.pk, 'recipes': [{'name': 'Омлет'}]}],
+        )
+
+        response = self.get('omit=recipes.image,email', path=path)
+        self.assertEqual(response.status_code, 200)
+        subscription, = response.json()['results']
+        self.assertNotIn('email', subscription)
+        self.assertEqual(
+            set(subscription['recipes'][0]), {'id', 'name', 'cooking_time'},
+        )
+
+        response = self.get('fields=recipes.title', path=path)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['fields'][0].startswith(
+            'Неизвестные поля: recipes.title. Доступны: recipes.id,',
+        ))
@@ -0,0 +1,60 @@
+from django.test import override_settings
+
+from recipes.models import Ingredient
+from .base import ApiTestCase, create_recipe
+
+
+class IngredientFilterTest(ApiTestCase):
+    """Фильтры по ингредиентам: списком id из индекса и подзапросом."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        egg, milk = (
+            Ingredient.objects.create(name=name, measurement_unit='шт')
+            for name in ('яйцо', 'молоко')
+        )
+        cls.egg, cls.milk = egg, milk
+        for name, ingredients in (
+            ('Омлет', [egg, milk, cls.salt]),
+            ('Блины', [egg, milk, cls.flour, cls.salt]),
+            ('Каша', [milk, cls.flour]),
+            ('Хлеб', [cls.flour]),
+        ):
+            create_recipe(cls.author, name, ingredients=ingredients)
+
+    def names(self, query):
+        response = self.client.get(f'/api/recipes/?limit=50&{query}')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_filters(self):
+        pantry = f'{self.egg.pk},{self.milk.pk},{self.salt.pk}'
+        for query, expected in (
+            (f'ingredients={self.egg.pk},{self.milk.pk}', {'Омлет', 'Блины'}),
+            (f'exclude_ingredients={self.egg.pk}', {'Каша', 'Хлеб'}),
+            (f'ingredients={self.milk.pk}&exclude_ingredients={self.salt.pk}',
+             {'Каша'}),
+            ('ingredients=0', set()),
+        ):
+            for max_ids in (500, 0):
+                with self.subTest(query=query, max_ids=max_ids):
+                    with override_settings(INGREDIENT_FILTER_MAX_IDS=max_ids):
+                        self.assertEqual(set(self.names(query)), expected)
+        for max_ids in (500, 0):
+            with self.subTest(query='pantry', max_ids=max_ids):
+                with override_settings(INGREDIENT_FILTER_MAX_IDS=max_ids):
+                    self.assertEqual(
+                        self.names(f'pantry={pantry}'),
+                        ['Омлет', 'Блины', 'Каша'],
+                    )
+
+    def test_ids_must_be_integers(self):
+        for query in (
+            f'ingredients={self.egg.pk}.5',
+            f'exclude_ingredients={self.egg.pk},x',
+            'pantry=1e3',
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/recipes/?{query}')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,127 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from recipes.constants import DAY, PENDING, RUNNING, WEEK
+from recipes.models import Job, RecipeActivity, RecipeRank
+from ..jobs import claim_job, enqueue, enqueue_periodic, run_claimed
+from ..management.commands import run_workers
+from .base import ApiTestCase, create_recipe
+
+
+class PeriodicJobTest(ApiTestCase):
+    """Воркеры сами ставят уплотнение популярных рецептов."""
+
+    def pending(self):
+        return Job.objects.filter(name='compact_rankings', status=PENDING)
+
+    def test_queued_once_per_interval(self):
+        enqueue_periodic()
+        enqueue_periodic()
+
+        job = self.pending().get()
+        self.assertEqual(job.dedup_key, 'periodic:compact_rankings')
+        self.assertAlmostEqual(
+            job.run_at, timezone.now() + timedelta(hours=1),
+            delta=timedelta(minutes=1),
+        )
+
+    def test_next_run_is_queued_after_claim(self):
+        enqueue_periodic()
+        claimed = claim_job(self.pending().get().pk)
+
+        enqueue_periodic()
+
+        self.assertNotEqual(self.pending().get().pk, claimed.pk)
+
+    @override_settings(RANKINGS_COMPACT_SECONDS=0)
+    def test_disabled(self):
+        enqueue_periodic()
+
+        self.assertFalse(self.pending().exists())
+
+    def test_old_activity_leaves_windows(self):
+        recipe = create_recipe(self.author, 'Омлет')
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        RecipeActivity.objects.create(
+            recipe=recipe, hour=hour - timedelta(days=2), score=3,
+        )
+        RecipeActivity.objects.create(
+            recipe=recipe, hour=hour - timedelta(days=8), score=5,
+        )
+        for window in (DAY, WEEK):
+            RecipeRank.objects.create(recipe=recipe, window=window, score=8)
+        enqueue_periodic()
+        self.pending().update(run_at=timezone.now())
+
+        self.assertTrue(run_claimed(claim_job(self.pending().get().pk)))
+
+        self.assertEqual(
+            dict(RecipeRank.objects.values_list('window', 'score')),
+            {WEEK: 3},
+        )
+        self.assertEqual(RecipeActivity.objects.count(), 1)
+
+
+class EnqueueTest(TestCase):
+    """Дедупликация задач по dedup_key."""
+
+    def test_pending_job_is_returned(self):
+        job = enqueue('compact_rankings', dedup_key='compact')
+
+        self.assertEqual(enqueue('compact_rankings', dedup_key='compact'), job)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_job_claimed_during_enqueue(self):
+        job = enqueue('compact_rankings', dedup_key='compact')
+        create = Job.objects.create
+        calls = []
+
+        def conflict_once(**fields):
+            # INSERT столкнулся с задачей, которую воркер забрал до
+            # чтения стоящей в очереди
+            calls.append(fields)
+            if len(calls) == 1:
+                raise IntegrityError
+            return create(**fields)
+
+        Job.objects.filter(pk=job.pk).update(status=RUNNING)
+        with mock.patch.object(
+            Job.objects, 'create', side_effect=conflict_once,
+        ):
+            queued = enqueue('compact_rankings', dedup_key='compact')
+
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(queued.pk, job.pk)
+        self.assertEqual(queued.status, PENDING)
+
+
+class RunWorkersTest(TestCase):
+    """Супервизор run_workers заменяет остановившихся воркеров."""
+
+    def test_dead_worker_is_respawned(self):
+        calls = []
+
+        def work(stop, *args):
+            # Первый воркер сразу падает, второй останавливает команду
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                raise RuntimeError('воркер упал')
+            stop.set()
+
+        stderr = StringIO()
+        with mock.patch.object(run_workers, 'work', work), \
+                mock.patch.object(threading, 'excepthook'):
+            call_command(
+                'run_workers', '--workers', '1', '--poll-interval', '0.01',
+                stdout=StringIO(), stderr=stderr,
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertIn(f'Воркер {calls[0]} остановился', stderr.getvalue())
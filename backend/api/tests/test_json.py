@@ -0,0 +1,56 @@
+import io
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer
+
+
+class FastJSONTest(SimpleTestCase):
+    """orjson разбирает и кодирует JSON так же, как DRF."""
+
+    def parse(self, parser, body):
+        return parser.parse(io.BytesIO(body))
+
+    def test_parse_matches_json_parser(self):
+        for body in (
+            '{"id": 1, "amount": 2.5, "name": "соль"}'.encode(),
+            b'{"id": 18446744073709551616}',
+            b'[-9223372036854775809, 9223372036854775807]',
+            b'["12345678901234567890"]',
+            b'[1e400]',
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(
+                    repr(self.parse(FastJSONParser(), body)),
+                    repr(self.parse(JSONParser(), body)),
+                )
+
+    def test_non_finite_constants_rejected(self):
+        for body in (b'NaN', b'[Infinity]', b'{"amount": -Infinity}', b'{'):
+            with self.subTest(body=body):
+                with self.assertRaises(ParseError) as fast:
+                    self.parse(FastJSONParser(), body)
+                with self.assertRaises(ParseError) as drf:
+                    self.parse(JSONParser(), body)
+                self.assertEqual(str(fast.exception), str(drf.exception))
+
+    def test_render_wide_integers(self):
+        data = {'id': 2 ** 70, 'ids': [-2 ** 64, 1]}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data),
+        )
+
+    def test_render_non_finite_floats_as_null(self):
+        data = {'amount': float('nan'), 'limits': [float('inf')]}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            b'{"amount":null,"limits":[null]}',
+        )
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import path
+
+from foodgram.db.router import use_primary
+from recipes.models import Tag
+from ..async_views import pooled
+from ..middleware import HybridMiddleware, ReplicaPinMiddleware
+
+
+class HybridMiddlewareTest(SimpleTestCase):
+
+    def test_both_handlers_required(self):
+        class SyncOnly(HybridMiddleware):
+            def call(self, request):
+                return self.get_response(request)
+
+        with self.assertRaises(TypeError):
+            SyncOnly(lambda request: HttpResponse())
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=5)
+class ReplicaPinMiddlewareTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = []
+
+        def get_response(request):
+            self.seen.append(use_primary.get())
+            return HttpResponse(status=201)
+
+        self.middleware = ReplicaPinMiddleware(get_response)
+
+    def test_safe_request_reads_replica(self):
+        self.middleware(self.factory.get('/api/recipes/'))
+
+        self.assertEqual(self.seen, [False])
+
+    def test_write_pins_client_with_signed_cookie(self):
+        response = self.middleware(self.factory.post('/api/recipes/'))
+        cookie = response.cookies[ReplicaPinMiddleware.cookie_name]
+
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES[cookie.key] = cookie.value
+        self.middleware(request)
+
+        self.assertEqual(self.seen, [True, True])
+        self.assertEqual(cookie['max-age'], 5)
+
+    def test_forged_cookie_is_ignored(self):
+        request = self.factory.get('/api/recipes/')
+        request.COOKIES[ReplicaPinMiddleware.cookie_name] = '1'
+        self.middleware(request)
+
+        self.assertEqual(self.seen, [False])
+
+
+# Барьер пропускает запросы, только когда все четыре выполняются
+# одновременно; при выполнении по очереди он ломается по таймауту
+barrier = threading.Barrier(4, timeout=5)
+
+
+@pooled
+def barrier_view(request):
+    barrier.wait()
+    return HttpResponse()
+
+
+@pooled
+def query_view(request):
+    return HttpResponse(Tag.objects.count())
+
+
+urlpatterns = [path('barrier/', barrier_view), path('query/', query_view)]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    DATABASE_REPLICAS=['default'],
+    SLOW_QUERY_THRESHOLD_MS=1000,
+)
+class AsyncMiddlewareTest(TransactionTestCase):
+    """Middleware проекта не выстраивает запросы ASGI в очередь."""
+
+    async def test_pooled_views_run_concurrently(self):
+        barrier.reset()
+        client = AsyncClient()
+        responses = await asyncio.gather(
+            *(client.get('/barrier/') for _ in range(barrier.parties)),
+        )
+
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [200] * barrier.parties,
+        )
+        self.assertFalse(barrier.broken)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    async def test_slow_queries_logged_from_pool_threads(self):
+        with self.assertLogs('foodgram.slow_queries') as logs:
+            await AsyncClient().get('/query/')
+
+        self.assertIn('"path": "/query/"', logs.output[0])
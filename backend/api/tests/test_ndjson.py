@@ -0,0 +1,143 @@
+import json
+
+from recipes.constants import PENDING
+from recipes.models import IngredientParameters, Job, Recipe
+from ..ndjson import export_recipes, import_recipes
+from .base import ApiTestCase, create_recipe
+
+
+def snapshot(queryset):
+    """Рецепты без id: то, что должно пережить выгрузку и загрузку."""
+
+    return sorted(
+        (
+            recipe.author.email,
+            recipe.name,
+            recipe.text,
+            recipe.cooking_time,
+            recipe.image.name,
+            recipe.pub_date,
+            tuple(sorted(recipe.tags.values_list('slug', flat=True))),
+            tuple(sorted(
+                IngredientParameters.objects.filter(recipe=recipe)
+                .values_list('ingredient__name', 'amount')
+            )),
+        )
+        for recipe in queryset
+    )
+
+
+class NdjsonTest(ApiTestCase):
+    """Выгрузка и загрузка рецептов в NDJSON."""
+
+    def setUp(self):
+        super().setUp()
+        create_recipe(
+            self.author, 'Омлет', [self.breakfast], [self.salt],
+        )
+        create_recipe(
+            self.author, 'Блины', [self.breakfast, self.lunch],
+            [self.salt, self.flour], cooking_time=30,
+        )
+
+    def similar_jobs(self):
+        return {
+            job.payload['recipe_id'] for job in Job.objects.filter(
+                name='update_similar_recipes', status=PENDING,
+            )
+        }
+
+    def test_round_trip(self):
+        before = snapshot(Recipe.objects.all())
+        lines = list(export_recipes(Recipe.objects.all()))
+        Recipe.objects.all().delete()
+
+        totals, errors = import_recipes(lines)
+
+        self.assertEqual((totals, errors), ({'created': 2}, []))
+        self.assertEqual(snapshot(Recipe.objects.all()), before)
+        self.assertEqual(
+            self.similar_jobs(),
+            set(Recipe.objects.values_list('pk', flat=True)),
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 2)
+
+    def test_existing_recipes_are_skipped(self):
+        lines = list(export_recipes(Recipe.objects.all()))
+
+        totals, errors = import_recipes(lines)
+
+        self.assertEqual((totals, errors), ({'exists': 2}, []))
+        self.assertEqual(self.similar_jobs(), set())
+
+    def test_update_rewrites_recipe_and_queues_similar(self):
+        omelette = Recipe.objects.get(name='Омлет')
+        data = json.loads(next(export_recipes(
+            Recipe.objects.filter(pk=omelette.pk),
+        )))
+        data.update(cooking_time=15, tags=['lunch'], ingredients=[
+            {'name': 'мука', 'measurement_unit': 'г', 'amount': 200},
+        ])
+
+        totals, errors = import_recipes(
+            [json.dumps(data)], update_existing=True,
+        )
+
+        self.assertEqual((totals, errors), ({'updated': 1}, []))
+        omelette.refresh_from_db()
+        self.assertEqual(omelette.cooking_time, 15)
+        self.assertEqual(
+            list(omelette.tags.values_list('slug', flat=True)), ['lunch'],
+        )
+        self.assertEqual(
+            list(IngredientParameters.objects.filter(
+                recipe=omelette,
+            ).values_list('ingredient_id', 'amount')),
+            [(self.flour.pk, 200)],
+        )
+        self.assertEqual(self.similar_jobs(), {omelette.pk})
+
+    def test_bad_lines_are_reported(self):
+        line = json.loads(next(export_recipes(Recipe.objects.all())))
+        too_long = dict(line, name='Каша', cooking_time=100000)
+        too_much = dict(line, name='Суп', ingredients=[
+            {'name': 'соль', 'measurement_unit': 'г', 'amount': 32768},
+        ])
+        unknown_tag = dict(line, name='Пирог', tags=['dinner'])
+        good = dict(line, name='Салат')
+        Recipe.objects.all().delete()
+
+        totals, errors = import_recipes([
+            json.dumps(too_long),
+            '{not json',
+            '',
+            json.dumps(too_much),
+            json.dumps(unknown_tag),
+            json.dumps(good),
+        ])
+
+        self.assertEqual(totals, {'created': 1})
+        self.assertEqual([number for number, _ in errors], [1, 2, 4, 5])
+        self.assertTrue(errors[0][1].startswith('cooking_time:'))
+        self.assertTrue(errors[2][1].startswith('amount:'))
+        self.assertEqual(
+            list(Recipe.objects.values_list('name', flat=True)), ['Салат'],
+        )
+
+    def test_export_endpoint(self):
+        response = self.client.get('/api/recipes/export/?tags=lunch')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['name'] for line in lines], ['Блины'],
+        )
+
+    def test_export_endpoint_requires_authentication(self):
+        self.client.force_authenticate(None)
+
+        self.assertEqual(
+            self.client.get('/api/recipes/export/').status_code, 401,
+        )
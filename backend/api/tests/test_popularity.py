@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.core.management.sql import emit_post_migrate_signal
+from django.utils import timezone
+
+from recipes.constants import ALL_TIME, DAY, PENDING, WEEK
+from recipes.models import Favorited, Job, RecipeActivity, RecipeRank
+from ..jobs import claim_job, run_claimed
+from ..popularity import compact_rankings
+from .base import ApiTestCase, create_recipe, create_user
+
+
+class PopularRecipesTest(ApiTestCase):
+    """Очки популярных рецептов по окнам."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = create_recipe(self.author, 'Омлет')
+
+    def scores(self):
+        return dict(
+            RecipeRank.objects.filter(recipe=self.recipe).values_list(
+                'window', 'score',
+            )
+        )
+
+    def popular(self, window):
+        response = self.client.get(f'/api/recipes/popular/?window={window}')
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_removing_old_add_keeps_todays_score(self):
+        old = Favorited.objects.create(
+            user=create_user('old'), recipe=self.recipe,
+        )
+        RecipeActivity.objects.update(hour=timezone.now() - timedelta(days=3))
+        compact_rankings()
+        Favorited.objects.create(user=create_user('new'), recipe=self.recipe)
+
+        old.delete()
+
+        self.assertEqual(self.scores(), {DAY: 1, WEEK: 2, ALL_TIME: 1})
+        self.assertEqual(self.popular(DAY), [self.recipe.pk])
+        compact_rankings()
+        self.assertEqual(self.scores(), {DAY: 1, WEEK: 2, ALL_TIME: 1})
+
+    def test_popular_right_after_migrate(self):
+        reader = create_user('reader')
+        Favorited.objects.create(user=reader, recipe=self.recipe)
+        # Данные, накопленные до появления очков
+        RecipeRank.objects.all().delete()
+        RecipeActivity.objects.all().delete()
+
+        emit_post_migrate_signal(0, False, 'default')
+
+        job = Job.objects.get(name='compact_rankings', status=PENDING)
+        self.assertLessEqual(job.run_at, timezone.now())
+        self.assertTrue(run_claimed(claim_job(job.pk)))
+        self.assertEqual(self.popular(ALL_TIME), [self.recipe.pk])
+
+    def test_no_backfill_when_ranks_exist(self):
+        reader = create_user('reader')
+        Favorited.objects.create(user=reader, recipe=self.recipe)
+
+        emit_post_migrate_signal(0, False, 'default')
+
+        self.assertFalse(Job.objects.filter(name='compact_rankings').exists())
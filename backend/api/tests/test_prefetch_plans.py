@@ -0,0 +1,88 @@
+from django.test import override_settings
+
+from recipes.models import Favorited, Recipe
+from users.models import Follow
+from ..prefetch import UnplannedRelationAccess, strict_prefetch_plans
+from ..serializers import RecipeReadSerializer
+from .base import ApiTestCase, create_recipe, create_user
+
+
+# Версии проверяются перед каждым запросом, чтобы число запросов
+# не зависело от времени между ними
+@override_settings(
+    PREFETCH_PLAN_STRICT=True,
+    RECIPE_FAST_READ=False,
+    INVALIDATION_CHECK_SECONDS=0,
+)
+class PrefetchPlanTest(ApiTestCase):
+    """Сериализаторы эндпоинтов чтения не догружают связи вне плана.
+
+    С PREFETCH_PLAN_STRICT догрузка связи вызывает ошибку, а связи
+    страницы загружаются запросом на связь, а не на объект.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.follower = create_user('follower')
+        cook = create_user('cook')
+        Follow.objects.create(user=cls.follower, author=cls.author)
+        Follow.objects.create(user=cls.follower, author=cook)
+        for number, author in enumerate([cls.author, cook] * 3):
+            recipe = create_recipe(
+                author, f'Рецепт {number}',
+                [cls.breakfast, cls.lunch], [cls.salt, cls.flour],
+            )
+            Favorited.objects.create(user=cls.follower, recipe=recipe)
+
+    def get(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_guard_detects_unplanned_access(self):
+        recipes = list(Recipe.objects.all()[:2])
+
+        with self.assertRaises(UnplannedRelationAccess):
+            with strict_prefetch_plans():
+                RecipeReadSerializer(recipes, many=True).data
+
+    def test_read_endpoints(self):
+        recipe = Recipe.objects.first()
+        paths = [
+            '/api/recipes/?limit=50',
+            '/api/recipes/?limit=50&fields=id,name,author.username',
+            '/api/recipes/?limit=50&omit=tags,ingredients',
+            f'/api/recipes/{recipe.pk}/',
+            '/api/tags/',
+            '/api/users/?fields=id,email',
+        ]
+        for user in (None, self.follower):
+            self.client.force_authenticate(user)
+            for path in paths:
+                with self.subTest(user=user, path=path):
+                    self.get(path)
+
+    def test_queries_do_not_grow_with_page(self):
+        # SerializerMethodField вне плана: is_favorited и соседние поля
+        # пользователя считаются по запросу на объект, поэтому страницы
+        # сравниваются для анонима
+        self.client.force_authenticate(None)
+        for path, count in (
+            ('/api/recipes/?limit={}', 6),
+            ('/api/users/?limit={}', 3),
+        ):
+            for limit in (1, 50):
+                with self.subTest(path=path, limit=limit):
+                    with self.assertNumQueries(count):
+                        self.get(path.format(limit))
+
+    def test_subscriptions(self):
+        self.client.force_authenticate(self.follower)
+
+        response = self.get('/api/users/subscriptions/?recipe_limit=2')
+
+        self.assertEqual(
+            [len(author['recipes']) for author in response.json()['results']],
+            [2, 2],
+        )
@@ -0,0 +1,58 @@
+from django.apps import apps
+from django.conf import settings
+
+from recipes.constants import PENDING
+from recipes.models import Ingredient, Job, Recipe, SimilarRecipe
+from ..signals import queue_similar_backfill
+from ..similarity import rebuild_similar, update_similar
+from .base import ApiTestCase, create_recipe
+
+
+def similar_lists():
+    return sorted(SimilarRecipe.objects.values_list(
+        'recipe_id', 'similar_id', 'score',
+    ))
+
+
+class SimilarRecipeTest(ApiTestCase):
+    """Списки похожих рецептов."""
+
+    def setUp(self):
+        super().setUp()
+        egg = Ingredient.objects.create(name='яйцо', measurement_unit='шт')
+        for name, tags, ingredients in (
+            ('Омлет', [self.breakfast], [egg, self.salt]),
+            ('Блины', [self.breakfast], [egg, self.flour, self.salt]),
+            ('Хлеб', [self.lunch], [self.flour, self.salt]),
+            ('Яичница', [self.breakfast], [egg]),
+        ):
+            create_recipe(self.author, name, tags, ingredients)
+
+    def test_updates_match_rebuild(self):
+        for recipe in Recipe.objects.order_by('pk'):
+            update_similar(recipe, count=2)
+        updated = similar_lists()
+
+        rebuild_similar(2)
+
+        self.assertEqual(updated, similar_lists())
+
+    def test_backfill_is_queued_after_migrate(self):
+        recipes = apps.get_app_config('recipes')
+
+        queue_similar_backfill(apps.get_app_config('users'))
+        self.assertFalse(Job.objects.exists())
+        queue_similar_backfill(recipes)
+        queue_similar_backfill(recipes)
+
+        job = Job.objects.get(name='rebuild_similar', status=PENDING)
+        self.assertEqual(
+            job.payload, {'count': settings.SIMILAR_RECIPES_COUNT},
+        )
+
+    def test_no_backfill_when_lists_exist(self):
+        rebuild_similar(2)
+
+        queue_similar_backfill(apps.get_app_config('recipes'))
+
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,110 @@
+import gzip
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.test import override_settings
+
+from ..snapshots import SNAPSHOT_PATHS, render_snapshots
+from ..versions import RECIPES, TAGS
+from ..warmup import warm_caches
+from .base import ApiTestCase, create_recipe
+
+
+def nginx_file(root, url):
+    """Файл, который nginx ищет по try_files "$uri$is_args$args.json"."""
+
+    parts = urlsplit(url)
+    is_args = '?' if parts.query else ''
+    return root / f'{parts.path}{is_args}{parts.query}.json'.lstrip('/')
+
+
+class SnapshotTest(ApiTestCase):
+    """Снимки анонимных ответов для nginx."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings = override_settings(
+            SNAPSHOT_ROOT=str(self.root),
+            SNAPSHOT_BASE_URL='https://foodgram.example',
+            SNAPSHOT_PAGES=1,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        for number in range(3):
+            create_recipe(self.author, f'Рецепт {number}', [self.breakfast])
+        self.client.force_authenticate(None)
+
+    def written(self):
+        return {
+            path for path in self.root.rglob('*.json') if path.is_file()
+        }
+
+    def test_files_match_nginx_lookup(self):
+        urls = [
+            '/api/tags/',
+            '/api/recipes/',
+            '/api/recipes/?page=1&limit=6',
+            '/api/recipes/?page=1&limit=6&tags=breakfast&tags=lunch',
+        ]
+
+        self.assertEqual(render_snapshots(TAGS), 1)
+        self.assertEqual(render_snapshots(RECIPES), 3)
+
+        self.assertEqual(
+            self.written(), {nginx_file(self.root, url) for url in urls},
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                path = nginx_file(self.root, url)
+                expected = self.client.get(
+                    url, HTTP_HOST='foodgram.example', secure=True,
+                ).json()
+                self.assertEqual(json.loads(path.read_bytes()), expected)
+                self.assertEqual(
+                    gzip.decompress(
+                        path.with_name(path.name + '.gz').read_bytes(),
+                    ),
+                    path.read_bytes(),
+                )
+
+    def test_absolute_urls_use_base_url(self):
+        render_snapshots(RECIPES)
+
+        recipes = json.loads(
+            nginx_file(self.root, '/api/recipes/').read_bytes(),
+        )['results']
+        self.assertEqual(len(recipes), 3)
+        for recipe in recipes:
+            self.assertTrue(
+                recipe['image'].startswith('https://foodgram.example/media/'),
+            )
+
+    def test_stale_snapshots_are_removed(self):
+        stale = nginx_file(self.root, '/api/recipes/?page=1&tags=dinner')
+        stale.parent.mkdir(parents=True)
+        for suffix in ('', '.gz'):
+            stale.with_name(stale.name + suffix).write_bytes(b'[]')
+
+        render_snapshots(RECIPES)
+
+        self.assertFalse(stale.exists())
+        self.assertFalse(stale.with_name(stale.name + '.gz').exists())
+        self.assertIn(nginx_file(self.root, '/api/recipes/'), self.written())
+
+    def test_every_dataset_has_a_path(self):
+        for key in SNAPSHOT_PATHS:
+            with self.subTest(key=key):
+                self.assertGreaterEqual(render_snapshots(key), 1)
+
+    def test_warm_caches(self):
+        report = dict(
+            (name, result) for name, _, result in warm_caches(1, 1)
+        )
+
+        self.assertEqual(report['справочники'], '200: 2')
+        self.assertEqual(report['страницы рецептов'], '200: 2')
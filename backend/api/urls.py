@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    BatchView,
     CustomUserViewSet,
     IngredientViewSet,
     RecipeViewSet,
@@ -18,8 +20,27 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('users', CustomUserViewSet, basename='users')
 
-urlpatterns = [
-    path('', include(router.urls)),
+router_urls = router.urls
+
+batch_view = BatchView.as_view()
+
+urlpatterns = []
+
+if settings.ASGI_MODE:
+    from .async_views import download_shopping_cart, pooled
+
+    urlpatterns.append(path(
+        'recipes/download_shopping_cart/',
+        download_shopping_cart,
+        name='recipes-download-shopping-cart',
+    ))
+    for url_pattern in router_urls:
+        url_pattern.callback = pooled(url_pattern.callback)
+    batch_view = pooled(batch_view)
+
+urlpatterns += [
+    path('batch/', batch_view, name='batch'),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
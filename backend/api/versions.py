@@ -0,0 +1,71 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from recipes.models import DataVersion
+
+# Ключи версий общих наборов данных
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+RECIPES = 'recipes'
+ACCOUNTS = 'account'
+
+
+def user_key(user_id):
+    """Версия личных данных: подписки, избранное и корзина."""
+
+    return f'user:{user_id}'
+
+
+def account_key(user_id):
+    """Версия самого аккаунта: профиль, пароль, токены."""
+
+    return f'{ACCOUNTS}:{user_id}'
+
+
+def bump_versions(*keys):
+    """Увеличивает счётчики ключей, создавая недостающие.
+
+    Для ключей общих наборов данных ставится перерисовка снимков.
+    """
+
+    now = timezone.now()
+    for key in keys:
+        updated = DataVersion.objects.filter(key=key).update(
+            value=F('value') + 1,
+            updated_at=now,
+        )
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(key=key)
+        except IntegrityError:
+            DataVersion.objects.filter(key=key).update(
+                value=F('value') + 1,
+                updated_at=now,
+            )
+    # Модуль снимков сам импортирует ключи отсюда
+    from .snapshots import schedule_snapshots
+
+    schedule_snapshots(keys)
+
+
+def get_versions(*keys):
+    """Словарь ключ -> (версия, дата изменения) одним запросом."""
+
+    versions = dict.fromkeys(keys, (0, None))
+    versions.update(
+        (key, (value, updated_at))
+        for key, value, updated_at in DataVersion.objects.filter(
+            key__in=keys,
+        ).values_list('key', 'value', 'updated_at')
+    )
+    return versions
+
+
+def touch_recipes(queryset):
+    """Отмечает рецепты изменёнными, например после правки автора."""
+
+    if queryset.update(updated_at=timezone.now()):
+        bump_versions(RECIPES)
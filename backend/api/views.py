@@ -1,4 +1,7 @@
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
 from rest_framework import mixins, status, viewsets
@@ -10,7 +13,9 @@ from rest_framework.permissions import (
     SAFE_METHODS,
 )
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from recipes.constants import WEEK
 from recipes.models import (
     Favorited,
     Ingredient,
@@ -19,10 +24,20 @@ from recipes.models import (
     Tag,
 )
 from users.models import Follow, User
+from .batch import run_subrequest
+from .bulk_recipes import create_recipes
+from .conditional import ConditionalGetMixin, RecipeConditionalMixin
 from .download_cart import download_cart
+from .fast_read import recipe_rows, serialize_recipes
+from .feed import feed_queryset
+from .fieldsets import check_fieldsets
 from .filters import GetRecipeFilterSet, NameIngredientSearch
-from .pagination import RecipePagination
+from .invalidation import CachedListMixin
+from .ndjson import CONTENT_TYPE, export_recipes
+from .pagination import FeedPagination, RecipePagination
 from .permissions import IsOwnerOrAdminOrReadOnly
+from .popularity import WINDOWS
+from .prefetch import PrefetchPlanMixin, apply_prefetch_plan
 from .serializers import (
     CustomUserSerializer,
     FollowReadSerializer,
@@ -32,12 +47,13 @@ from .serializers import (
     RecipeReadSerializer,
     TagSerializer,
 )
+from .versions import INGREDIENTS, TAGS
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(PrefetchPlanMixin, UserViewSet):
     """Вьюсет для пользователя."""
 
-    queryset = User.objects.all()
+    queryset = User.objects.filter(deleted_at__isnull=True)
     serializer_class = CustomUserSerializer
     pagination_class = RecipePagination
     permission_classes = (IsAuthenticatedOrReadOnly,)
@@ -63,7 +79,7 @@ class CustomUserViewSet(UserViewSet):
 
         user = request.user
         author_id = self.kwargs.get('id')
-        author = get_object_or_404(User, id=author_id)
+        author = get_object_or_404(self.queryset, id=author_id)
         obj = Follow.objects.filter(user=user, author=author)
 
         if request.method == 'POST':
@@ -77,10 +93,11 @@ class CustomUserViewSet(UserViewSet):
                     {'detail': 'Нельзя подписаться на самого себя.'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            follow, created = (
-                Follow.objects
-                .get_or_create(user=user, author=author)
-            )
+            with transaction.atomic():
+                follow, created = (
+                    Follow.objects
+                    .get_or_create(user=user, author=author)
+                )
             serializer = FollowReadSerializer(
                 follow,
                 context={'request': request},
@@ -104,7 +121,14 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Метод для получения всех подписок."""
 
-        queryset = Follow.objects.filter(user=self.request.user)
+        queryset = apply_prefetch_plan(
+            Follow.objects.filter(
+                user=self.request.user,
+                author__deleted_at__isnull=True,
+            ),
+            FollowReadSerializer,
+            FollowReadSerializer(context={'request': request}),
+        )
         pages = self.paginate_queryset(queryset)
         serializer = FollowReadSerializer(
             pages,
@@ -113,8 +137,14 @@ class CustomUserViewSet(UserViewSet):
         )
         return self.get_paginated_response(serializer.data)
 
+    def perform_destroy(self, instance):
+        instance.soft_delete()
+
 
 class TagViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    PrefetchPlanMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
@@ -124,9 +154,14 @@ class TagViewSet(
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AllowAny,)
+    version_keys = (TAGS,)
+    list_cache_namespace = TAGS
 
 
 class IngredientViewSet(
+    ConditionalGetMixin,
+    CachedListMixin,
+    PrefetchPlanMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet,
@@ -138,17 +173,20 @@ class IngredientViewSet(
     filter_backends = (DjangoFilterBackend,)
     filterset_class = NameIngredientSearch
     permission_classes = (AllowAny,)
+    version_keys = (INGREDIENTS,)
+    list_cache_namespace = INGREDIENTS
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    RecipeConditionalMixin,
+    PrefetchPlanMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет для рецептов."""
 
-    queryset = (
-        Recipe.objects
-        .select_related('author')
-        .prefetch_related('ingredients', 'tags')
-        .order_by('-pub_date')
-    )
+    queryset = Recipe.objects.filter(
+        author__deleted_at__isnull=True,
+    ).order_by('-pub_date')
     pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = GetRecipeFilterSet
@@ -159,12 +197,135 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeReadSerializer
         return RecipeWriteSerializer
 
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_FAST_READ:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(self.fast_list, request)
+
+    def fast_list(self, request):
+        # Быстрый путь собирает ответ без сериализаторов, поэтому поля
+        # ?fields= и ?omit= сверяются с RecipeReadSerializer отдельно
+        check_fieldsets(
+            RecipeReadSerializer(context=self.get_serializer_context()),
+        )
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serialize_recipes(page, request),
+            )
+        return Response(serialize_recipes(queryset, request))
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination,
+    )
+    def feed(self, request):
+        """Метод для получения ленты рецептов из подписок."""
+
+        queryset = self.filter_queryset(
+            feed_queryset(request.user, self.get_queryset()),
+        )
+        if settings.RECIPE_FAST_READ:
+            page = self.paginate_queryset(recipe_rows(queryset, 'pub_date'))
+            return self.get_paginated_response(
+                serialize_recipes(page, request),
+            )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(AllowAny,),
+    )
+    def popular(self, request):
+        """Метод для получения популярных рецептов за период."""
+
+        window = request.query_params.get('window', WEEK)
+        if window not in WINDOWS:
+            return Response(
+                {'window': f'Допустимые значения: {", ".join(WINDOWS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            ranks__window=window,
+            ranks__score__gt=0,
+        ).order_by('-ranks__score', '-pub_date')
+        if settings.RECIPE_FAST_READ:
+            page = self.paginate_queryset(recipe_rows(queryset))
+            return self.get_paginated_response(
+                serialize_recipes(page, request),
+            )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['post'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+    )
+    def bulk(self, request):
+        """Метод для пакетного создания рецептов."""
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'detail': 'Ожидается непустой список рецептов.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.RECIPE_BULK_MAX:
+            return Response(
+                {'detail': f'Не больше {settings.RECIPE_BULK_MAX} '
+                           'рецептов за запрос.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(create_recipes(items, request.user))
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+    )
+    def export(self, request):
+        """Метод для выгрузки рецептов в NDJSON, по рецепту в строке."""
+
+        lines = export_recipes(self.filter_queryset(self.get_queryset()))
+        if settings.ASGI_MODE:
+            # Django 3.2 перебирает потоковый ответ в цикле событий,
+            # где запросы к базе запрещены
+            return HttpResponse(''.join(lines), content_type=CONTENT_TYPE)
+        return StreamingHttpResponse(lines, content_type=CONTENT_TYPE)
+
+    @action(
+        methods=['get'],
+        detail=True,
+        permission_classes=(AllowAny,),
+    )
+    def similar(self, request, pk=None):
+        """Метод для получения похожих рецептов."""
+
+        recipe = get_object_or_404(Recipe, pk=pk)
+        queryset = self.get_queryset().filter(
+            similar_to__recipe=recipe,
+        ).order_by('-similar_to__score', '-pub_date')
+        if settings.RECIPE_FAST_READ:
+            return Response(serialize_recipes(recipe_rows(queryset), request))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def add_to(self, model, request, pk):
         try:
-            recipe = Recipe.objects.get(pk=pk)
+            recipe = Recipe.objects.get(
+                pk=pk, author__deleted_at__isnull=True,
+            )
         except Recipe.DoesNotExist:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
@@ -174,7 +335,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 {'detail': 'Выбранный рецепт уже добавлен'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        model.objects.create(user=user, recipe=recipe)
+        with transaction.atomic():
+            model.objects.create(user=user, recipe=recipe)
         serializer = MiniRecipeSerializer(recipe)
         return Response(
             data=serializer.data,
@@ -226,6 +388,51 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Метод для скачивания списка покупок."""
 
         user = self.request.user
-        if user.shopping_cart.exists():
+        if user.shopping_cart.filter(
+            recipe__author__deleted_at__isnull=True,
+        ).exists():
             return download_cart(user)
         return Response(status=status.HTTP_404_NOT_FOUND)
+
+
+class BatchView(APIView):
+    """Пакет GET-запросов к API за один HTTP-запрос.
+
+    Пути передаются параметрами ?url=, подзапросы выполняются в этом же
+    процессе с пользователем и соединением пакетного запроса. Параметры
+    ?etag= в том же порядке, что и url, служат If-None-Match подзапросов;
+    пустое значение пропускает проверку.
+    """
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        urls = request.query_params.getlist('url')
+        if not urls:
+            return Response(
+                {'detail': 'Передайте пути параметрами url.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(urls) > settings.BATCH_MAX_REQUESTS:
+            return Response(
+                {'detail': (
+                    f'Не больше {settings.BATCH_MAX_REQUESTS} '
+                    f'запросов в пакете.'
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        etags = request.query_params.getlist('etag')
+        if len(etags) > len(urls):
+            return Response(
+                {'detail': 'Параметров etag больше, чем url.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        etags += [None] * (len(urls) - len(etags))
+        responses = []
+        for url, etag in zip(urls, etags):
+            code, body, etag = run_subrequest(request, url, type(self), etag)
+            response = {'url': url, 'status': code, 'body': body}
+            if etag:
+                response['etag'] = etag
+            responses.append(response)
+        return Response({'responses': responses})
@@ -0,0 +1,119 @@
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from django.apps import apps
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+
+from recipes.models import Recipe
+
+WARMUP_PATHS = ('/api/tags/', '/api/ingredients/')
+
+
+def get_host():
+    """Хост из ALLOWED_HOSTS, который пропустит проверку заголовка Host."""
+
+    return next(
+        (host.lstrip('.') for host in settings.ALLOWED_HOSTS
+         if host.strip('.*')),
+        'localhost',
+    )
+
+
+@lru_cache(maxsize=None)
+def get_handler():
+    """Обработчик WSGI со своей цепочкой middleware."""
+
+    return WSGIHandler()
+
+
+def render_request(path, host=None, secure=False):
+    """Ответ приложения на анонимный GET без сетевого запроса.
+
+    Запрос проходит все middleware, как запрос от gunicorn, но без
+    сигналов начала и конца запроса: соединение с базой остаётся
+    открытым для следующих запросов прогрева или снимков.
+    """
+
+    request = RequestFactory().get(
+        path, secure=secure, HTTP_HOST=host or get_host(),
+    )
+    return get_handler().get_response(request)
+
+
+def popular_tag_combinations(limit):
+    """Самые частые наборы тегов рецептов, начиная с пустого набора."""
+
+    tags = defaultdict(list)
+    for recipe_id, slug in Recipe.tags.through.objects.order_by(
+        'tag__slug',
+    ).values_list('recipe_id', 'tag__slug'):
+        tags[recipe_id].append(slug)
+    combinations = Counter(tuple(slugs) for slugs in tags.values())
+    # Фронтенд показывает и рецепты с одним выбранным тегом
+    combinations.update((slug,) for slugs in tags.values() for slug in slugs)
+    return [()] + [
+        combination for combination, _ in combinations.most_common(limit)
+    ]
+
+
+def prime_imports():
+    """Загружает модули вьюх и метаданные моделей."""
+
+    from . import serializers, views  # noqa: F401
+    from .prefetch import get_prefetch_plan
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+    for serializer_class in (
+        serializers.RecipeReadSerializer,
+        serializers.TagSerializer,
+        serializers.IngredientSerializer,
+        serializers.CustomUserSerializer,
+    ):
+        get_prefetch_plan(serializer_class)
+    return f'моделей {len(apps.get_models())}'
+
+
+def prime_ingredient_index():
+    from .ingredient_index import ingredient_index
+
+    ingredient_index.containing_any(())
+    return f'ингредиентов {len(ingredient_index.recipes)}'
+
+
+def warm_caches(pages=2, combinations=5):
+    """Прогревает кэши воркера; возвращает [(шаг, секунды, итог)].
+
+    Справочники и страницы рецептов запрашиваются анонимно через весь
+    стек middleware, поэтому заполняются кэши списков, индекс
+    ингредиентов и соединение с базой.
+    """
+
+    def fetch(paths):
+        statuses = Counter(render_request(path).status_code for path in paths)
+        return ', '.join(
+            f'{status}: {count}' for status, count in sorted(statuses.items())
+        )
+
+    steps = [
+        ('импорт и метаданные ORM', prime_imports),
+        ('справочники', lambda: fetch(WARMUP_PATHS)),
+        ('индекс ингредиентов', prime_ingredient_index),
+        ('страницы рецептов', lambda: fetch(
+            '/api/recipes/?' + urlencode(
+                [('page', page)] + [('tags', slug) for slug in combination],
+            )
+            for combination in popular_tag_combinations(combinations)
+            for page in range(1, pages + 1)
+        )),
+    ]
+    report = []
+    for name, step in steps:
+        started = time.perf_counter()
+        result = step()
+        report.append((name, time.perf_counter() - started, result))
+    return report
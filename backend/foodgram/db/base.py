@@ -0,0 +1,104 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2.extensions import ISOLATION_LEVEL_READ_COMMITTED
+
+from .pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, pool_settings):
+    """Возвращает пул соединений текущего процесса для базы alias."""
+
+    key = (os.getpid(), alias)
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(
+                max_size=pool_settings['MAX_SIZE'],
+                max_lifetime=pool_settings['MAX_LIFETIME'],
+                timeout=pool_settings['TIMEOUT'],
+            )
+        return pools[key]
+
+
+def close_pools():
+    """Закрывает простаивающие соединения всех пулов процесса."""
+
+    with pools_lock:
+        for (pid, _), pool in pools.items():
+            if pid == os.getpid():
+                pool.close_all()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений и пулом соединений.
+
+    Дополнительные ключи в настройках базы:
+    HEALTH_CHECKS - проверять постоянное соединение при первом обращении
+    в каждом запросе;
+    POOL - словарь ENABLED, MAX_SIZE, MAX_LIFETIME, TIMEOUT для пула
+    соединений внутри процесса (для воркеров с потоками).
+    """
+
+    health_check_done = False
+
+    @property
+    def pool_settings(self):
+        return self.settings_dict.get('POOL') or {}
+
+    @property
+    def pool_enabled(self):
+        return bool(self.pool_settings.get('ENABLED'))
+
+    def get_new_connection(self, conn_params):
+        if not self.pool_enabled:
+            return super().get_new_connection(conn_params)
+
+        pool = get_pool(self.alias, self.pool_settings)
+        created = []
+
+        def connect():
+            created.append(True)
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params,
+            )
+
+        connection = pool.acquire(connect)
+        if not created:
+            self.isolation_level = self.settings_dict['OPTIONS'].get(
+                'isolation_level', ISOLATION_LEVEL_READ_COMMITTED,
+            )
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        if self.connection is not None and self.pool_enabled:
+            with self.wrap_database_errors:
+                get_pool(self.alias, self.pool_settings).release(
+                    self.connection,
+                    discard=self.errors_occurred,
+                )
+            return
+        return super()._close()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
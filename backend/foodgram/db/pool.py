@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_UNKNOWN,
+)
+
+# Соединение, простоявшее дольше этого времени, проверяется перед выдачей
+HEALTH_CHECK_IDLE_SECONDS = 30
+
+
+class PoolTimeout(OperationalError):
+    """Свободное соединение не появилось за отведённое время."""
+
+
+class ConnectionPool:
+    """Пул соединений psycopg2 внутри одного процесса.
+
+    Размер пула ограничен max_size: если все соединения заняты, поток
+    ждёт освобождения не дольше timeout секунд. Соединения старше
+    max_lifetime закрываются при возврате, а долго простаивавшие
+    проверяются запросом SELECT 1 перед выдачей.
+    """
+
+    def __init__(self, max_size, max_lifetime, timeout):
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.idle = deque()
+        self.created_at = {}
+
+    def acquire(self, connect):
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'Нет свободных соединений в пуле за {self.timeout} с.'
+            )
+        try:
+            while True:
+                with self.lock:
+                    released_at, connection = (
+                        self.idle.pop() if self.idle else (None, None)
+                    )
+                if connection is None:
+                    connection = connect()
+                    self.created_at[id(connection)] = time.monotonic()
+                    return connection
+                if self.is_expired(connection) or (
+                    time.monotonic() - released_at > HEALTH_CHECK_IDLE_SECONDS
+                    and not self.is_usable(connection)
+                ):
+                    self.discard(connection)
+                    continue
+                return connection
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self, connection, discard=False):
+        try:
+            if id(connection) not in self.created_at:
+                connection.close()
+                return
+            status = connection.info.transaction_status
+            if (
+                discard
+                or connection.closed
+                or status == TRANSACTION_STATUS_UNKNOWN
+                or self.is_expired(connection)
+            ):
+                self.discard(connection)
+                return
+            if status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self.lock:
+                self.idle.append((time.monotonic(), connection))
+        finally:
+            self.slots.release()
+
+    def is_expired(self, connection):
+        created_at = self.created_at.get(id(connection), 0)
+        return time.monotonic() - created_at > self.max_lifetime
+
+    def is_usable(self, connection):
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except Exception:
+            return False
+        return True
+
+    def discard(self, connection):
+        self.created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self.lock:
+            while self.idle:
+                _, connection = self.idle.pop()
+                self.discard(connection)
@@ -0,0 +1,30 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Читать ли с основной базы; вне HTTP-запросов (команды, воркеры) - всегда
+use_primary = ContextVar('use_primary', default=True)
+
+
+class ReplicaRouter:
+    """Роутер, отправляющий чтение на реплики, а запись на основную базу.
+
+    Чтение уходит на реплики только внутри безопасных HTTP-запросов,
+    для которых ReplicaPinMiddleware не закрепил клиента за основной базой.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_primary.get() or not settings.DATABASE_REPLICAS:
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
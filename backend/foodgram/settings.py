@@ -31,12 +31,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ReplicaPinMiddleware',
+    'api.middleware.CacheInvalidationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.SlowQueryLogMiddleware',
 ]
 
 ROOT_URLCONF = 'foodgram.urls'
@@ -58,16 +61,39 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
 
+# Режим ASGI включается в foodgram/asgi.py: тяжёлые вьюхи становятся
+# асинхронными и выполняются в пуле потоков ORM
+ASGI_MODE = (os.getenv('ASGI_MODE', 'False').lower() == 'true')
+ASYNC_POOL_THREADS = int(os.getenv('ASYNC_POOL_THREADS', 8))
+
+
+# Пул соединений внутри процесса: при включении соединение возвращается
+# в пул в конце каждого запроса, поэтому CONN_MAX_AGE не используется
+DB_POOL_ENABLED = (os.getenv('DB_POOL_ENABLED', 'False').lower() == 'true')
 
 DATABASES = {
     'production': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'foodgram.db',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_ENABLED
+            else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'HEALTH_CHECKS': (
+            os.getenv('DB_HEALTH_CHECKS', 'True').lower() == 'true'
+        ),
+        'POOL': {
+            'ENABLED': DB_POOL_ENABLED,
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
     },
     'dev': {
         'ENGINE': 'django.db.backends.sqlite3',
@@ -76,6 +102,68 @@ DATABASES = {
 }
 DATABASES['default'] = DATABASES['dev' if DEBUG else 'production']
 
+# Реплики для чтения: хосты PostgreSQL или, в режиме разработки, файлы SQLite
+DATABASE_REPLICAS = []
+for number, replica in enumerate(os.getenv('DB_REPLICAS', '').split(), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = os.path.join(BASE_DIR, replica)
+    else:
+        DATABASES[alias]['HOST'] = replica
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db.router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+# Журнал медленных запросов: выключен, если порог не задан
+SLOW_QUERY_THRESHOLD_MS = (
+    float(os.getenv('SLOW_QUERY_THRESHOLD_MS'))
+    if os.getenv('SLOW_QUERY_THRESHOLD_MS') else None
+)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(
+    os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1)
+)
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE',
+    os.path.join(BASE_DIR, 'slow_queries.log'),
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.FileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'formatter': 'raw',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'foodgram.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Кэш токенов: LRU в памяти воркера и, опционально, общий кэш Django
+TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 300))
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS') or None
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -120,13 +208,82 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
 }
 
+# Список рецептов собирается из values() без сериализаторов
+RECIPE_FAST_READ = (os.getenv('RECIPE_FAST_READ', 'True').lower() == 'true')
+
+# Ошибка при догрузке сериализатором связи вне плана предзагрузки
+PREFETCH_PLAN_STRICT = (
+    os.getenv('PREFETCH_PLAN_STRICT', 'False').lower() == 'true'
+)
+
+# Наибольшее число подзапросов в /api/batch/
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 10))
+
+# Лента из входящих для пользователей с большим числом подписок;
+# 0 отключает входящие
+FEED_INBOX_MIN_FOLLOWS = int(os.getenv('FEED_INBOX_MIN_FOLLOWS', 1000))
+FEED_INBOX_SIZE = int(os.getenv('FEED_INBOX_SIZE', 1000))
+
+# Полная перезагрузка индекса ингредиентов, секунды
+INGREDIENT_INDEX_RELOAD_SECONDS = int(
+    os.getenv('INGREDIENT_INDEX_RELOAD_SECONDS', 3600)
+)
+
+# Сколько id рецептов из индекса ингредиентов фильтры передают в запрос
+# списком; при большем числе рецепты отбирает подзапрос к базе
+INGREDIENT_FILTER_MAX_IDS = int(os.getenv('INGREDIENT_FILTER_MAX_IDS', 500))
+
+# Число похожих рецептов, которые хранятся для каждого рецепта
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', 10))
+
+# Размер пачки при фоновом удалении аккаунтов
+PURGE_CHUNK_SIZE = int(os.getenv('PURGE_CHUNK_SIZE', 500))
+
+# Очередь фоновых задач: с JOBS_EAGER задачи выполняются сразу
+# после коммита, без воркеров run_workers
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False').lower() == 'true'
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 30))
+JOB_TIMEOUT = int(os.getenv('JOB_TIMEOUT', 3600))
+JOB_KEEP_DAYS = int(os.getenv('JOB_KEEP_DAYS', 7))
+
+# Как часто run_workers ставит уплотнение популярных рецептов, секунды;
+# 0 отключает постановку
+RANKINGS_COMPACT_SECONDS = int(os.getenv('RANKINGS_COMPACT_SECONDS', 3600))
+
+# Сброс кэшей воркеров по версиям: не чаще раза в
+# INVALIDATION_CHECK_SECONDS; INVALIDATION_MARGIN покрывает долгие
+# транзакции и расхождение часов серверов
+INVALIDATION_CHECK_SECONDS = float(
+    os.getenv('INVALIDATION_CHECK_SECONDS', 1)
+)
+INVALIDATION_MARGIN = int(os.getenv('INVALIDATION_MARGIN', 30))
+
+# Снимки анонимных ответов для nginx; без SNAPSHOT_ROOT не пишутся.
+# SNAPSHOT_BASE_URL - адрес сайта для абсолютных ссылок в снимках
+SNAPSHOT_ROOT = os.getenv('SNAPSHOT_ROOT') or None
+SNAPSHOT_BASE_URL = os.getenv('SNAPSHOT_BASE_URL') or None
+SNAPSHOT_PAGES = int(os.getenv('SNAPSHOT_PAGES', 3))
+SNAPSHOT_DELAY = int(os.getenv('SNAPSHOT_DELAY', 5))
+
+# Наибольшее число рецептов в POST /api/recipes/bulk/
+RECIPE_BULK_MAX = int(os.getenv('RECIPE_BULK_MAX', 100))
+
 DJOSER = {
     'SERIALIZERS': {
         'user_create': 'api.serializers.CustomUserCreateSerializer',
@@ -0,0 +1,121 @@
+"""Настройки gunicorn.
+
+Количество воркеров и потоков подбирается по числу процессоров и доступной
+памяти; всё можно переопределить переменными окружения GUNICORN_*.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def available_memory_mb():
+    """Лимит памяти контейнера (cgroup) или доступная память хоста."""
+
+    for path in (
+        '/sys/fs/cgroup/memory.max',
+        '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+    ):
+        try:
+            with open(path) as limit_file:
+                limit = limit_file.read().strip()
+        except OSError:
+            continue
+        if limit.isdigit() and int(limit) < 1 << 50:
+            return int(limit) // (1024 * 1024)
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+
+cpu_count = multiprocessing.cpu_count()
+memory_mb = available_memory_mb()
+worker_memory_mb = env_int('GUNICORN_WORKER_MEMORY_MB', 150)
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8080')
+
+# sync, gthread, gevent или uvicorn (для foodgram.asgi)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'uvicorn':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+if worker_class in ('gevent', 'uvicorn.workers.UvicornWorker'):
+    default_workers = cpu_count
+else:
+    default_workers = cpu_count * 2 + 1
+if memory_mb:
+    default_workers = min(
+        default_workers,
+        max(1, memory_mb // worker_memory_mb),
+    )
+workers = env_int('GUNICORN_WORKERS', default_workers)
+
+threads = env_int(
+    'GUNICORN_THREADS',
+    4 if worker_class == 'gthread' else 1,
+)
+worker_connections = env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+
+# Код приложения загружается до форка, воркеры делят его страницы памяти.
+# С gevent предзагрузка выключена: модули должны импортироваться уже после
+# monkey patching в воркере
+preload_app = os.getenv(
+    'GUNICORN_PRELOAD',
+    str(worker_class != 'gevent'),
+).lower() == 'true'
+
+# Перезапуск воркеров против утечек памяти, с разбросом,
+# чтобы воркеры не перезапускались одновременно
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+timeout = env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+# Прогрев кэшей воркера до первого запроса, см. команду warm_caches
+warm_caches = os.getenv('GUNICORN_WARM_CACHES', 'False').lower() == 'true'
+warm_pages = env_int('GUNICORN_WARM_PAGES', 2)
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
+    if preload_app:
+        from django.db import connections
+
+        # Соединения, открытые мастером при предзагрузке, принадлежат ему:
+        # воркер забывает их, не закрывая общий сокет
+        for connection in connections.all():
+            connection.connection = None
+
+
+def post_worker_init(worker):
+    # В отличие от post_fork, приложение уже загружено и без preload_app
+    if not warm_caches:
+        return
+    from api.warmup import warm_caches as warm
+
+    for name, seconds, result in warm(warm_pages):
+        worker.log.info(
+            'Прогрев: %s за %.0f мс (%s)', name, seconds * 1000, result,
+        )
+
+
+def worker_exit(server, worker):
+    from foodgram.db.base import close_pools
+
+    close_pools()
@@ -4,6 +4,7 @@ from .models import (
     Favorited,
     Ingredient,
     IngredientParameters,
+    Job,
     Recipe,
     ShoppingCart,
     Tag,
@@ -13,30 +14,41 @@ from .models import (
 class IngredientParametersInline(admin.StackedInline):
     model = Recipe.ingredients.through
     extra = 1
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('ingredient')
 
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     inlines = (IngredientParametersInline, )
-    list_display = ('author', 'name')
-    search_fields = ('author__username', 'name', 'tags')
-    list_filter = ('author', 'name', 'tags')
+    list_display = ('name', 'author', 'pub_date', 'favorites_count')
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username')
+    list_filter = ('tags',)
+    autocomplete_fields = ('author',)
     readonly_fields = ('is_favorited',)
+    show_full_result_count = False
 
     def is_favorited(self, instance):
-        return instance.recipes_favorited.count()
+        return instance.favorites_count
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    list_filter = ('name',)
+    search_fields = ('name',)
+    show_full_result_count = False
 
 
 @admin.register(IngredientParameters)
 class IngredientParametersAdmin(admin.ModelAdmin):
     list_display = ('ingredient', 'recipe', 'amount')
+    list_select_related = ('ingredient', 'recipe')
     search_fields = ('ingredient__name', 'recipe__name')
+    autocomplete_fields = ('ingredient', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(Tag)
@@ -47,10 +59,25 @@ class TagAdmin(admin.ModelAdmin):
 @admin.register(Favorited)
 class FavoritedAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
+    autocomplete_fields = ('user', 'recipe')
+    show_full_result_count = False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'priority', 'attempts', 'run_at')
+    list_filter = ('status', 'name')
+    search_fields = ('dedup_key',)
+    readonly_fields = ('locked_at', 'created_at', 'finished_at', 'last_error')
+    show_full_result_count = False
@@ -23,3 +23,37 @@ MAX_LENGTH_NAME = 150
 # Константы для рецепта
 
 MAX_LENGTH_TITLE = 200
+# Наибольшее значение PositiveSmallIntegerField во всех поддерживаемых СУБД
+MAX_SMALL_INTEGER = 32767
+
+# Константы для версий данных
+
+MAX_LENGTH_VERSION_KEY = 64
+
+# Константы для рейтинга популярности
+
+DAY = 'day'
+WEEK = 'week'
+ALL_TIME = 'all'
+RANKING_WINDOWS = (
+    (DAY, '24 часа'),
+    (WEEK, '7 дней'),
+    (ALL_TIME, 'Всё время'),
+)
+MAX_LENGTH_WINDOW = 8
+
+# Константы для очереди задач
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+JOB_STATUSES = (
+    (PENDING, 'Ожидает'),
+    (RUNNING, 'Выполняется'),
+    (DONE, 'Выполнена'),
+    (FAILED, 'Ошибка'),
+)
+MAX_LENGTH_JOB_NAME = 100
+MAX_LENGTH_JOB_STATUS = 10
+MAX_LENGTH_DEDUP_KEY = 200
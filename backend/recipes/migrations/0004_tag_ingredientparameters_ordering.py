@@ -0,0 +1,21 @@
+# Generated by Django 3.2.3 on 2026-10-19 08:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_alter_ingredientparameters_options'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredientparameters',
+            options={'default_related_name': 'ingredient_parameters', 'ordering': ('id',), 'verbose_name': 'ингредиент с количеством', 'verbose_name_plural': 'Ингредиенты с количеством'},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ('id',), 'verbose_name': 'тег', 'verbose_name_plural': 'Теги'},
+        ),
+    ]
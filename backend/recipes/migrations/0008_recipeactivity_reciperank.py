@@ -0,0 +1,52 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('day', '24 часа'), ('week', '7 дней'), ('all', 'Всё время')], max_length=8, verbose_name='Окно')),
+                ('score', models.IntegerField(default=0, verbose_name='Очки')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинг рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(db_index=True, verbose_name='Час')),
+                ('score', models.IntegerField(default=0, verbose_name='Очки')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'активность рецепта',
+                'verbose_name_plural': 'Активность рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='reciperank',
+            index=models.Index(fields=['window', '-score'], name='recipe_rank_score'),
+        ),
+        migrations.AddConstraint(
+            model_name='reciperank',
+            constraint=models.UniqueConstraint(fields=('recipe', 'window'), name='unique_recipe_rank'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(fields=('recipe', 'hour'), name='unique_recipe_activity'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('users', 'User', 'recipes_count', 'Recipe', 'author'),
+    ('users', 'User', 'followers_count', 'Follow', 'author'),
+    ('recipes', 'Recipe', 'favorites_count', 'Favorited', 'recipe'),
+    ('recipes', 'Recipe', 'in_carts_count', 'ShoppingCart', 'recipe'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app_label, model_name, field, row_name, foreign_key in COUNTERS:
+        row_app = 'users' if row_name == 'Follow' else 'recipes'
+        rows = apps.get_model(row_app, row_name).objects.filter(
+            **{foreign_key: OuterRef('pk')},
+        )
+        apps.get_model(app_label, model_name).objects.update(**{
+            field: Coalesce(
+                Subquery(
+                    rows.order_by()
+                    .values(foreign_key)
+                    .annotate(total=Count('pk'))
+                    .values('total'),
+                    output_field=IntegerField(),
+                ),
+                0,
+            ),
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipeactivity_reciperank'),
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
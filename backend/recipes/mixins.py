@@ -0,0 +1,25 @@
+class CounterFieldsMixin:
+    """Модель со счётчиками, которые меняются только выражениями F().
+
+    Обычный save() записал бы значения счётчиков из экземпляра, которые
+    могли устареть, пока он жил в памяти, поэтому при изменении записи
+    они исключаются из UPDATE. При создании записи сохраняются как есть.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if not self._state.adding:
+            if update_fields is None:
+                # Отложенные поля save() без update_fields тоже не пишет
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.attname for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.attname not in deferred
+                ]
+            update_fields = [
+                name for name in update_fields
+                if name not in self.counter_fields
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
@@ -1,13 +1,23 @@
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from users.models import User
 from .constants import (
     COLOR,
+    JOB_STATUSES,
+    MAX_LENGTH_DEDUP_KEY,
+    MAX_LENGTH_JOB_NAME,
+    MAX_LENGTH_JOB_STATUS,
     MAX_LENGTH_INGREDIENT,
     MAX_LENGTH_TAG,
     MAX_LENGTH_TITLE,
+    MAX_LENGTH_VERSION_KEY,
+    MAX_LENGTH_WINDOW,
+    PENDING,
+    RANKING_WINDOWS,
 )
+from .mixins import CounterFieldsMixin
 
 
 class Tag(models.Model):
@@ -31,6 +41,7 @@ class Tag(models.Model):
     )
 
     class Meta:
+        ordering = ('id',)
         verbose_name = 'тег'
         verbose_name_plural = 'Теги'
 
@@ -61,9 +72,11 @@ class Ingredient(models.Model):
         return f'{self.name}, {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецепта."""
 
+    counter_fields = ('favorites_count', 'in_carts_count')
+
     author = models.ForeignKey(
         User,
         verbose_name='Автор рецепта',
@@ -100,6 +113,21 @@ class Recipe(models.Model):
         'Дата публикации рецепта',
         auto_now_add=True,
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения рецепта',
+        auto_now=True,
+        db_index=True,
+    )
+    favorites_count = models.IntegerField(
+        'В избранном',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.IntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
@@ -112,6 +140,12 @@ class Recipe(models.Model):
                 name='unique_recipe',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='recipe_author_pub_date',
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -137,6 +171,7 @@ class IngredientParameters(models.Model):
     )
 
     class Meta:
+        ordering = ('id',)
         verbose_name = 'ингредиент с количеством'
         verbose_name_plural = 'Ингредиенты с количеством'
         default_related_name = 'ingredient_parameters'
@@ -211,3 +246,211 @@ class ShoppingCart(models.Model):
         return (
             f'{self.user.username} добавил(а) в список покупок {self.recipe}'
         )
+
+
+class FeedEntry(models.Model):
+    """Рецепт во входящих ленты подписчика."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+    )
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class SimilarRecipe(models.Model):
+    """Похожий рецепт с оценкой пересечения ингредиентов и тегов."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='similar_entries',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт',
+        on_delete=models.CASCADE,
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ('recipe', '-score')
+        verbose_name = 'похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipe',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.similar} похож на {self.recipe}'
+
+
+class RecipeActivity(models.Model):
+    """Сумма добавлений в избранное и корзину за час."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='activity',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+    )
+    hour = models.DateTimeField('Час', db_index=True)
+    score = models.IntegerField('Очки', default=0)
+
+    class Meta:
+        verbose_name = 'активность рецепта'
+        verbose_name_plural = 'Активность рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'hour'],
+                name='unique_recipe_activity',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} {self.hour:%d.%m %H}:00: {self.score}'
+
+
+class RecipeRank(models.Model):
+    """Очки популярности рецепта в скользящем окне."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='ranks',
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+    )
+    window = models.CharField(
+        'Окно',
+        max_length=MAX_LENGTH_WINDOW,
+        choices=RANKING_WINDOWS,
+    )
+    score = models.IntegerField('Очки', default=0)
+
+    class Meta:
+        verbose_name = 'рейтинг рецепта'
+        verbose_name_plural = 'Рейтинг рецептов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'window'],
+                name='unique_recipe_rank',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['window', '-score'],
+                name='recipe_rank_score',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} ({self.window}): {self.score}'
+
+
+class DataVersion(models.Model):
+    """Счётчик изменений набора данных.
+
+    По счётчикам считаются валидаторы HTTP-кэша и сбрасываются кэши
+    в памяти воркеров.
+    """
+
+    key = models.CharField(
+        'Ключ',
+        max_length=MAX_LENGTH_VERSION_KEY,
+        unique=True,
+    )
+    value = models.PositiveBigIntegerField('Версия', default=1)
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'версия данных'
+        verbose_name_plural = 'Версии данных'
+
+    def __str__(self):
+        return f'{self.key}: {self.value}'
+
+
+class Job(models.Model):
+    """Отложенная задача для фоновых воркеров run_workers."""
+
+    name = models.CharField('Задача', max_length=MAX_LENGTH_JOB_NAME)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Статус',
+        max_length=MAX_LENGTH_JOB_STATUS,
+        choices=JOB_STATUSES,
+        default=PENDING,
+    )
+    dedup_key = models.CharField(
+        'Ключ дедупликации',
+        max_length=MAX_LENGTH_DEDUP_KEY,
+        null=True,
+        blank=True,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Наибольшее число попыток',
+        default=3,
+    )
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status=PENDING),
+                name='unique_pending_job',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='job_claim',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
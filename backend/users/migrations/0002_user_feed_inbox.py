@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='feed_inbox',
+            field=models.BooleanField(default=False, help_text='Лента собирается при публикации рецептов авторов.', verbose_name='Лента во входящих'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Аккаунт скрыт и ждёт очистки purge_deleted_users.', null=True, verbose_name='Дата удаления'),
+        ),
+    ]
@@ -1,12 +1,18 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
 from recipes.constants import MAX_LENGTH_EMAIL, MAX_LENGTH_NAME
+from recipes.mixins import CounterFieldsMixin
+from .signals import user_soft_deleted
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Кастомная модель пользователя."""
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     email = models.EmailField(
         'email',
         max_length=MAX_LENGTH_EMAIL,
@@ -29,6 +35,29 @@ class User(AbstractUser):
         'Пароль',
         max_length=MAX_LENGTH_NAME,
     )
+    feed_inbox = models.BooleanField(
+        'Лента во входящих',
+        default=False,
+        help_text='Лента собирается при публикации рецептов авторов.',
+    )
+    recipes_count = models.IntegerField(
+        'Рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.IntegerField(
+        'Подписчиков',
+        default=0,
+        editable=False,
+    )
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text='Аккаунт скрыт и ждёт очистки purge_deleted_users.',
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('first_name', 'last_name', 'username')
@@ -47,6 +76,23 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def soft_delete(self):
+        """Скрывает аккаунт и его рецепты сразу, не трогая зависимые строки.
+
+        Кэши сбрасывает и очистку строк ставит в очередь обработчик
+        сигнала user_soft_deleted.
+        """
+
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        with transaction.atomic():
+            User.objects.filter(pk=self.pk).update(
+                is_active=self.is_active,
+                deleted_at=self.deleted_at,
+            )
+            Token.objects.filter(user_id=self.pk).delete()
+            user_soft_deleted.send(sender=User, user=self)
+
 
 class Follow(models.Model):
     """Модель подписки."""
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Аккаунт скрыт методом User.soft_delete; аргумент user
+user_soft_deleted = Signal()
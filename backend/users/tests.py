@@ -0,0 +1,68 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from recipes.constants import PENDING
+from recipes.models import Job
+from .models import Follow, User
+
+
+class AdminDeleteTest(TestCase):
+    """Удаление пользователей и подписок через админку."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email='admin@example.com',
+            username='admin',
+            password='password',
+        )
+        cls.follower = User.objects.create_user(
+            email='follower@example.com',
+            username='follower',
+            password='password',
+        )
+        cls.author = User.objects.create_user(
+            email='author@example.com',
+            username='author',
+            password='password',
+        )
+        cls.follow = Follow.objects.create(
+            user=cls.follower, author=cls.author,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def delete(self, model, pk):
+        return self.client.post(
+            reverse(f'admin:users_{model}_delete', args=(pk,)),
+            {'post': 'yes'},
+        )
+
+    def test_delete_user_is_soft(self):
+        response = self.delete('user', self.follower.pk)
+
+        self.assertEqual(response.status_code, 302)
+        self.follower.refresh_from_db()
+        self.assertFalse(self.follower.is_active)
+        self.assertIsNotNone(self.follower.deleted_at)
+        # Подписка остаётся до задачи purge_user
+        self.assertTrue(Follow.objects.filter(pk=self.follow.pk).exists())
+        self.assertEqual(
+            list(Job.objects.filter(status=PENDING).values_list(
+                'name', 'payload',
+            )),
+            [('purge_user', {'user_id': self.follower.pk})],
+        )
+
+    def test_delete_follow_removes_row(self):
+        response = self.delete('follow', self.follow.pk)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Follow.objects.filter(pk=self.follow.pk).exists())
+        for user in User.objects.all():
+            self.assertTrue(user.is_active)
+            self.assertIsNone(user.deleted_at)
+        self.assertFalse(Job.objects.filter(name='purge_user').exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)